@@ -0,0 +1,140 @@
+"""
+Bytecode vs native benchmark of the hot library functions (runs on the Pico, or on the host as a dry run)
+
+Each module is loaded twice from its source: as written, with the @micropython.native and
+@micropython.viper functions compiled to machine code, and with those decorators removed so
+the same functions run as bytecode. Prints the microseconds per call of both and the speedup.
+The DAC and the display get a fake I2C bus, so only the Python side of a call is timed.
+On the host the decorators do nothing and both columns run the same CPython code.
+
+main.py's handle_clock_pulse() and play_step() are native too, but main.py cannot be
+loaded without starting the sequencer, so they are not in the table.
+
+Usage:
+python Host/benchmarks/bench_emitters.py
+on the Pico, with Software/lib uploaded as .py sources:
+mpremote run Host/benchmarks/bench_emitters.py
+"""
+
+import sys
+import time
+from array import array
+
+ON_PICO = sys.implementation.name == "micropython"
+EMITTER_DECORATORS = ("@micropython.native", "@micropython.viper")
+
+if ON_PICO:
+    LIB_DIR = "/lib"
+
+    def ticks_us():
+        return time.ticks_us()
+
+    def elapsed_us(start):
+        return time.ticks_diff(time.ticks_us(), start)
+else:
+    import os
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+    from simulator import LIB_DIR, Simulator  # noqa: E402
+
+    def ticks_us():
+        return time.perf_counter_ns() // 1000
+
+    def elapsed_us(start):
+        return ticks_us() - start
+
+
+def load(name, emitters):
+    """Executes lib/<name>.py into a new namespace, without the emitter decorators if emitters is False"""
+    with open(f"{LIB_DIR}/{name}.py") as file:
+        lines = file.read().split("\n")
+    if not emitters:
+        lines = [line for line in lines if line.strip() not in EMITTER_DECORATORS]
+    namespace = {"__name__": name}
+    exec("\n".join(lines), namespace)
+    return namespace
+
+
+def us_per_call(call, calls):
+    start = ticks_us()
+    for _ in range(calls):
+        call()
+    return elapsed_us(start) / calls
+
+
+class FakeI2C:
+    def writeto(self, address, buffer):
+        return len(buffer)
+
+    def writevto(self, address, buffers):
+        return sum(len(buffer) for buffer in buffers)
+
+
+def bench_rotary(module):
+    class Encoder(module["Rotary"]):
+        """Pins that keep turning clockwise, one full step every four calls"""
+        PINS = (2, 0, 1, 3)
+
+        def __init__(self):
+            super().__init__(0, 10, 1, False, module["Rotary"].RANGE_WRAP, False, False)
+            self.i = 0
+
+        def _hal_get_clk_value(self):
+            return self.PINS[self.i] >> 1
+
+        def _hal_get_dt_value(self):
+            pins = self.PINS[self.i]
+            self.i = (self.i + 1) & 3
+            return pins & 1
+
+    encoder = Encoder()
+    return us_per_call(lambda: encoder._process_rotary_pins(None), 2000)
+
+
+def bench_dac_write(module):
+    dac = module["MCP4725"](FakeI2C())
+    return us_per_call(lambda: dac.write(2048), 2000)
+
+
+def bench_display_show(module):
+    display = module["SSD1306_I2C"](128, 64, FakeI2C())
+    return us_per_call(display.show, 200)
+
+
+def bench_quantizer_rebuild(module):
+    quantizer = module["Quantizer"]()
+    scale = array("H", (note * 68 for note in range(61)))  # chromatic, 5 octaves
+
+    def rebuild():
+        quantizer.scale_length = 0  # force a rebuild
+        quantizer.rebuild(scale)
+
+    return us_per_call(rebuild, 5)
+
+
+BENCHMARKS = (
+    ("Rotary._process_rotary_pins", "rotary", bench_rotary),
+    ("MCP4725.write", "mcp4725", bench_dac_write),
+    ("SSD1306.show", "ssd1306", bench_display_show),
+    ("Quantizer.rebuild", "quantizer", bench_quantizer_rebuild),
+)
+
+
+def run():
+    print(f"{'function':<30}{'bytecode us':>12}{'native us':>11}{'speedup':>9}")
+    for label, name, bench in BENCHMARKS:
+        bytecode_us = bench(load(name, False))
+        native_us = bench(load(name, True))
+        print(f"{label:<30}{bytecode_us:>12.1f}{native_us:>11.1f}{bytecode_us / native_us:>8.2f}x")
+
+
+def main():
+    if ON_PICO:
+        run()
+    else:
+        with Simulator(echo_serial=True).installed():
+            run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Import time benchmark (runs on the host with CPython and the simulator's fake MicroPython modules)
+
+For every module in Software/lib, measures how long compiling its source takes (the Pico
+compiles .py files on import), how long executing the module body takes, and how many
+microseconds of simulated hardware calls the import makes (an import that talks to the
+display shows up here). Modules are imported dependencies first, so each row only counts
+the module itself. Host times are only comparable with each other, not with the Pico.
+
+Then boots the firmware on the simulator and reports the time from reset to the first
+DAC write and to the user interface being ready.
+
+Usage:
+python Host/benchmarks/bench_imports.py
+"""
+
+import importlib
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from simulator import LIB_DIR, Simulator  # noqa: E402
+
+REPEATS = 20
+# dependencies before the modules that import them
+IMPORT_ORDER = [
+    "logger",
+    "mcp4725",
+    "mcp4725_musical_scales",
+    "musical_scales",
+    "idle_gc",
+    "memory_report",
+    "ssd1306",
+    "rotary",
+    "rotary_irq_rp2",
+    "mp_button",
+    "menu",
+    "analog_reader",
+    "quantizer",
+    "latency",
+    "profiler",
+]
+
+
+def module_names() -> list[str]:
+    names = sorted(path.stem for path in LIB_DIR.glob("*.py"))
+    return [name for name in IMPORT_ORDER if name in names] + [name for name in names if name not in IMPORT_ORDER]
+
+
+def compile_ms(name: str) -> float:
+    path = LIB_DIR / f"{name}.py"
+    source = path.read_text()
+    start = time.perf_counter()
+    compile(source, str(path), "exec")
+    return (time.perf_counter() - start) * 1000
+
+
+def import_pass(sim: Simulator, names: list[str]) -> dict:
+    """Imports every module once, returns (exec ms, simulated us) per module."""
+    for name in names:
+        sys.modules.pop(name, None)
+    results = {}
+    for name in names:
+        virtual_start = sim.now_us
+        start = time.perf_counter()
+        importlib.import_module(name)
+        results[name] = ((time.perf_counter() - start) * 1000, sim.now_us - virtual_start)
+    return results
+
+
+def main() -> None:
+    names = module_names()
+    sim = Simulator()
+    passes = []
+    with sim.installed():
+        for _ in range(REPEATS):
+            passes.append(import_pass(sim, names))
+
+    print(f"{'module':<24}{'compile ms':>12}{'exec ms':>10}{'hw us':>8}")
+    for name in names:
+        compile_time = statistics.median(compile_ms(name) for _ in range(REPEATS))
+        exec_time = statistics.median(results[name][0] for results in passes)
+        hardware_us = passes[-1][name][1]
+        print(f"{name:<24}{compile_time:>12.3f}{exec_time:>10.3f}{hardware_us:>8}")
+
+    boot = Simulator().run(seconds=1)
+    print()
+    print(f"simulated boot to first DAC write: {boot.main.first_dac_write_us} us")
+    print(f"simulated boot to user interface: {boot.main.ui_ready_us} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+musical_scales benchmark (runs on the host with CPython)
+
+Compares scale generation in musical_scales against the previous implementation,
+which chained Note.__add__ for every note and compared Notes by formatted string.
+
+Usage:
+python Host/benchmarks/bench_musical_scales.py
+"""
+
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "Software", "lib"))
+
+import musical_scales  # noqa: E402
+
+ITERATIONS = 20_000
+CASES = [("C", "ionian", 1), ("C", "chromatic", 5), ("F#", "pentatonic minor", 3), ("A", "algerian", 5)]
+
+
+class LegacyNote:
+    """The previous Note: recomputes name and octave with math.floor for every new note"""
+
+    def __init__(self, semitones_from_middle_c: int):
+        self.semitones_from_middle_c = semitones_from_middle_c
+        self.name = musical_scales.names_from_interval[semitones_from_middle_c % 12]
+        self.octave = math.floor(semitones_from_middle_c / 12) + 3
+
+    @property
+    def midi(self):
+        return f"{self.name}{self.octave}"
+
+    def __add__(self, shift: int):
+        return LegacyNote(self.semitones_from_middle_c + shift)
+
+    def __eq__(self, other):
+        return self.midi == other.midi
+
+
+def legacy_scale(starting_note: str, mode: str = "ionian", octaves: int = 1) -> list:
+    notes = [LegacyNote(musical_scales.interval_from_names[starting_note])]
+    for _ in range(0, octaves):
+        for interval in musical_scales.scale_intervals[mode]:
+            notes.append(notes[-1] + interval)
+    return notes
+
+
+def per_second(function) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        function()
+    return ITERATIONS / (time.perf_counter() - start)
+
+
+def main() -> None:
+    print(f"{'scale':<24}{'legacy/s':>12}{'scale()/s':>12}{'names/s':>12}{'semitones/s':>13}")
+    for start, mode, octaves in CASES:
+        start_semitones = musical_scales.interval_from_names[start]
+        expected = [note.midi for note in legacy_scale(start, mode, octaves)]
+        assert musical_scales.scale(start, mode, octaves).names() == expected
+
+        legacy = per_second(lambda: legacy_scale(start, mode, octaves))
+        lazy = per_second(lambda: musical_scales.scale(start, mode, octaves))
+        names = per_second(lambda: musical_scales.scale(start, mode, octaves).names())
+        semitones = per_second(lambda: musical_scales.scale_semitones(start_semitones, mode, octaves))
+        label = f"{start} {mode} x{octaves}"
+        print(f"{label:<24.24}{legacy:>12,.0f}{lazy:>12,.0f}{names:>12,.0f}{semitones:>13,.0f}")
+
+    a, b = LegacyNote(4), LegacyNote(4)
+    legacy_eq = per_second(lambda: a == b)
+    c, d = musical_scales.Note("E"), musical_scales.Note("E")
+    print(f"Note == Note per second: legacy {legacy_eq:,.0f}, current {per_second(lambda: c == d):,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Quantizer benchmark (runs on the host with CPython)
+
+Measures how many ADC code -> DAC value conversions per second the lookup table
+quantizer achieves, compared to searching the scale for the nearest note on every
+conversion, and how long a table rebuild takes.
+
+Usage:
+python Host/benchmarks/bench_quantizer.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from simulator import Simulator  # noqa: E402
+
+CONVERSIONS = 200_000
+
+
+def nearest_note(quantizer, scale: list[int], code: int) -> int:
+    """Reference conversion without a table, searching the whole scale"""
+    value = quantizer.adc_code_to_dac_value(code)
+    return min(scale, key=lambda note: abs(note - value))
+
+
+def conversions_per_second(convert, codes) -> float:
+    start = time.perf_counter()
+    for code in codes:
+        convert(code)
+    return len(codes) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    # quantizer imports the micropython module, the simulator provides it
+    with Simulator(echo_serial=True).installed():
+        run()
+
+
+def run() -> None:
+    import mcp4725_musical_scales as sc
+    from quantizer import ADC_CODES, Quantizer
+
+    quantizer = Quantizer()
+    codes = [(i * 7919) % ADC_CODES for i in range(CONVERSIONS)]
+
+    print(f"{'scale':<12}{'octaves':>8}{'notes':>7}{'rebuild ms':>12}{'table conv/s':>15}{'search conv/s':>15}")
+    for scale_interval in ("chromatic", "major", "pentatonic minor"):
+        for octaves in (1, 5):
+            scale = sc.get_scale_of_12_bit_values(starting_note=12, scale_interval=scale_interval, octaves=octaves)
+            quantizer.scale_length = 0  # force a rebuild
+            start = time.perf_counter()
+            quantizer.rebuild(scale)
+            rebuild_ms = (time.perf_counter() - start) * 1000
+
+            # both conversions must agree on every code (ties may resolve to either note)
+            for code in range(ADC_CODES):
+                value = quantizer.adc_code_to_dac_value(code)
+                assert abs(quantizer.quantize(code) - value) == abs(nearest_note(quantizer, scale, code) - value)
+
+            table_rate = conversions_per_second(quantizer.quantize, codes)
+            search_rate = conversions_per_second(lambda code: nearest_note(quantizer, scale, code), codes[: CONVERSIONS // 10])
+            print(f"{scale_interval:<12.12}{octaves:>8}{len(scale):>7}{rebuild_ms:>12.2f}{table_rate:>15,.0f}{search_rate:>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Benchmark suite of the firmware's hot paths (runs on the host with CPython, on the simulator)
+
+main.py is booted on the simulator, then every benchmark calls one code path of the firmware
+many times and records per call:
+  us          host microseconds (best of the repeats), how fast CPython runs it, noisy
+  virtual_us  simulated Pico microseconds: the board model's HAL call and I2C bus time, deterministic
+  i2c_bytes   bytes sent or received on the I2C bus
+  render_us   estimated framebuf drawing time on the Pico of the frames flushed (see simulator/fakes/framebuf.py)
+The results are written to a JSON file. compare prints the change of every metric between
+two result files and fails if any metric got worse by more than the threshold, host
+microseconds have a threshold of their own as they vary from run to run.
+
+Usage:
+python Host/benchmarks/bench_suite.py run --out before.json
+python Host/benchmarks/bench_suite.py run --out after.json
+python Host/benchmarks/bench_suite.py compare before.json after.json --threshold 5 --host-threshold 25
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from simulator import CLOCK_INPUT_PIN, Simulator  # noqa: E402
+
+BOOT_US = 500_000
+DEFAULT_REPEATS = 5
+DEFAULT_THRESHOLD = 10.0  # %
+DEFAULT_HOST_THRESHOLD = 25.0  # % for host microseconds
+METRICS = ("us", "virtual_us", "i2c_bytes", "render_us")
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Bench:
+    """Times calls on a booted simulator"""
+
+    def __init__(self, sim: Simulator, repeats: int, scale: float) -> None:
+        self.sim = sim
+        self.repeats = repeats
+        self.scale = scale
+        self.results = {}
+
+    def measure(self, name: str, call, calls: int) -> None:
+        calls = max(1, int(calls * self.scale))
+        board, clock, frames = self.sim.board, self.sim.clock, self.sim.recorder.frames
+        host_us = []
+        for _ in range(self.repeats):
+            start_virtual_us, start_bytes, start_frame = clock.now_us, board.i2c_bytes, len(frames)
+            start = time.perf_counter_ns()
+            for _ in range(calls):
+                call()
+            host_us.append((time.perf_counter_ns() - start) / 1000 / calls)
+        self.results[name] = {
+            "calls": calls,
+            "us": min(host_us),
+            "virtual_us": (clock.now_us - start_virtual_us) / calls,
+            "i2c_bytes": (board.i2c_bytes - start_bytes) / calls,
+            "render_us": sum(frame.render.us for frame in frames[start_frame:]) / calls,
+        }
+
+
+def bench_scales(bench: Bench, main) -> None:
+    sc = main.sc
+    bench.measure("scales.get_scale_of_12_bit_values major 1 oct", lambda: sc.get_scale_of_12_bit_values(12, "major", 1), 2000)
+    bench.measure("scales.get_scale_of_12_bit_values chromatic 5 oct", lambda: sc.get_scale_of_12_bit_values(12, "chromatic", 5), 500)
+    values = [0] * 61
+    bench.measure("scales.fill_12_bit_values chromatic 5 oct", lambda: sc.fill_12_bit_values(values, 12, "chromatic", 5), 500)
+
+
+def bench_steps(bench: Bench, main) -> None:
+    board = bench.sim.board
+    main.cv_probability_of_change = 50
+    main.trigger_probability_of_change = 50
+
+    def step() -> None:
+        # one clock pulse through the main loop's clock path
+        board.drive(CLOCK_INPUT_PIN, 0)
+        main.handle_clock_pulse()
+        board.drive(CLOCK_INPUT_PIN, 1)
+        main.handle_clock_pulse()
+        main.check_trigger_off()
+
+    bench.measure("main.step advance (50% CV and trig probability)", step, 1000)
+    bench.measure("main.generate_boolean_with_probability", lambda: main.generate_boolean_with_probability(50), 5000)
+
+
+def bench_drivers(bench: Bench, main) -> None:
+    values = iter(range(1 << 30))
+    bench.measure("MCP4725.write", lambda: main.dac.write(next(values) & 0x0FFF), 2000)
+    bench.measure("SSD1306.show", main.m.display.show, 100)
+    bench.measure("AnalogueReader.percent", main.cv1.percent, 1000)
+
+
+def bench_menus(bench: Bench, main) -> None:
+    main.boot_screen_menu.lines = main.boot_report_lines()
+    bench.measure("menu redraw MainMenu", main.main_menu.draw_main_menu, 50)
+    bench.measure("menu redraw SingleSelectVerticalScrollMenu", main.scale_menu.display_menu, 50)
+    bench.measure("menu redraw NumericalValueRangeMenu", main.cv_prob_menu.display_menu, 50)
+    bench.measure("menu redraw ScreenMenu", main.boot_screen_menu.display_menu, 50)
+
+
+def bench_rotary(bench: Bench) -> None:
+    from rotary import Rotary
+
+    class Encoder(Rotary):
+        """Pins that keep turning clockwise, one detent every four transitions"""
+
+        PINS = (2, 0, 1, 3)
+
+        def __init__(self) -> None:
+            super().__init__(0, 100, 1, False, Rotary.RANGE_WRAP, False, False)
+            self.transition = 0
+
+        def _hal_get_clk_value(self) -> int:
+            return self.PINS[self.transition] >> 1
+
+        def _hal_get_dt_value(self) -> int:
+            pins = self.PINS[self.transition]
+            self.transition = (self.transition + 1) & 3
+            return pins & 1
+
+    encoder = Encoder()
+    bench.measure("Rotary._process_rotary_pins", lambda: encoder._process_rotary_pins(None), 5000)
+
+
+def run(repeats: int = DEFAULT_REPEATS, scale: float = 1.0) -> dict:
+    """Boots the firmware on the simulator and runs every benchmark, returns the results document"""
+    sim = Simulator(seed=0)
+    sim.run(until_us=BOOT_US)  # main.py's globals and the modules it imported stay in sim.main
+    sim.clock.end_us = None
+    bench = Bench(sim, repeats, scale)
+    with sim.installed():
+        main = sim.main
+        bench_scales(bench, main)
+        bench_steps(bench, main)
+        bench_drivers(bench, main)
+        bench_menus(bench, main)
+        bench_rotary(bench)
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeats": repeats,
+        "benchmarks": bench.results,
+    }
+
+
+def compare(base: dict, new: dict, threshold: float, host_threshold: float = DEFAULT_HOST_THRESHOLD) -> list[str]:
+    """Returns the "benchmark metric" of every metric that got worse by more than its threshold in %"""
+    regressions = []
+    print(f"{'benchmark':<52}{'metric':>11}{'base':>12}{'new':>12}{'change':>9}")
+    for name, base_result in base["benchmarks"].items():
+        new_result = new["benchmarks"].get(name)
+        if new_result is None:
+            print(f"{name:<52}{'missing':>11}")
+            continue
+        for metric in METRICS:
+            if metric not in base_result or metric not in new_result:
+                continue  # results of an older suite
+            before, after = base_result[metric], new_result[metric]
+            if before == after == 0:
+                continue
+            change = (after - before) / before * 100 if before else float("inf")
+            limit = host_threshold if metric == "us" else threshold
+            flag = ""
+            if change > limit:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} {metric}")
+            elif change < -limit:
+                flag = "  faster"
+            print(f"{name:<52.52}{metric:>11}{before:>12.2f}{after:>12.2f}{change:>+8.1f}%{flag}")
+    for name in new["benchmarks"].keys() - base["benchmarks"].keys():
+        print(f"{name:<52}{'new':>11}")
+    return regressions
+
+
+def print_results(results: dict) -> None:
+    print(f"{'benchmark':<52}{'us':>10}{'virtual us':>12}{'I2C bytes':>11}{'render us':>11}")
+    for name, result in results["benchmarks"].items():
+        print(f"{name:<52.52}{result['us']:>10.2f}{result['virtual_us']:>12.1f}{result['i2c_bytes']:>11.0f}{result['render_us']:>11.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the suite and write the results")
+    run_parser.add_argument("--out", default="bench_results.json")
+    run_parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    run_parser.add_argument("--scale", type=float, default=1.0, help="multiplies the calls per benchmark")
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="%% virtual us or I2C bytes may get worse")
+    compare_parser.add_argument("--host-threshold", type=float, default=DEFAULT_HOST_THRESHOLD, help="%% host us may get worse")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run(args.repeats, args.scale)
+        with open(args.out, "w") as file:
+            json.dump(results, file, indent=2)
+        print_results(results)
+        print("written to", args.out)
+        return
+
+    with open(args.base) as file:
+        base = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+    regressions = compare(base, new, args.threshold, args.host_threshold)
+    if regressions:
+        print(f"{len(regressions)} regressions:", ", ".join(regressions))
+        sys.exit(1)
+    print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
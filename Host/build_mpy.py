@@ -0,0 +1,72 @@
+"""
+Builds an upload bundle with precompiled .mpy files (runs on the host)
+
+Every module in Software/lib is compiled with mpy-cross for the RP2040's Cortex-M0+
+(-march=armv6m, needed for the @micropython.native and @micropython.viper functions).
+The Pico then imports the bytecode directly instead of compiling the source at boot,
+which is faster and needs less RAM. main.py is copied as source: MicroPython only runs
+a main.py, its native functions are compiled on the Pico.
+
+The .mpy format has to match the firmware: use the mpy-cross of the same MicroPython
+version as the Pico (pip install mpy-cross==<version>).
+
+Usage:
+python Host/build_mpy.py [--out build] [--mpy-cross mpy-cross]
+then upload the contents of build/ to the Pico instead of Software/
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+SOFTWARE_DIR = Path(__file__).resolve().parents[1] / "Software"
+LIB_DIR = SOFTWARE_DIR / "lib"
+MAIN_PATH = SOFTWARE_DIR / "main.py"
+ARCH = "armv6m"  # RP2040
+
+
+def mpy_cross_command(executable: str | None) -> list[str]:
+    if executable:
+        return [executable]
+    if shutil.which("mpy-cross"):
+        return ["mpy-cross"]
+    return [sys.executable, "-m", "mpy_cross"]  # pip install mpy-cross
+
+
+def build(out_dir: Path, mpy_cross: list[str]) -> list[tuple[str, int, int]]:
+    """Compiles lib/ into out_dir/lib and copies main.py, returns (module, source bytes, mpy bytes)"""
+    lib_out = out_dir / "lib"
+    if lib_out.exists():
+        shutil.rmtree(lib_out)
+    lib_out.mkdir(parents=True)
+    sizes = []
+    for source in sorted(LIB_DIR.glob("*.py")):
+        target = lib_out / f"{source.stem}.mpy"
+        subprocess.run([*mpy_cross, f"-march={ARCH}", "-o", str(target), str(source)], check=True)
+        sizes.append((source.stem, source.stat().st_size, target.stat().st_size))
+    shutil.copyfile(MAIN_PATH, out_dir / "main.py")
+    return sizes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", type=Path, default=Path("build"), help="output directory (default: build)")
+    parser.add_argument("--mpy-cross", help="mpy-cross executable (default: from PATH or the mpy_cross package)")
+    args = parser.parse_args()
+
+    mpy_cross = mpy_cross_command(args.mpy_cross)
+    version = subprocess.run([*mpy_cross, "--version"], check=True, capture_output=True, text=True).stdout.strip()
+    print(version)
+    sizes = build(args.out, mpy_cross)
+
+    print(f"{'module':<24}{'.py bytes':>10}{'.mpy bytes':>12}")
+    for name, source_size, mpy_size in sizes:
+        print(f"{name:<24}{source_size:>10}{mpy_size:>12}")
+    print(f"{'total':<24}{sum(size[1] for size in sizes):>10}{sum(size[2] for size in sizes):>12}")
+    print(f"upload {args.out}/main.py and {args.out}/lib/ to the Pico")
+
+
+if __name__ == "__main__":
+    main()
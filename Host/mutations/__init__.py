@@ -0,0 +1,15 @@
+"""
+Monte Carlo analysis of the sequencer's probability of change settings (needs NumPy)
+
+Simulates many independent runs of the firmware's step mutation (randomly_change_current_step_cv(),
+randomly_change_step_trigger() and the erase modes in play_step()) for given settings and reports
+note histograms, how long it takes until every step has been replaced and the gate density over time.
+Sweeps over several settings run in a process pool.
+
+Usage (from the Host directory):
+python -m mutations --cv-prob 5,10,25 --trig-prob 0,10 --steps 16 --scale aeolian
+"""
+
+from .model import Result, Settings, simulate
+
+__all__ = ["Result", "Settings", "simulate"]
@@ -0,0 +1,130 @@
+"""Simulates the sequencer's step mutation for a sweep of settings and summarizes how the sequence evolves."""
+
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .model import NEVER, Result, Settings, expected_bars_to_replace, simulate
+
+
+def int_list(text: str) -> list[int]:
+    return [int(value) for value in text.split(",")]
+
+
+def bool_list(text: str) -> list[bool]:
+    return [value.strip().lower() in ("1", "on", "true", "yes") for value in text.split(",")]
+
+
+def run(job: tuple) -> Result:
+    settings, runs, bars, seed = job
+    return simulate(settings, runs, bars, seed)
+
+
+def bars_text(bars: float) -> str:
+    return "never" if bars == NEVER else f"{bars:.1f}"
+
+
+def print_result(index: int, result: Result, step_ms: float) -> None:
+    settings = result.settings
+    replaced = result.bars_to_replace[result.bars_to_replace != NEVER]
+    share_replaced = len(replaced) / len(result.bars_to_replace)
+    erase = "".join(name for name, on in (("C", settings.cv_erase), ("T", settings.trig_erase)) if on) or "-"
+    if len(replaced):
+        mean, median, p90 = replaced.mean(), np.median(replaced), np.percentile(replaced, 90)
+        replace_text = f"{bars_text(mean):>7}{bars_text(median):>7}{bars_text(p90):>7}{mean * settings.steps * step_ms / 1000:>8.1f}s"
+    else:
+        replace_text = f"{'never':>7}{'':>7}{'':>7}{'':>9}"
+    density = result.gate_density
+    quarter = max(1, len(density) // 4)
+    print(
+        f"{index:>3} {settings.cv_prob:>4}% {settings.trig_prob:>4}% {erase:>5} "
+        f"{replace_text}{share_replaced:>6.0%}{bars_text(expected_bars_to_replace(settings.steps, settings.cv_prob)):>7} "
+        f"{density[0]:>5.2f}{density[:quarter].mean():>6.2f}{density[-quarter:].mean():>6.2f}"
+    )
+    shares = result.note_counts / result.note_counts.sum()
+    top = np.argsort(shares)[::-1][:6]
+    print("      notes:", "  ".join(f"{result.scale[i] // 68}:{shares[i]:.0%}" for i in top))
+
+
+def write_csv(directory: str, results: list[Result]) -> None:
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "summary.csv"), "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow([*Settings._fields, "runs", "bars", "replaced_share", "mean_bars_to_replace", "median_bars_to_replace", "final_gate_density"])
+        for result in results:
+            replaced = result.bars_to_replace[result.bars_to_replace != NEVER]
+            writer.writerow([
+                *result.settings,
+                len(result.bars_to_replace),
+                len(result.gate_density),
+                len(replaced) / len(result.bars_to_replace),
+                replaced.mean() if len(replaced) else "",
+                np.median(replaced) if len(replaced) else "",
+                result.gate_density[-1],
+            ])
+    with open(os.path.join(directory, "notes.csv"), "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["setting", "index", "dac_value", "note", "share"])
+        for setting, result in enumerate(results):
+            total = result.note_counts.sum()
+            for index, (value, count) in enumerate(zip(result.scale, result.note_counts)):
+                writer.writerow([setting, index, value, value // 68, count / total])
+    with open(os.path.join(directory, "gate_density.csv"), "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["setting", "bar", "gate_density"])
+        for setting, result in enumerate(results):
+            for bar, density in enumerate(result.gate_density):
+                writer.writerow([setting, bar + 1, density])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m mutations", description=__doc__)
+    parser.add_argument("--scale", default="major")
+    parser.add_argument("--start-note", type=int, default=0)
+    parser.add_argument("--octaves", type=int_list, default=[1], help="comma separated values to sweep")
+    parser.add_argument("--steps", type=int_list, default=[16], help="comma separated values to sweep")
+    parser.add_argument("--cv-prob", type=int_list, default=[10], help="CVProb %%, comma separated values to sweep")
+    parser.add_argument("--trig-prob", type=int_list, default=[10], help="TrigProb %%, comma separated values to sweep")
+    parser.add_argument("--cv-erase", type=bool_list, default=[False], help="off/on, comma separated values to sweep")
+    parser.add_argument("--trig-erase", type=bool_list, default=[False], help="off/on, comma separated values to sweep")
+    parser.add_argument("--runs", type=int, default=2_000, help="independent runs per setting")
+    parser.add_argument("--bars", type=int, default=256, help="bars (passes through the sequence) per run")
+    parser.add_argument("--bpm", type=float, default=120.0, help="tempo for the time to replacement, one step per 16th")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="directory for summary.csv, notes.csv and gate_density.csv")
+    args = parser.parse_args()
+
+    settings = [
+        Settings(args.scale, args.start_note, octaves, steps, cv_prob, trig_prob, cv_erase, trig_erase)
+        for octaves, steps, cv_prob, trig_prob, cv_erase, trig_erase in itertools.product(
+            args.octaves, args.steps, args.cv_prob, args.trig_prob, args.cv_erase, args.trig_erase
+        )
+    ]
+    seeds = np.random.SeedSequence(args.seed).spawn(len(settings))
+    jobs = [(setting, args.runs, args.bars, seed) for setting, seed in zip(settings, seeds)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(run, jobs))
+    elapsed = time.perf_counter() - start
+
+    steps = sum(result.steps_simulated for result in results)
+    print(f"{len(settings)} settings, {steps:,} steps in {elapsed:.1f} s ({steps / elapsed:,.0f} steps/s)")
+    print("bars to replace every step: mean, median, 90th percentile, mean time, share of runs, exact mean")
+    print("gate density: first bar, first quarter of the run, last quarter")
+    print(f"{'#':>3} {'CV':>5} {'Trig':>5} {'erase':>5} {'mean':>7}{'median':>7}{'p90':>7}{'time':>9}{'runs':>6}{'exact':>7} {'gate':>5}{'early':>6}{'late':>6}")
+    step_ms = 60_000 / (args.bpm * 4)
+    for index, result in enumerate(results):
+        print_result(index, result, step_ms)
+    if args.csv:
+        write_csv(args.csv, results)
+
+
+if __name__ == "__main__":
+    main()
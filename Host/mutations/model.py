@@ -0,0 +1,96 @@
+"""
+The firmware's step mutation as array operations over many runs
+
+Every clock edge main.py's play_step() does, for the current step:
+1. picks a random note of the scale table and writes it with probability CVProb %
+2. picks gate on or off (50/50) and writes it with probability TrigProb %
+3. writes the root note if CvErase is on, a gate if TrigErase is on
+then outputs the step. The sequence starts as the root note with every gate on.
+
+Each step of the sequence is visited exactly once per bar and the mutations of different
+steps are independent, so a whole bar of every run is one set of array operations.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from patterns.generators import scale_table
+
+NEVER = np.inf
+
+
+class Settings(NamedTuple):
+    scale: str = "major"
+    start_note: int = 0
+    octaves: int = 1
+    steps: int = 16
+    cv_prob: int = 0  # %
+    trig_prob: int = 0  # %
+    cv_erase: bool = False
+    trig_erase: bool = False
+
+
+class Result(NamedTuple):
+    settings: Settings
+    scale: np.ndarray  # DAC values of the scale table
+    note_counts: np.ndarray  # how often each scale table entry was output, over all runs and bars
+    bars_to_replace: np.ndarray  # per run, the bar in which the last original step was overwritten (NEVER if not)
+    gate_density: np.ndarray  # per bar, share of steps with a gate over all runs
+
+    @property
+    def steps_simulated(self) -> int:
+        return len(self.bars_to_replace) * len(self.gate_density) * self.settings.steps
+
+
+def _chance(rng: np.random.Generator, probability: int, shape) -> np.ndarray:
+    """rng.randint(1, 100) <= probability, as in generate_boolean_with_probability()"""
+    return rng.integers(1, 101, shape) <= probability
+
+
+def simulate(settings: Settings, runs: int = 2_000, bars: int = 256, seed=0) -> Result:
+    rng = np.random.default_rng(seed)
+    scale = scale_table(settings.scale, settings.start_note, settings.octaves)
+    shape = (runs, settings.steps)
+
+    notes = np.zeros(shape, np.int64)  # indexes into the scale table, starting at the root
+    gates = np.ones(shape, bool)
+    replaced = np.zeros(shape, bool)
+    bars_to_replace = np.full(runs, NEVER)
+    note_counts = np.zeros(len(scale), np.int64)
+    gate_density = np.zeros(bars)
+
+    for bar in range(bars):
+        new_notes = rng.integers(0, len(scale), shape)
+        change_cv = _chance(rng, settings.cv_prob, shape)
+        new_gates = rng.integers(0, 2, shape).astype(bool)
+        change_gate = _chance(rng, settings.trig_prob, shape)
+
+        notes = np.where(change_cv, new_notes, notes)
+        gates = np.where(change_gate, new_gates, gates)
+        if settings.cv_erase:
+            notes[:] = 0
+            change_cv[:] = True
+        if settings.trig_erase:
+            gates[:] = True
+
+        replaced |= change_cv
+        newly_replaced = replaced.all(axis=1) & (bars_to_replace == NEVER)
+        bars_to_replace[newly_replaced] = bar + 1
+        note_counts += np.bincount(notes.ravel(), minlength=len(scale))
+        gate_density[bar] = gates.mean()
+
+    return Result(settings, scale, note_counts, bars_to_replace, gate_density)
+
+
+def expected_bars_to_replace(steps: int, cv_prob: int) -> float:
+    """
+    Exact expectation for comparison: each step is replaced in a bar with probability p,
+    the sequence is replaced when the last of its steps is (the maximum of geometric variables).
+    E[max] = sum over k >= 0 of 1 - (1 - (1 - p)^k)^steps
+    """
+    if cv_prob <= 0:
+        return NEVER
+    keep = 1 - cv_prob / 100
+    k = np.arange(0, 10_000)
+    return float(np.sum(1 - (1 - keep**k) ** steps))
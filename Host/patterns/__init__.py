@@ -0,0 +1,29 @@
+"""
+Host-side pattern bank tool for the firmware's song mode (needs NumPy)
+
+Generates pattern banks in the binary format of Software/lib/pattern_bank.py with the scale
+tables of Software/lib/mcp4725_musical_scales.py, decodes banks to CSV and summarizes them.
+Whole banks are generated, encoded and validated as NumPy arrays.
+
+Usage (from the Host directory):
+python -m patterns generate patterns.bin --generator euclidean --count 500 --scale dorian
+python -m patterns decode patterns.bin --csv patterns.csv
+python -m patterns analyze patterns.bin
+"""
+
+from .bank import Bank, decode, encode, read_bank, validate, write_bank
+from .generators import GENERATORS, euclidean, random_patterns, scale_table, scale_walk
+
+__all__ = [
+    "Bank",
+    "GENERATORS",
+    "decode",
+    "encode",
+    "euclidean",
+    "random_patterns",
+    "read_bank",
+    "scale_table",
+    "scale_walk",
+    "validate",
+    "write_bank",
+]
@@ -0,0 +1,119 @@
+"""Generates, decodes and analyzes pattern banks for the firmware's song mode."""
+
+import argparse
+import csv
+import sys
+import time
+
+import numpy as np
+
+from .bank import MAX_STEPS, MIN_STEPS, Bank, read_bank, validate, write_bank
+from .bank import decode as decode_bank
+from .generators import GENERATORS, scale_table
+
+
+def parse_chain(text: str) -> np.ndarray:
+    """"0:2,3,1:4" -> pattern 0 for 2 bars, pattern 3 for 1 bar, pattern 1 for 4 bars"""
+    entries = []
+    for entry in text.split(","):
+        pattern, _, bars = entry.partition(":")
+        entries.append((int(pattern), int(bars or 1)))
+    return np.array(entries, np.int64).reshape(-1, 2)
+
+
+def generate(args: argparse.Namespace) -> None:
+    start = time.perf_counter()
+    rng = np.random.default_rng(args.seed)
+    scale = scale_table(args.scale, args.start_note, args.octaves)
+    steps = np.full(args.count, args.steps, np.int64)
+    cv, gates = GENERATORS[args.generator](rng, scale, steps, args.density)
+    chain = parse_chain(args.chain) if args.chain else np.zeros((0, 2), np.int64)
+    data = write_bank(args.bank, Bank(cv, gates, steps, chain))
+    problems = validate(data)
+    elapsed = time.perf_counter() - start
+
+    for problem in problems:
+        print("invalid:", problem, file=sys.stderr)
+    print(f"{args.count} {args.generator} patterns, {len(data)} bytes, generated and validated in {elapsed * 1000:.1f} ms ({args.count / elapsed:,.0f} patterns/s)")
+    if problems:
+        sys.exit(1)
+
+
+def decode(args: argparse.Namespace) -> None:
+    bank = read_bank(args.bank)
+    output = open(args.csv, "w", newline="") if args.csv else sys.stdout
+    try:
+        writer = csv.writer(output)
+        writer.writerow(["pattern", "steps", "step", "cv", "gate"])
+        for pattern, steps in enumerate(bank.steps):
+            for step in range(steps):
+                writer.writerow([pattern, steps, step, bank.cv[pattern, step], int(bank.gates[pattern, step])])
+        if len(bank.chain):
+            writer.writerow([])
+            writer.writerow(["chain", "pattern", "bars"])
+            for position, (pattern, bars) in enumerate(bank.chain):
+                writer.writerow([position, pattern, bars])
+    finally:
+        if args.csv:
+            output.close()
+
+
+def analyze(args: argparse.Namespace) -> None:
+    with open(args.bank, "rb") as file:
+        data = file.read()
+    problems = validate(data)
+    for problem in problems:
+        print("invalid:", problem)
+    try:
+        bank = decode_bank(data)
+    except ValueError:
+        sys.exit(1)
+    in_pattern = np.arange(MAX_STEPS) < bank.steps[:, None]
+    cv = bank.cv[in_pattern]
+    gate_density = bank.gates[in_pattern].mean() if cv.size else 0.0
+    print(f"patterns: {len(bank.steps)}")
+    print(f"chain: {len(bank.chain)} entries, {int(bank.chain[:, 1].sum()) if len(bank.chain) else len(bank.steps)} bars")
+    if cv.size:
+        print(f"steps per pattern: {bank.steps.min()} - {bank.steps.max()}, mean {bank.steps.mean():.1f}")
+        print(f"gate density: {gate_density:.2f}")
+        print(f"CV: {cv.min()} - {cv.max()}, {len(np.unique(cv))} distinct values")
+        values, counts = np.unique(cv, return_counts=True)
+        top = np.argsort(counts)[::-1][:8]
+        print("most used CVs:", ", ".join(f"{values[i]} ({counts[i] / cv.size:.0%})" for i in top))
+    print("valid" if not problems else f"{len(problems)} problems")
+    if problems:
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m patterns", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = commands.add_parser("generate", help="write a bank of generated patterns")
+    generate_parser.add_argument("bank", help="bank file to write, upload it to the Pico as patterns.bin")
+    generate_parser.add_argument("--generator", choices=sorted(GENERATORS), default="random")
+    generate_parser.add_argument("--count", type=int, default=64, help="number of patterns")
+    generate_parser.add_argument("--steps", type=int, default=MAX_STEPS, choices=range(MIN_STEPS, MAX_STEPS + 1), metavar=f"{MIN_STEPS}-{MAX_STEPS}", help="steps per pattern")
+    generate_parser.add_argument("--scale", default="major", help="scale name as in the Scale menu")
+    generate_parser.add_argument("--start-note", type=int, default=0, help="Start note menu value")
+    generate_parser.add_argument("--octaves", type=int, default=1)
+    generate_parser.add_argument("--density", type=float, default=0.5, help="share of steps with a gate")
+    generate_parser.add_argument("--chain", help='song order, e.g. "0:2,3,1:4" (pattern:bars), default every pattern once')
+    generate_parser.add_argument("--seed", type=int, default=0)
+    generate_parser.set_defaults(run=generate)
+
+    decode_parser = commands.add_parser("decode", help="print or write a bank as CSV")
+    decode_parser.add_argument("bank")
+    decode_parser.add_argument("--csv", help="CSV file to write instead of printing")
+    decode_parser.set_defaults(run=decode)
+
+    analyze_parser = commands.add_parser("analyze", help="validate a bank and summarize its patterns")
+    analyze_parser.add_argument("bank")
+    analyze_parser.set_defaults(run=analyze)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""The pattern bank file format of Software/lib/pattern_bank.py as NumPy structured arrays."""
+
+from typing import NamedTuple
+
+import numpy as np
+
+MAGIC = b"PB"
+VERSION = 1
+MAX_STEPS = 16
+MIN_STEPS = 2  # the firmware plays a shorter pattern as 2 steps, like the Steps menu's minimum
+MAX_CHAIN_LENGTH = 64
+MAX_PATTERNS = 0xFFFF
+CV_MASK = 0x0FFF
+GATE_BIT = 15
+
+HEADER_DTYPE = np.dtype([("magic", "S2"), ("version", "u1"), ("max_steps", "u1"), ("patterns", "<u2"), ("chain_length", "<u2")])
+CHAIN_DTYPE = np.dtype([("pattern", "<u2"), ("bars", "<u2")])
+PATTERN_DTYPE = np.dtype([("steps", "u1"), ("reserved", "u1"), ("values", "<u2", (MAX_STEPS,))])
+PATTERNS_OFFSET = HEADER_DTYPE.itemsize + MAX_CHAIN_LENGTH * CHAIN_DTYPE.itemsize
+
+
+class Bank(NamedTuple):
+    cv: np.ndarray  # (patterns, 16) 12 bit DAC values, 0 past a pattern's steps
+    gates: np.ndarray  # (patterns, 16) bool
+    steps: np.ndarray  # (patterns,)
+    chain: np.ndarray  # (entries, 2) pattern number, bars; empty plays every pattern once in order
+
+
+def encode(bank: Bank) -> bytes:
+    """Returns the bank file's bytes, the same bytes pattern_bank.create_bank() writes."""
+    count = len(bank.steps)
+    if count > MAX_PATTERNS:
+        raise ValueError(f"more than {MAX_PATTERNS} patterns")
+    if len(bank.chain) > MAX_CHAIN_LENGTH:
+        raise ValueError(f"chain longer than {MAX_CHAIN_LENGTH} entries")
+    cv = np.asarray(bank.cv, np.int64)
+    if np.any((cv < 0) | (cv > CV_MASK)):
+        raise ValueError(f"CVs outside the DAC's range 0 - {CV_MASK}")
+    header = np.zeros(1, HEADER_DTYPE)
+    header[0] = (MAGIC, VERSION, MAX_STEPS, count, len(bank.chain))
+    chain = np.zeros(MAX_CHAIN_LENGTH, CHAIN_DTYPE)
+    if len(bank.chain):
+        chain["pattern"][: len(bank.chain)] = bank.chain[:, 0]
+        chain["bars"][: len(bank.chain)] = bank.chain[:, 1]
+    patterns = np.zeros(count, PATTERN_DTYPE)
+    patterns["steps"] = bank.steps
+    in_pattern = np.arange(MAX_STEPS) < np.asarray(bank.steps)[:, None]
+    values = cv.astype(np.uint16) | (np.asarray(bank.gates, np.uint16) << GATE_BIT)
+    patterns["values"] = np.where(in_pattern, values, 0)
+    return header.tobytes() + chain.tobytes() + patterns.tobytes()
+
+
+def decode(data: bytes) -> Bank:
+    """Parses a bank file's bytes, raises ValueError if the header or the size is wrong."""
+    if len(data) < PATTERNS_OFFSET:
+        raise ValueError("shorter than the bank header")
+    header = np.frombuffer(data, HEADER_DTYPE, count=1)[0]
+    if header["magic"] != MAGIC or header["version"] != VERSION or header["max_steps"] != MAX_STEPS:
+        raise ValueError("not a pattern bank of this format version")
+    count = int(header["patterns"])
+    if len(data) != PATTERNS_OFFSET + count * PATTERN_DTYPE.itemsize:
+        raise ValueError(f"size does not match {count} patterns")
+    chain = np.frombuffer(data, CHAIN_DTYPE, count=int(header["chain_length"]), offset=HEADER_DTYPE.itemsize)
+    patterns = np.frombuffer(data, PATTERN_DTYPE, offset=PATTERNS_OFFSET)
+    values = patterns["values"]
+    return Bank(
+        cv=values & CV_MASK,
+        gates=(values >> GATE_BIT).astype(bool),
+        steps=patterns["steps"].copy(),
+        chain=np.stack([chain["pattern"], chain["bars"]], axis=1).astype(np.int64),
+    )
+
+
+def validate(data: bytes) -> list[str]:
+    """Returns the problems the firmware would run into with this bank, empty if there are none."""
+    try:
+        bank = decode(data)
+    except ValueError as error:
+        return [str(error)]
+    problems = []
+    values = np.frombuffer(data, PATTERN_DTYPE, offset=PATTERNS_OFFSET)["values"]
+    bad_steps = np.flatnonzero((bank.steps < MIN_STEPS) | (bank.steps > MAX_STEPS))
+    if len(bad_steps):
+        problems.append(f"{len(bad_steps)} patterns with a step count outside {MIN_STEPS} - {MAX_STEPS}, first {bad_steps[0]}")
+    cv = values & ~np.uint16(1 << GATE_BIT)  # not masked to 12 bits, a CV above the range shows in bits 12 - 14
+    out_of_range = np.flatnonzero((cv > CV_MASK).any(axis=1))
+    if len(out_of_range):
+        problems.append(f"{len(out_of_range)} patterns with CVs above {CV_MASK}, first {out_of_range[0]}")
+    past_end = np.arange(MAX_STEPS) >= bank.steps[:, None]
+    if np.any(values[past_end]):
+        problems.append("values past a pattern's last step")
+    if len(bank.chain):
+        if np.any(bank.chain[:, 0] >= len(bank.steps)):
+            problems.append("chain entries pointing past the last pattern")
+        if np.any(bank.chain[:, 1] == 0):
+            problems.append("chain entries with 0 bars")
+    elif len(bank.steps) == 0:
+        problems.append("no patterns")
+    return problems
+
+
+def read_bank(path: str) -> Bank:
+    with open(path, "rb") as file:
+        return decode(file.read())
+
+
+def write_bank(path: str, bank: Bank) -> bytes:
+    data = encode(bank)
+    with open(path, "wb") as file:
+        file.write(data)
+    return data
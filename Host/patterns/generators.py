@@ -0,0 +1,72 @@
+"""Pattern generators, each one makes a whole batch of patterns with NumPy array operations."""
+
+import importlib.util
+
+import numpy as np
+
+from simulator import LIB_DIR
+
+from .bank import CV_MASK, MAX_STEPS
+
+_spec = importlib.util.spec_from_file_location("mcp4725_musical_scales", LIB_DIR / "mcp4725_musical_scales.py")
+musical_scales = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(musical_scales)
+
+MAX_WALK_MOVE = 2  # scale degrees per step
+
+
+def scale_table(scale: str = "major", start_note: int = 0, octaves: int = 1) -> np.ndarray:
+    """
+    The firmware's scale table for the Scale, Start note and Octaves settings (it starts 12 notes higher),
+    clamped to the DAC's 12 bits like the DAC driver clamps the notes at the top of 5 octaves
+    """
+    if scale not in musical_scales.scale_intervals:
+        raise ValueError(f"unknown scale {scale!r}")
+    values = musical_scales.get_scale_of_12_bit_values(start_note + 12, scale, octaves)
+    return np.minimum(np.array(values, np.int64), CV_MASK).astype(np.uint16)
+
+
+def _random_gates(rng: np.random.Generator, count: int, density: float) -> np.ndarray:
+    return rng.random((count, MAX_STEPS)) < density
+
+
+def random_patterns(rng: np.random.Generator, scale: np.ndarray, steps: np.ndarray, density: float) -> tuple[np.ndarray, np.ndarray]:
+    """Any note of the scale on every step, gates on with probability density"""
+    count = len(steps)
+    notes = rng.integers(0, len(scale), (count, MAX_STEPS))
+    return scale[notes], _random_gates(rng, count, density)
+
+
+def euclidean(rng: np.random.Generator, scale: np.ndarray, steps: np.ndarray, density: float) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Euclidean rhythms: about density * steps pulses spread as evenly as possible over the
+    pattern's steps, rotated by a random offset, with random notes of the scale
+    """
+    count = len(steps)
+    pulses = np.clip(rng.binomial(steps, density), 1, steps)
+    rotation = rng.integers(0, steps)
+    step = np.arange(MAX_STEPS)
+    gates = ((step + rotation[:, None]) * pulses[:, None]) % steps[:, None] < pulses[:, None]
+    notes = rng.integers(0, len(scale), (count, MAX_STEPS))
+    return scale[notes], gates
+
+
+def scale_walk(rng: np.random.Generator, scale: np.ndarray, steps: np.ndarray, density: float) -> tuple[np.ndarray, np.ndarray]:
+    """Melodies that move up to MAX_WALK_MOVE scale degrees per step, bouncing off the ends of the scale"""
+    count = len(steps)
+    top = len(scale) - 1
+    moves = rng.integers(-MAX_WALK_MOVE, MAX_WALK_MOVE + 1, (count, MAX_STEPS))
+    moves[:, 0] = rng.integers(0, top + 1, count)  # starting degree
+    degrees = np.cumsum(moves, axis=1)
+    if top:
+        degrees = np.abs((degrees + top) % (2 * top) - top)
+    else:
+        degrees[:] = 0
+    return scale[degrees], _random_gates(rng, count, density)
+
+
+GENERATORS = {
+    "random": random_patterns,
+    "euclidean": euclidean,
+    "walk": scale_walk,
+}
@@ -0,0 +1,17 @@
+"""
+Replays event logs dumped by the firmware (Software/lib/event_log.py) on the simulator
+
+The log's clock edges, digital input edges and setting changes are fed through the unmodified
+firmware, starting from the oldest keyframe in the log, and the steps it outputs are compared
+with the steps the Pico logged. The same seed, settings and edges give the same steps, so a
+glitch caught on the Pico can be replayed and debugged on the host.
+
+Usage (from the Host directory):
+python -m replay events.bin
+python -m replay events.bin --fast --csv steps.csv
+"""
+
+from .log import Keyframe, Record, Step, encode, keyframes, parse, read_log, steps
+from .replayer import Replay, replay
+
+__all__ = ["Keyframe", "Record", "Replay", "Step", "encode", "keyframes", "parse", "read_log", "replay", "steps"]
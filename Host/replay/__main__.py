@@ -0,0 +1,55 @@
+"""Replays an event log dumped from the Pico (events.bin) on the simulator and checks it outputs the same steps."""
+
+import argparse
+import csv
+import sys
+from collections import Counter
+
+from .log import KIND_NAMES, NO_CV, read_log
+from .replayer import replay
+
+
+def duration(us: int) -> str:
+    seconds = us / 1_000_000
+    return f"{int(seconds // 3600)}:{int(seconds // 60 % 60):02}:{seconds % 60:06.3f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m replay", description=__doc__)
+    parser.add_argument("log", help="event log dumped from the EvtLog screen")
+    parser.add_argument("--fast", action="store_true", help="only run the clock path at logged events, skipping the time in between")
+    parser.add_argument("--csv", help="write the logged and the replayed steps to this CSV file")
+    args = parser.parse_args()
+
+    records = read_log(args.log)
+    kinds = Counter(KIND_NAMES.get(record.kind, str(record.kind)) for record in records)
+    print(f"{len(records)} records:", ", ".join(f"{count} {kind}" for kind, count in sorted(kinds.items())))
+    result = replay(records, fast=args.fast)
+    print(f"replayed {duration(result.span_us)} from the keyframe at {duration(result.keyframe.t_us)} in {result.real_s:.2f} s ({result.span_us / 1_000_000 / result.real_s:,.0f}x real time)")
+    if result.late_parameters:
+        print(f"{result.late_parameters} setting changes were applied a step late")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["index", "logged_step", "logged_gate", "logged_cv", "replayed_step", "replayed_gate", "replayed_cv"])
+            for index in range(max(len(result.expected), len(result.replayed))):
+                logged = result.expected[index] if index < len(result.expected) else ("", "", "")
+                replayed = result.replayed[index] if index < len(result.replayed) else ("", "", "")
+                writer.writerow([index, *logged, *replayed])
+
+    mismatch = result.first_mismatch
+    if mismatch is None:
+        print(f"{len(result.expected)} steps reproduced exactly")
+        return
+    print(f"steps differ from step {mismatch} of {len(result.expected)} logged ({len(result.replayed)} replayed):")
+    for index in range(max(0, mismatch - 2), mismatch + 3):
+        logged = result.expected[index] if index < len(result.expected) else None
+        replayed = result.replayed[index] if index < len(result.replayed) else None
+        describe = lambda step: "-" if step is None else f"step {step.step:>2} gate {step.gate} cv {'-' if step.cv == NO_CV else step.cv}"
+        print(f"{index:>8}  logged {describe(logged):<28} replayed {describe(replayed)}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""The event log dump format of Software/lib/event_log.py."""
+
+import struct
+from typing import NamedTuple
+
+MAGIC = b"EL"
+VERSION = 1
+RECORD = struct.Struct("<IBBH")
+HEADER = struct.Struct("<2sBBHHI")
+TICKS_PERIOD = 1 << 30  # ticks_us wraps around like on the rp2 port
+NO_CV = 0xFFFF
+GATE_FLAG = 0x80
+
+# kinds
+KEYFRAME = 1
+STATE = 2
+PARAMETER = 3
+CLOCK_RISE = 4
+CLOCK_FALL = 5
+DIGITAL = 6
+STEP = 7
+KIND_NAMES = {KEYFRAME: "keyframe", STATE: "state", PARAMETER: "parameter", CLOCK_RISE: "clock rise", CLOCK_FALL: "clock fall", DIGITAL: "digital", STEP: "step"}
+
+# state fields of a keyframe
+PRNG_HIGH = 0
+PRNG_LOW = 1
+CURRENT_STEP = 2
+NUMBER_OF_STEPS = 3
+CLOCK_MS = 4
+REVERSE = 5
+SEQUENCE = 16
+
+
+class Record(NamedTuple):
+    t_us: int  # since the first record, unwrapped
+    kind: int
+    arg: int
+    value: int
+
+
+class Step(NamedTuple):
+    step: int
+    gate: int
+    cv: int  # NO_CV if the step did not write the DAC
+
+    @classmethod
+    def from_record(cls, record: Record) -> "Step":
+        return cls(record.arg & ~GATE_FLAG, 1 if record.arg & GATE_FLAG else 0, record.value)
+
+
+class Keyframe(NamedTuple):
+    """The sequencer state a replay starts from"""
+
+    index: int  # of the KEYFRAME record
+    t_us: int
+    state: dict  # state field -> value
+    settings: dict  # main menu index -> value
+
+    def sequences(self) -> tuple[list[int], list[int]]:
+        steps = sorted(field - SEQUENCE for field in self.state if field >= SEQUENCE)
+        values = [self.state[SEQUENCE + step] for step in steps]
+        return [value & 0x0FFF for value in values], [value >> 15 for value in values]
+
+
+def parse(data: bytes) -> list[Record]:
+    """Parses a dump, oldest record first, with the ticks_us timestamps unwrapped to a time since the first record."""
+    if len(data) < HEADER.size:
+        raise ValueError("shorter than the event log header")
+    magic, version, record_size, capacity, count, total = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError("not an event log of this format version")
+    if len(data) != HEADER.size + count * RECORD.size:
+        raise ValueError(f"size does not match {count} records")
+    return unpack_records(memoryview(data)[HEADER.size:])
+
+
+def unpack_records(data) -> list[Record]:
+    """Records without the header, e.g. straight from an EventLog's buffer"""
+    records, elapsed_us, previous_ticks = [], 0, None
+    for ticks, kind, arg, value in RECORD.iter_unpack(data):
+        if previous_ticks is not None:
+            elapsed_us += (ticks - previous_ticks) % TICKS_PERIOD  # the log is in time order
+        previous_ticks = ticks
+        records.append(Record(elapsed_us, kind, arg, value))
+    return records
+
+
+def read_log(path) -> list[Record]:
+    with open(path, "rb") as file:
+        return parse(file.read())
+
+
+def encode(records: list[Record], total: int | None = None) -> bytes:
+    """A dump of the records, the way EventLog.dump() writes it"""
+    header = HEADER.pack(MAGIC, VERSION, RECORD.size, len(records), len(records), len(records) if total is None else total)
+    return header + b"".join(RECORD.pack(record.t_us % TICKS_PERIOD, record.kind, record.arg, record.value) for record in records)
+
+
+def keyframes(records: list[Record]) -> list[Keyframe]:
+    """Every complete keyframe, a ring that wrapped may have lost the start of the oldest one"""
+    found = []
+    for index, record in enumerate(records):
+        if record.kind != KEYFRAME or index + record.arg >= len(records):
+            continue
+        state, settings = {}, {}
+        for entry in records[index + 1 : index + 1 + record.arg]:
+            if entry.kind == STATE:
+                state[entry.arg] = entry.value
+            elif entry.kind == PARAMETER:
+                settings[entry.arg] = entry.value
+        found.append(Keyframe(index, record.t_us, state, settings))
+    return found
+
+
+def steps(records: list[Record]) -> list[Step]:
+    return [Step.from_record(record) for record in records if record.kind == STEP]
@@ -0,0 +1,199 @@
+"""Feeds an event log through the simulated firmware and collects the steps it outputs."""
+
+import tempfile
+import time
+from typing import NamedTuple
+
+from simulator import CLOCK_INPUT_PIN, DIGITAL_INPUT_PIN, Simulator
+
+from .log import (
+    CLOCK_FALL,
+    CLOCK_MS,
+    CLOCK_RISE,
+    CURRENT_STEP,
+    DIGITAL,
+    KEYFRAME,
+    NUMBER_OF_STEPS,
+    PARAMETER,
+    PRNG_HIGH,
+    PRNG_LOW,
+    RECORD,
+    REVERSE,
+    STEP,
+    Keyframe,
+    Record,
+    Step,
+    keyframes,
+    steps,
+    unpack_records,
+)
+
+BOOT_US = 500_000  # the simulated user interface is up long before this
+START_US = 1_000_000  # virtual time of the keyframe the replay starts from
+END_MARGIN_US = 200_000
+RETRY_US = 100
+NEVER = 1 << 62  # keyframe interval of the replaying firmware, its own log only needs the steps
+
+
+class Replay(NamedTuple):
+    expected: list[Step]  # the steps in the log after the keyframe
+    replayed: list[Step]  # the steps the simulated firmware output
+    keyframe: Keyframe
+    span_us: int  # time from the keyframe to the last record
+    real_s: float
+    late_parameters: int  # logged setting changes the replay could only apply after the following step
+
+    @property
+    def first_mismatch(self) -> int | None:
+        """Index of the first step that differs, None if the replay reproduced the log"""
+        for index, (expected, replayed) in enumerate(zip(self.expected, self.replayed)):
+            if expected != replayed:
+                return index
+        if len(self.expected) != len(self.replayed):
+            return min(len(self.expected), len(self.replayed))
+        return None
+
+
+def start_keyframe(records: list[Record]) -> Keyframe:
+    found = keyframes(records)
+    if not found:
+        raise ValueError("the log has no complete keyframe to start from")
+    return found[0]
+
+
+def _apply_keyframe(main, keyframe: Keyframe, capacity: int) -> None:
+    """Puts the firmware in the logged state, with a log of its own big enough for the whole replay"""
+    main.event_log = main.el.EventLog(capacity=capacity, keyframe_steps=NEVER)
+    main.set_menu_value(main.submenus.index(main.record_toggle_menu), 1)
+    for index, value in sorted(keyframe.settings.items()):
+        if main.menu_value(main.submenus[index]) != value:
+            main.set_menu_value(index, value)
+    cv_sequence, trigger_sequence = keyframe.sequences()
+    for step, (cv, gate) in enumerate(zip(cv_sequence, trigger_sequence)):
+        main.cv_sequence[step] = cv
+        main.trigger_sequence[step] = gate
+    main.rng.set_state(keyframe.state[PRNG_HIGH], keyframe.state[PRNG_LOW])
+    main.current_step = keyframe.state[CURRENT_STEP]
+    main.number_of_steps = keyframe.state[NUMBER_OF_STEPS]
+    main.clock_ms = keyframe.state[CLOCK_MS]
+    main.step_direction = -1 if keyframe.state.get(REVERSE) else 1  # logs from before REVERSE play forwards
+
+
+def _replayed_steps(main) -> list[Step]:
+    log = main.event_log
+    if log.total > log.capacity:
+        raise RuntimeError("the replay overflowed its event log")
+    return steps(unpack_records(memoryview(log.buffer)[: log.total * RECORD.size]))
+
+
+def _events(records: list[Record], keyframe: Keyframe):
+    """(virtual time, record, steps logged before it) of every record after the keyframe, later keyframes left out"""
+    logged_steps = 0
+    index = keyframe.index + 1 + records[keyframe.index].arg
+    while index < len(records):
+        record = records[index]
+        if record.kind == KEYFRAME:
+            index += 1 + record.arg
+            continue
+        yield START_US + record.t_us - keyframe.t_us, record, logged_steps
+        if record.kind == STEP:
+            logged_steps += 1
+        index += 1
+
+
+def replay(records: list[Record], *, fast: bool = False, seed: int = 0) -> Replay:
+    """
+    Replays the log from its oldest complete keyframe.
+
+    The full replay runs the firmware's main loop on the simulator with the logged edges on the
+    input jacks, display and all. fast=True only runs the clock path of the main loop when a
+    logged event happens and jumps the virtual clock over the time in between, hours of playing
+    replay in seconds.
+    """
+    keyframe = start_keyframe(records)
+    expected = [Step.from_record(record) for _, record, _ in _events(records, keyframe) if record.kind == STEP]
+    capacity = 2 * (len(records) - keyframe.index) + 256
+    with tempfile.TemporaryDirectory(prefix="pico-flash-") as flash_dir:
+        sim = Simulator(seed=seed, flash_dir=flash_dir)
+        start = time.perf_counter()
+        if fast:
+            late = _run_fast(sim, records, keyframe, capacity)
+        else:
+            late = _run_full(sim, records, keyframe, capacity)
+        real_s = time.perf_counter() - start
+        replayed = _replayed_steps(sim.main)
+    span_us = records[-1].t_us - keyframe.t_us
+    return Replay(expected, replayed, keyframe, span_us, real_s, late)
+
+
+def _run_full(sim: Simulator, records: list[Record], keyframe: Keyframe, capacity: int) -> int:
+    main = sim.main
+    late = [0]
+
+    def apply_parameter(index: int, value: int, logged_steps: int) -> None:
+        # the device changed the setting between two steps, wait until the replay is past the first one
+        if main.event_log.steps < logged_steps:
+            sim.clock.after(RETRY_US, lambda: apply_parameter(index, value, logged_steps))
+            return
+        if main.event_log.steps > logged_steps:
+            late[0] += 1
+        main.set_menu_value(index, value)
+
+    sim.at(START_US - 1, lambda: _apply_keyframe(main, keyframe, capacity))
+    end_us = START_US
+    for t_us, record, logged_steps in _events(records, keyframe):
+        if record.kind == CLOCK_RISE:
+            sim.jack(CLOCK_INPUT_PIN, True, t_us)
+        elif record.kind == CLOCK_FALL:
+            sim.jack(CLOCK_INPUT_PIN, False, t_us)
+        elif record.kind == DIGITAL:
+            sim.at(t_us, lambda level=record.arg: sim.board.drive(DIGITAL_INPUT_PIN, level))
+        elif record.kind == PARAMETER:
+            sim.at(t_us, lambda record=record, logged_steps=logged_steps: apply_parameter(record.arg, record.value, logged_steps))
+        end_us = t_us
+    sim.run(until_us=end_us + END_MARGIN_US)
+    return late[0]
+
+
+def _run_fast(sim: Simulator, records: list[Record], keyframe: Keyframe, capacity: int) -> int:
+    sim.run(until_us=BOOT_US)  # boots the firmware, its globals stay in sim.main
+    sim.clock.end_us = None
+    main, board, clock = sim.main, sim.board, sim.clock
+
+    def advance_to(t_us: int) -> None:
+        # the gate goes off on time even if nothing else happens until then
+        if main.trigger_active:
+            off_us = main.ticks_to_trigger_off * 1000
+            if off_us <= t_us:
+                if off_us > clock.now_us:
+                    clock.advance(off_us - clock.now_us)
+                main.check_trigger_off()
+        if t_us > clock.now_us:
+            clock.advance(t_us - clock.now_us)
+
+    def run_clock_path() -> None:
+        main.handle_clock_pulse()
+        main.check_trigger_off()
+
+    with sim.installed():
+        advance_to(START_US - 1)
+        _apply_keyframe(main, keyframe, capacity)
+        for t_us, record, _ in _events(records, keyframe):
+            kind = record.kind
+            if kind == STEP:
+                continue
+            advance_to(t_us)
+            if kind == CLOCK_RISE:
+                if not main.trigger_active and not main.step_changed_on_clock_pulse:
+                    main.run_idle_tasks()
+                board.drive(CLOCK_INPUT_PIN, 0)  # the jack goes high through the inverting input
+                run_clock_path()
+            elif kind == CLOCK_FALL:
+                board.drive(CLOCK_INPUT_PIN, 1)
+                run_clock_path()
+            elif kind == DIGITAL:
+                board.drive(DIGITAL_INPUT_PIN, record.arg)
+            elif kind == PARAMETER:
+                main.set_menu_value(record.arg, record.value)
+        advance_to(clock.now_us + END_MARGIN_US)
+    return 0
@@ -0,0 +1,19 @@
+"""
+Clock response scenarios with latency budgets, played on the simulator
+
+Each scenario clocks the unmodified firmware at a high rate, some while the scale list is
+scrolled and menus are toggled, and measures the worst clock edge to DAC write latency, the
+pulses that got no step and how far the gates are off TrgLngth% of the clock pulse.
+tests/test_latency_budget.py fails when a change to main.py or menu.py takes a scenario over
+its budget. The budgets can be overridden from a JSON file to try stricter ones:
+{"300bpm-menus": {"max_gate_width_error_us": 30000}}
+
+Usage (from the Host directory):
+python -m scenarios
+python -m scenarios 300bpm-menus --budgets budgets.json
+"""
+
+from .metrics import Budget, Measurement, measure
+from .scenario import SCENARIOS, Result, Scenario, run_scenario
+
+__all__ = ["Budget", "Measurement", "Result", "SCENARIOS", "Scenario", "measure", "run_scenario"]
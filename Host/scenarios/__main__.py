@@ -0,0 +1,58 @@
+"""Plays the clock response scenarios on the simulator and checks them against their latency budgets."""
+
+import argparse
+import json
+import sys
+
+from .metrics import Budget
+from .scenario import SCENARIOS, run_scenario
+
+
+def load_budgets(path: str) -> dict[str, Budget]:
+    """The scenarios' budgets with the fields given in the JSON file replaced"""
+    with open(path) as file:
+        overrides = json.load(file)
+    unknown = overrides.keys() - {scenario.name for scenario in SCENARIOS}
+    if unknown:
+        raise SystemExit(f"no such scenarios: {', '.join(sorted(unknown))}")
+    return {scenario.name: scenario.budget._replace(**overrides.get(scenario.name, {})) for scenario in SCENARIOS}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m scenarios", description=__doc__)
+    parser.add_argument("names", nargs="*", help="scenarios to play, all by default")
+    parser.add_argument("--budgets", help="JSON file of budget fields by scenario name")
+    args = parser.parse_args()
+
+    budgets = load_budgets(args.budgets) if args.budgets else {}
+    names = [scenario.name for scenario in SCENARIOS]
+    if set(args.names) - set(names):
+        raise SystemExit(f"scenarios are: {', '.join(names)}")
+    scenarios = [scenario for scenario in SCENARIOS if not args.names or scenario.name in args.names]
+
+    print(
+        f"{'scenario':<14}{'pulses':>7}{'missed':>8}{'worst us':>10}{'mean us':>9}{'gate err us':>13}{'caught up':>11}{'worst us':>10}"
+        "  budget (latency/missed/gate err/caught up/latency)"
+    )
+    failed = 0
+    for scenario in scenarios:
+        result = run_scenario(scenario, budgets.get(scenario.name))
+        measurement, budget = result.measurement, result.budget
+        print(
+            f"{scenario.name:<14}{measurement.pulses:>7}{measurement.missed:>8}{measurement.worst_latency_us:>10}"
+            f"{measurement.mean_latency_us:>9.0f}{measurement.worst_gate_width_error_us:>13}"
+            f"{measurement.caught_up:>11}{measurement.worst_caught_up_latency_us:>10}"
+            f"  {budget.max_latency_us}/{budget.max_missed}/{budget.max_gate_width_error_us}"
+            f"/{budget.max_caught_up}/{budget.max_caught_up_latency_us}"
+        )
+        for violation in result.violations:
+            print(f"  over budget: {violation}")
+        failed += bool(result.violations)
+    if failed:
+        print(f"{failed} of {len(scenarios)} scenarios over budget")
+        sys.exit(1)
+    print("all scenarios within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Clock response measured from what the simulator recorded: latency of the DAC write, missed pulses and gate widths.
+A pulse that came while the main loop was flushing the display is caught up when the flush is done:
+its step is late or, with CatchUp Latest, only moves the sequence on. Those have their own budget.
+"""
+
+import bisect
+from typing import NamedTuple
+
+from simulator import DIGITAL_OUTPUT_PIN, Recorder
+
+
+class Budget(NamedTuple):
+    max_latency_us: int  # clock rising edge to the step's DAC write
+    max_missed: int  # pulses without a step that the firmware did not catch up either
+    max_gate_width_error_us: int  # gate length against TrgLngth% of the clock period
+    max_caught_up: int = 0  # pulses the firmware counted as caught up
+    max_caught_up_latency_us: int = 0  # clock rising edge to the DAC write of a step played after a display flush
+
+
+class Measurement(NamedTuple):
+    pulses: int
+    missed: int
+    worst_latency_us: int
+    mean_latency_us: float
+    gates: int
+    worst_gate_width_error_us: int
+    caught_up: int = 0
+    worst_caught_up_latency_us: int = 0
+
+    def violations(self, budget: Budget) -> list[str]:
+        """What is over budget, empty if the measurement fits"""
+        found = []
+        if self.worst_latency_us > budget.max_latency_us:
+            found.append(f"latency {self.worst_latency_us} us > {budget.max_latency_us} us")
+        if self.missed > budget.max_missed:
+            found.append(f"missed {self.missed} > {budget.max_missed} pulses")
+        if self.worst_gate_width_error_us > budget.max_gate_width_error_us:
+            found.append(f"gate width error {self.worst_gate_width_error_us} us > {budget.max_gate_width_error_us} us")
+        if self.caught_up > budget.max_caught_up:
+            found.append(f"caught up {self.caught_up} > {budget.max_caught_up} pulses")
+        if self.worst_caught_up_latency_us > budget.max_caught_up_latency_us:
+            found.append(f"caught up latency {self.worst_caught_up_latency_us} us > {budget.max_caught_up_latency_us} us")
+        return found
+
+
+def measure(
+    recorder: Recorder,
+    rising_edges: list[int],
+    period_us: int,
+    trigger_length_percent: int,
+    end_us: int,
+    caught_up: int = 0,
+) -> Measurement:
+    """
+    A pulse's step is the first DAC write after its rising edge and before the next one, a pulse
+    without one was missed unless it is one of the caught_up pulses the firmware counted.
+    A step written after a display frame that was still being sent at the edge goes to the caught up latency.
+    The firmware makes each gate TrgLngth% of the clock period, in whole milliseconds.
+    """
+    writes = [write.t_us for write in recorder.dac_writes]
+    frames = [frame.t_us for frame in recorder.frames]
+    latencies, caught_up_latencies, without_step = [], [], 0
+    for index, edge_us in enumerate(rising_edges):
+        next_edge_us = rising_edges[index + 1] if index + 1 < len(rising_edges) else end_us
+        write = bisect.bisect_left(writes, edge_us)
+        if write < len(writes) and writes[write] < next_edge_us:
+            frame = bisect.bisect_right(frames, edge_us)
+            flushing = frame < len(frames) and frames[frame] < writes[write]
+            (caught_up_latencies if flushing else latencies).append(writes[write] - edge_us)
+        else:
+            without_step += 1
+    expected_width_us = period_us // 1000 * trigger_length_percent // 100 * 1000
+    gates = recorder.gate_intervals(DIGITAL_OUTPUT_PIN)
+    return Measurement(
+        pulses=len(rising_edges),
+        missed=max(without_step - caught_up, 0),
+        worst_latency_us=max(latencies, default=0),
+        mean_latency_us=sum(latencies) / len(latencies) if latencies else 0.0,
+        gates=len(gates),
+        worst_gate_width_error_us=max((abs(off_us - on_us - expected_width_us) for on_us, off_us in gates), default=0),
+        caught_up=caught_up,
+        worst_caught_up_latency_us=max(caught_up_latencies, default=0),
+    )
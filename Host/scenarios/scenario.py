@@ -0,0 +1,132 @@
+"""Scripted clock and user interface scenarios and the budgets their clock response has to stay within."""
+
+import time
+from typing import Callable, NamedTuple
+
+from simulator import Simulator
+
+from .metrics import Budget, Measurement, measure
+
+START_US = 500_000  # the user interface is up
+UI_START_US = 700_000
+END_MARGIN_US = 200_000
+PRESS_US = 300_000  # press and let the screen redraw
+CV_ERASE_ROWS = 8  # CvErase is 8 rows below Scale in the main menu
+SCALE_ROWS = 6
+
+
+class Scenario(NamedTuple):
+    name: str
+    description: str
+    period_us: int
+    width_us: int
+    duration_us: int
+    budget: Budget
+    ui: Callable[[Simulator, int, int], None] | None = None  # schedules user input from a start to an end time
+
+
+class Result(NamedTuple):
+    scenario: Scenario
+    measurement: Measurement
+    budget: Budget
+    real_s: float
+
+    @property
+    def violations(self) -> list[str]:
+        return self.measurement.violations(self.budget)
+
+
+def scroll_and_toggle(sim: Simulator, start_us: int, end_us: int) -> None:
+    """
+    Over and over: opens the scale list, scrolls down and back up and selects the top scale,
+    moves down to CvErase and toggles it on and off, then moves back up to Scale.
+    Every detent and press redraws the display, as when someone plays with the menus.
+    """
+    t_us = start_us
+    while t_us < end_us:
+        t_us = sim.press_button(t_us) + PRESS_US
+        t_us = sim.turn_encoder(SCALE_ROWS, t_us)
+        t_us = sim.turn_encoder(-SCALE_ROWS, t_us)
+        t_us = sim.press_button(t_us) + PRESS_US
+        t_us = sim.turn_encoder(CV_ERASE_ROWS, t_us)
+        t_us = sim.press_button(t_us) + PRESS_US
+        t_us = sim.press_button(t_us) + PRESS_US
+        t_us = sim.turn_encoder(-CV_ERASE_ROWS, t_us) + PRESS_US
+
+
+SIXTEENTHS_AT_300_BPM_US = 60_000_000 // 300 // 4
+
+SCENARIOS = (
+    Scenario(
+        "300bpm",
+        "16ths at 300 BPM, 5 ms pulses",
+        SIXTEENTHS_AT_300_BPM_US,
+        5_000,
+        6_000_000,
+        Budget(max_latency_us=500, max_missed=0, max_gate_width_error_us=1_500),
+    ),
+    Scenario(
+        "300bpm-menus",
+        "16ths at 300 BPM while scrolling the scale list and toggling menus",
+        SIXTEENTHS_AT_300_BPM_US,
+        5_000,
+        8_000_000,
+        # a display redraw (about 24 ms) holds a gate on until it is done
+        Budget(max_latency_us=500, max_missed=0, max_gate_width_error_us=50_000),
+        scroll_and_toggle,
+    ),
+    Scenario(
+        "100hz",
+        "triggers at 100 Hz, 2 ms pulses",
+        10_000,
+        2_000,
+        4_000_000,
+        Budget(max_latency_us=500, max_missed=0, max_gate_width_error_us=1_500),
+    ),
+    Scenario(
+        "100hz-menus",
+        "triggers at 100 Hz while scrolling the scale list and toggling menus",
+        10_000,
+        2_000,
+        8_000_000,
+        # pulses inside a display redraw are counted by the clock IRQ and caught up when it
+        # ends: the latest one is played late, the others only move the sequence on (CatchUp Latest)
+        Budget(
+            max_latency_us=500,
+            max_missed=0,
+            max_gate_width_error_us=30_000,
+            max_caught_up=100,
+            max_caught_up_latency_us=25_000,  # a redraw
+        ),
+        scroll_and_toggle,
+    ),
+    Scenario(
+        "200hz",
+        "triggers at 200 Hz, 1 ms pulses",
+        5_000,
+        1_000,
+        4_000_000,
+        Budget(max_latency_us=500, max_missed=0, max_gate_width_error_us=1_500),
+    ),
+)
+
+
+def run_scenario(scenario: Scenario, budget: Budget | None = None, seed: int = 0) -> Result:
+    """Plays the scenario on the simulated firmware and measures the clock response against the budget (the scenario's own by default)."""
+    sim = Simulator(seed=seed)
+    end_us = START_US + scenario.duration_us
+    rising_edges = sim.clock_pulses(period_us=scenario.period_us, width_us=scenario.width_us, start_us=START_US, until_us=end_us)
+    if scenario.ui is not None:
+        scenario.ui(sim, UI_START_US, end_us)
+    start = time.perf_counter()
+    sim.run(until_us=end_us + END_MARGIN_US)
+    real_s = time.perf_counter() - start
+    measurement = measure(
+        sim.recorder,
+        rising_edges,
+        scenario.period_us,
+        sim.main.trigger_length_percent,
+        end_us + END_MARGIN_US,
+        sim.main.caught_up_clock_edges,
+    )
+    return Result(scenario, measurement, budget or scenario.budget, real_s)
@@ -0,0 +1,49 @@
+"""
+Host-side simulator for the Pi Pico Random Looping Sequencer firmware
+
+Fake machine, time, framebuf, micropython, gc and select modules run the unmodified firmware in
+Software/ under CPython on a virtual microsecond clock, faster than real time.
+Every DAC write, output pin edge, display frame and line of serial output is recorded
+with its timestamp, and text can be sent to its USB serial input.
+
+Usage (from the Host directory):
+python -m simulator --seconds 10 --bpm 120
+"""
+
+from .board import Board
+from .clock import SimulationEnd, VirtualClock
+from .firmware import (
+    CLOCK_INPUT_PIN,
+    DIGITAL_INPUT_PIN,
+    DIGITAL_OUTPUT_PIN,
+    LIB_DIR,
+    MAIN_PATH,
+    ROTARY_BUTTON_PIN,
+    SOFTWARE_DIR,
+    Simulator,
+)
+from .recorder import DacWrite, Frame, PinEdge, Recorder, RenderCost, SerialLine
+from .snapshot import from_pbm, to_pbm, to_png
+
+__all__ = [
+    "Board",
+    "CLOCK_INPUT_PIN",
+    "DIGITAL_INPUT_PIN",
+    "DIGITAL_OUTPUT_PIN",
+    "DacWrite",
+    "Frame",
+    "LIB_DIR",
+    "MAIN_PATH",
+    "PinEdge",
+    "ROTARY_BUTTON_PIN",
+    "Recorder",
+    "RenderCost",
+    "SOFTWARE_DIR",
+    "SerialLine",
+    "SimulationEnd",
+    "Simulator",
+    "VirtualClock",
+    "from_pbm",
+    "to_pbm",
+    "to_png",
+]
@@ -0,0 +1,46 @@
+"""Runs the firmware on the simulator with a steady clock and prints what it output."""
+
+import argparse
+import time
+
+from . import DIGITAL_OUTPUT_PIN, Simulator, to_png
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m simulator", description=__doc__)
+    parser.add_argument("--seconds", type=float, default=10.0, help="virtual time to run for")
+    parser.add_argument("--bpm", type=float, default=120.0, help="clock tempo, one pulse per 16th note")
+    parser.add_argument("--width-ms", type=float, default=5.0, help="clock pulse width")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the firmware's random module")
+    parser.add_argument("--serial", action="store_true", help="echo the firmware's serial output")
+    parser.add_argument("--png", help="write what the display shows at the end to this PNG file")
+    args = parser.parse_args()
+
+    sim = Simulator(seed=args.seed, echo_serial=args.serial)
+    period_us = int(60_000_000 / (args.bpm * 4))
+    end_us = int(args.seconds * 1_000_000)
+    edges = sim.clock_pulses(period_us, int(args.width_ms * 1000), start_us=500_000, until_us=end_us)
+
+    start = time.perf_counter()
+    sim.run(until_us=end_us)
+    elapsed = time.perf_counter() - start
+
+    recorder = sim.recorder
+    print(f"virtual {args.seconds:.1f} s in {elapsed:.2f} s real ({args.seconds / elapsed:.1f}x real time)")
+    print(f"clock pulses: {len(edges)}")
+    print(f"DAC writes: {len(recorder.dac_writes)}")
+    print(f"gates: {len(recorder.gate_on_times(DIGITAL_OUTPUT_PIN))}")
+    print(f"display frames: {len(recorder.frames)}")
+    drawn = [frame.render for frame in recorder.frames if frame.render.calls]
+    if drawn:
+        print(f"render cost per drawn frame: {sum(r.calls for r in drawn) / len(drawn):.0f} calls, {sum(r.pixels for r in drawn) / len(drawn):.0f} pixels, ~{sum(r.us for r in drawn) / len(drawn):.0f} us estimated, worst ~{max(r.us for r in drawn)} us")
+    if args.png:
+        with open(args.png, "wb") as file:
+            file.write(to_png(sim.display.ram))
+        print("last frame written to", args.png)
+    if recorder.dac_writes:
+        print("last DAC values:", [write.value for write in recorder.dac_writes[-16:]])
+
+
+if __name__ == "__main__":
+    main()
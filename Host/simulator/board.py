@@ -0,0 +1,164 @@
+"""Simulated Raspberry Pi Pico: pin levels, interrupts, I2C buses, ADC inputs and timers on a virtual clock.
+
+The fake MicroPython modules in simulator.fakes talk to the board in `current`.
+"""
+
+from .clock import VirtualClock
+from .recorder import PinEdge, Recorder
+
+# rp2 port constants
+PIN_IN = 0
+PIN_OUT = 1
+PULL_UP = 1
+PULL_DOWN = 2
+IRQ_FALLING = 4
+IRQ_RISING = 8
+
+ADC_VREF = 3.3
+ADC_PINS = (26, 27, 28, 29)
+
+# Approximate cost of one call into the hardware layer, including the bytecode around it
+# (RP2040 at 125 MHz runs a MicroPython method call in roughly 10 - 30 us)
+HAL_CALL_US = 25
+I2C_CALL_OVERHEAD_US = 15
+ADC_READ_US = 4
+
+current = None
+"""The Board the fake modules are bound to, set by Simulator while the firmware runs."""
+
+
+def get() -> "Board":
+    if current is None:
+        raise RuntimeError("no simulated board is installed, use simulator.Simulator")
+    return current
+
+
+class PinState:
+    """Electrical state of one GPIO, shared by every machine.Pin object created for it."""
+
+    def __init__(self, number: int) -> None:
+        self.number = number
+        self.mode = PIN_IN
+        self.pull = None
+        self.out_value = 0
+        self.external = None  # level driven from outside the board, None if floating
+        self.irq_handler = None
+        self.irq_trigger = 0
+        self.irq_hard = False
+        self.irq_pin = None  # the machine.Pin passed to the handler
+
+    @property
+    def level(self) -> int:
+        if self.mode == PIN_OUT:
+            return self.out_value
+        if self.external is not None:
+            return self.external
+        return 1 if self.pull == PULL_UP else 0
+
+
+class Board:
+    def __init__(self, clock: VirtualClock | None = None, recorder: Recorder | None = None, hal_call_us: int = HAL_CALL_US) -> None:
+        self.clock = clock or VirtualClock()
+        self.recorder = recorder or Recorder()
+        self.hal_call_us = hal_call_us
+        self.pins: dict[int, PinState] = {}
+        self.i2c_devices: dict[int, dict[int, object]] = {}  # bus id -> address -> device model
+        self.adc_sources: dict[int, object] = {}  # pin -> volts or callable(t_us) -> volts
+        self.i2c_bytes = 0  # bytes transferred on every I2C bus
+        self.framebuffer_texts: list = []
+        self.render_calls = 0  # framebuf drawing since the last display data write
+        self.render_pixels = 0
+        self._soft_irqs = []
+        self._in_hard_irq = False
+        self._in_soft_irq = False
+
+    # time
+
+    def hal(self, cost_us: int | None = None) -> None:
+        """Accounts for one hardware-layer call, then runs any soft interrupt handlers that became due."""
+        if self._in_hard_irq:
+            return
+        self.clock.advance(self.hal_call_us if cost_us is None else cost_us)
+        if self._soft_irqs and not self._in_soft_irq:
+            self.run_soft_irqs()
+
+    def run_soft_irqs(self) -> None:
+        """Runs scheduled handlers, like MicroPython does between bytecodes."""
+        self._in_soft_irq = True
+        try:
+            while self._soft_irqs:
+                handler, argument = self._soft_irqs.pop(0)
+                handler(argument)
+        finally:
+            self._in_soft_irq = False
+
+    def schedule(self, handler, argument) -> None:
+        self._soft_irqs.append((handler, argument))
+
+    def interrupt(self, handler, argument, hard: bool) -> None:
+        if not hard:
+            self.schedule(handler, argument)
+            return
+        self._in_hard_irq = True
+        try:
+            handler(argument)
+        finally:
+            self._in_hard_irq = False
+
+    # pins
+
+    def pin(self, number: int) -> PinState:
+        state = self.pins.get(number)
+        if state is None:
+            state = self.pins[number] = PinState(number)
+        return state
+
+    def drive(self, number: int, level: int | None) -> None:
+        """Drives a pin from outside the board (None lets it float to its pull), firing its IRQ on a matching edge."""
+        state = self.pin(number)
+        old_level = state.level
+        state.external = level
+        self._pin_changed(state, old_level)
+
+    def write_pin(self, state: PinState, value: int) -> None:
+        old_level = state.level
+        state.out_value = 1 if value else 0
+        if state.mode == PIN_OUT and state.level != old_level:
+            self.recorder.pin_edges.append(PinEdge(self.clock.now_us, state.number, state.level))
+
+    def _pin_changed(self, state: PinState, old_level: int) -> None:
+        level = state.level
+        if level == old_level or state.irq_handler is None:
+            return
+        if (level and state.irq_trigger & IRQ_RISING) or (not level and state.irq_trigger & IRQ_FALLING):
+            self.interrupt(state.irq_handler, state.irq_pin, state.irq_hard)
+
+    # i2c
+
+    def attach_i2c(self, bus: int, address: int, device) -> None:
+        self.i2c_devices.setdefault(bus, {})[address] = device
+
+    def i2c_device(self, bus: int, address: int):
+        device = self.i2c_devices.get(bus, {}).get(address)
+        if device is None:
+            raise OSError(5)  # EIO, the address was not acknowledged
+        return device
+
+    def i2c_transfer_us(self, nbytes: int, freq: int) -> int:
+        """Bus time of one transaction: start, address and data bytes with their ACK bits, stop."""
+        bits = 2 + 9 * (1 + nbytes)
+        return I2C_CALL_OVERHEAD_US + (bits * 1_000_000) // freq
+
+    # adc
+
+    def set_adc(self, pin: int, volts) -> None:
+        """Sets an ADC input to a voltage or to a function of the virtual time in microseconds."""
+        self.adc_sources[pin] = volts
+
+    def read_adc_u16(self, pin: int) -> int:
+        source = self.adc_sources.get(pin, 0.0)
+        volts = source(self.clock.now_us) if callable(source) else source
+        volts = min(max(volts, 0.0), ADC_VREF)
+        code = int(volts / ADC_VREF * 4095 + 0.5)
+        # the rp2 port scales the 12 bit conversion up to 16 bits
+        return (code << 4) | (code >> 8)
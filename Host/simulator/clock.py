@@ -0,0 +1,50 @@
+"""Virtual microsecond clock that drives the simulated board."""
+
+import heapq
+import itertools
+
+
+class SimulationEnd(BaseException):
+    """Raised from inside the firmware when the virtual clock reaches the end of the run.
+
+    Derives from BaseException so the firmware's bare except clauses cannot swallow it.
+    """
+
+
+class VirtualClock:
+    """Microsecond clock that only moves when the simulated hardware is used.
+
+    Callbacks scheduled with at() fire in time order as the clock advances past them.
+    """
+
+    def __init__(self, end_us: int | None = None) -> None:
+        self.now_us = 0
+        self.end_us = end_us
+        self._events = []
+        self._sequence = itertools.count()
+
+    def at(self, time_us: int, callback) -> None:
+        """Schedules callback() to run when the clock reaches time_us."""
+        heapq.heappush(self._events, (int(time_us), next(self._sequence), callback))
+
+    def after(self, delay_us: int, callback) -> None:
+        self.at(self.now_us + delay_us, callback)
+
+    def next_event_us(self) -> int | None:
+        return self._events[0][0] if self._events else None
+
+    def advance(self, delta_us: int) -> None:
+        """Moves the clock forward, firing every callback that falls due on the way."""
+        target = self.now_us + delta_us
+        if self.end_us is not None and target > self.end_us:
+            target = self.end_us
+        events = self._events
+        while events and events[0][0] <= target:
+            time_us, _, callback = heapq.heappop(events)
+            if time_us > self.now_us:
+                self.now_us = time_us
+            callback()
+        if target > self.now_us:
+            self.now_us = target
+        if self.end_us is not None and self.now_us >= self.end_us:
+            raise SimulationEnd()
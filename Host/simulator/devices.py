@@ -0,0 +1,138 @@
+"""Models of the I2C devices on the board's bus: the SSD1306 OLED and the MCP4725 DAC."""
+
+from .fakes.framebuf import RENDER_CALL_US, RENDER_PIXEL_NS
+from .recorder import DacWrite, Frame, RenderCost
+
+SSD1306_ADDRESS = 0x3C
+MCP4725_ADDRESS = 0x60
+
+# SSD1306 commands followed by argument bytes, and how many
+_SSD1306_ARGUMENT_COUNTS = {
+    0x20: 1,  # memory addressing mode
+    0x21: 2,  # column address
+    0x22: 2,  # page address
+    0x81: 1,  # contrast
+    0x8D: 1,  # charge pump
+    0xA8: 1,  # multiplex ratio
+    0xD3: 1,  # display offset
+    0xD5: 1,  # clock divide
+    0xD9: 1,  # pre-charge period
+    0xDA: 1,  # COM pins
+    0xDB: 1,  # VCOMH deselect level
+}
+
+
+class SSD1306Model:
+    """Keeps the display RAM in horizontal addressing mode and records a frame for every data write."""
+
+    def __init__(self, board, width: int = 128, height: int = 64) -> None:
+        self.board = board
+        self.width = width
+        self.pages = height // 8
+        self.ram = bytearray(width * self.pages)
+        self.display_on = False
+        self.inverted = False
+        self.contrast = 0x7F
+        self.column_start, self.column_end = 0, width - 1
+        self.page_start, self.page_end = 0, self.pages - 1
+        self._column, self._page = 0, 0
+        self._command = None
+        self._arguments = []
+
+    def write(self, data: bytes) -> None:
+        control, payload = data[0], data[1:]
+        if control & 0x40:
+            self._write_ram(payload)
+        else:
+            for byte in payload:
+                self._command_byte(byte)
+
+    def read(self, nbytes: int) -> bytes:
+        return bytes([0x00 if self.display_on else 0x40]) * nbytes
+
+    def _command_byte(self, byte: int) -> None:
+        if self._command is not None:
+            self._arguments.append(byte)
+            if len(self._arguments) == _SSD1306_ARGUMENT_COUNTS[self._command]:
+                self._apply(self._command, self._arguments)
+                self._command = None
+            return
+        if byte in _SSD1306_ARGUMENT_COUNTS:
+            self._command, self._arguments = byte, []
+        elif byte in (0xAE, 0xAF):
+            self.display_on = byte == 0xAF
+        elif byte in (0xA6, 0xA7):
+            self.inverted = byte == 0xA7
+
+    def _apply(self, command: int, arguments: list) -> None:
+        if command == 0x21:
+            self.column_start, self.column_end = arguments
+            self._column = self.column_start
+        elif command == 0x22:
+            self.page_start, self.page_end = arguments
+            self._page = self.page_start
+        elif command == 0x81:
+            self.contrast = arguments[0]
+
+    def _write_ram(self, payload: bytes) -> None:
+        for byte in payload:
+            self.ram[self._page * self.width + self._column] = byte
+            self._column += 1
+            if self._column > self.column_end:
+                self._column = self.column_start
+                self._page += 1
+                if self._page > self.page_end:
+                    self._page = self.page_start
+        board = self.board
+        render = RenderCost(board.render_calls, board.render_pixels, board.render_calls * RENDER_CALL_US + board.render_pixels * RENDER_PIXEL_NS // 1000)
+        board.render_calls = board.render_pixels = 0
+        board.recorder.frames.append(Frame(board.clock.now_us, bytes(self.ram), tuple(board.framebuffer_texts), render))
+
+    def pixel(self, x: int, y: int) -> int:
+        return (self.ram[(y >> 3) * self.width + x] >> (y & 7)) & 1
+
+
+class MCP4725Model:
+    """12 bit DAC, records every change of the output register."""
+
+    def __init__(self, board, vref: float = 5.0) -> None:
+        self.board = board
+        self.vref = vref
+        self.value = 0
+        self.eeprom_value = 0
+        self.power_down = 0
+
+    @property
+    def volts(self) -> float:
+        return self.value * self.vref / 4096
+
+    def write(self, data: bytes) -> None:
+        if data[0] & 0xC0 == 0:
+            # fast mode: 0 0 PD1 PD0 D11 D10 D9 D8, D7..D0, repeated
+            for index in range(0, len(data) - 1, 2):
+                self.power_down = (data[index] >> 4) & 0x03
+                self._set(((data[index] & 0x0F) << 8) | data[index + 1])
+        elif len(data) >= 3:
+            # write DAC register (C2 C1 C0 = 0 1 0) or DAC register and EEPROM (0 1 1)
+            self.power_down = (data[0] >> 1) & 0x03
+            value = (data[1] << 4) | (data[2] >> 4)
+            if data[0] & 0xE0 == 0x60:
+                self.eeprom_value = value
+            self._set(value)
+
+    def read(self, nbytes: int) -> bytes:
+        status = bytes(
+            [
+                0x80 | (self.power_down << 1),
+                self.value >> 4,
+                (self.value & 0x0F) << 4,
+                (self.power_down << 5) | (self.eeprom_value >> 8),
+                self.eeprom_value & 0xFF,
+            ]
+        )
+        return status[:nbytes]
+
+    def _set(self, value: int) -> None:
+        self.value = value
+        board = self.board
+        board.recorder.dac_writes.append(DacWrite(board.clock.now_us, value))
@@ -0,0 +1 @@
+"""Stand-ins for the MicroPython modules the firmware imports, backed by simulator.board."""
@@ -0,0 +1,141 @@
+"""MicroPython's framebuf module, MONO_VLSB only, in pure Python.
+
+fill, fill_rect, rect, hline, vline, pixel, scroll and text draw into the buffer like the
+C implementation, text with the 8x8 font in font8x8.py (modeled on MicroPython's, see there).
+The strings are also kept in board.framebuffer_texts, so every recorded display frame
+carries what was written on it.
+
+Drawing is counted on the board (calls and pixels visited) and every recorded frame gets
+the render cost of the drawing since the previous flush, see RENDER_CALL_US.
+"""
+
+from .. import board
+from .font8x8 import glyph
+
+MONO_VLSB = 0
+MONO_HLSB = 3
+MONO_HMSB = 4
+
+# estimated RP2040 cost of drawing, for comparing render paths on the host, not measured:
+# a call from bytecode into a framebuf method, and visiting one pixel in its C loops
+RENDER_CALL_US = 10
+RENDER_PIXEL_NS = 40
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width: int, height: int, format: int = MONO_VLSB, stride: int | None = None) -> None:
+        if format != MONO_VLSB:
+            raise ValueError("only MONO_VLSB is simulated")
+        self._buffer = buffer
+        self._width = width
+        self._height = height
+
+    @staticmethod
+    def _count(pixels: int) -> None:
+        current = board.get()
+        current.render_calls += 1
+        current.render_pixels += pixels
+
+    def _get(self, x: int, y: int) -> int:
+        return (self._buffer[(y >> 3) * self._width + x] >> (y & 7)) & 1
+
+    def _set(self, x: int, y: int, c: int) -> None:
+        index = (y >> 3) * self._width + x
+        if c:
+            self._buffer[index] |= 1 << (y & 7)
+        else:
+            self._buffer[index] &= ~(1 << (y & 7)) & 0xFF
+
+    def pixel(self, x: int, y: int, c: int | None = None):
+        self._count(1)
+        if not (0 <= x < self._width and 0 <= y < self._height):
+            return 0 if c is None else None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+        return None
+
+    def _fill_rect(self, x: int, y: int, w: int, h: int, c: int) -> int:
+        """Fills the clipped rectangle a page (8 rows) at a time, returns the pixels filled"""
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, self._width), min(y + h, self._height)
+        if x0 >= x1 or y0 >= y1:
+            return 0
+        buffer, width = self._buffer, self._width
+        for page in range(y0 >> 3, ((y1 - 1) >> 3) + 1):
+            top, bottom = max(y0 - page * 8, 0), min(y1 - page * 8, 8)
+            mask = ((1 << bottom) - 1) & ~((1 << top) - 1)
+            start = page * width
+            for index in range(start + x0, start + x1):
+                if c:
+                    buffer[index] |= mask
+                else:
+                    buffer[index] &= ~mask & 0xFF
+        return (x1 - x0) * (y1 - y0)
+
+    def fill(self, c: int) -> None:
+        value = 0xFF if c else 0x00
+        buffer = self._buffer
+        for index in range(len(buffer)):
+            buffer[index] = value
+        self._count(self._width * self._height)
+        board.get().framebuffer_texts.clear()
+
+    def fill_rect(self, x: int, y: int, w: int, h: int, c: int) -> None:
+        self._count(self._fill_rect(x, y, w, h, c))
+
+    def hline(self, x: int, y: int, w: int, c: int) -> None:
+        self._count(self._fill_rect(x, y, w, 1, c))
+
+    def vline(self, x: int, y: int, h: int, c: int) -> None:
+        self._count(self._fill_rect(x, y, 1, h, c))
+
+    def rect(self, x: int, y: int, w: int, h: int, c: int, f: bool = False) -> None:
+        if f:
+            self._count(self._fill_rect(x, y, w, h, c))
+            return
+        pixels = self._fill_rect(x, y, w, 1, c)
+        pixels += self._fill_rect(x, y + h - 1, w, 1, c)
+        pixels += self._fill_rect(x, y, 1, h, c)
+        pixels += self._fill_rect(x + w - 1, y, 1, h, c)
+        self._count(pixels)
+
+    def scroll(self, xstep: int, ystep: int) -> None:
+        """Shifts the contents, the area scrolled away from keeps its old pixels (as on the Pico)"""
+        width, height = self._width, self._height
+        if xstep < 0:
+            sx, xend, dx = 0, width + xstep, 1
+            if xend <= 0:
+                return
+        else:
+            sx, xend, dx = width - 1, xstep - 1, -1
+            if xend >= sx:
+                return
+        if ystep < 0:
+            y, yend, dy = 0, height + ystep, 1
+        else:
+            y, yend, dy = height - 1, ystep - 1, -1
+        pixels = 0
+        while y != yend:
+            x = sx
+            while x != xend:
+                self._set(x, y, self._get(x - xstep, y - ystep))
+                x += dx
+                pixels += 1
+            y += dy
+        self._count(pixels)
+
+    def text(self, s: str, x: int, y: int, c: int = 1) -> None:
+        board.get().framebuffer_texts.append((s, x, y, c))
+        width, height = self._width, self._height
+        for char in s:
+            for column in glyph(char):
+                if 0 <= x < width:
+                    row = y
+                    while column:
+                        if column & 1 and 0 <= row < height:
+                            self._set(x, row, c)
+                        column >>= 1
+                        row += 1
+                x += 1
+        self._count(64 * len(s))  # every bit of the character cells is tested
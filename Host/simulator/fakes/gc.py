@@ -0,0 +1,88 @@
+"""MicroPython's gc module. Anything else falls through to CPython's gc.
+
+collect() takes COLLECT_US of virtual time and is recorded in Recorder.collections.
+enable()/disable() only switch a flag here, CPython's own collector keeps running.
+
+With trace_memory=True, mem_alloc() and mem_free() count the live bytes allocated by
+firmware code (files in Software/), against a heap of TRACED_HEAP_SIZE: CPython's objects
+take about twice the bytes of MicroPython's (a small int alone is 28 bytes, 0 on the Pico). CPython cannot count short-lived allocations the way
+MicroPython's heap counter does, so a delta only shows memory the firmware still holds.
+Strings handed to FrameBuffer.text() stay referenced by the recorded frames, so a redraw
+that formats new strings does show up.
+Without tracing, the heap is modelled as filling with garbage at GARBAGE_BYTES_PER_SECOND
+of virtual time until the next collect(), so mem_free() grows across a collection as on the Pico.
+"""
+
+import gc as _cpython_gc
+import tracemalloc
+
+from .. import board
+
+HEAP_SIZE = 192 * 1024  # roughly what MicroPython leaves for the heap on an RP2040
+TRACED_HEAP_SIZE = 2 * HEAP_SIZE  # the same heap in CPython object sizes
+LIVE_BYTES = 24 * 1024  # what the firmware keeps allocated after boot
+GARBAGE_BYTES_PER_SECOND = 2048
+COLLECT_US = 2_000  # marking a small live set and sweeping the whole heap
+
+_firmware_filter = None
+_enabled = True
+_last_collect_us = 0
+
+
+def __getattr__(name):
+    return getattr(_cpython_gc, name)
+
+
+def _reset(firmware_dir: str | None = None) -> None:
+    """Called by the simulator before each run."""
+    global _firmware_filter, _enabled, _last_collect_us
+    _firmware_filter = None if firmware_dir is None else tracemalloc.Filter(True, f"{firmware_dir}/*")
+    _enabled = True
+    _last_collect_us = 0
+
+
+def _now_us() -> int:
+    return 0 if board.current is None else board.current.clock.now_us
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def isenabled() -> bool:
+    return _enabled
+
+
+def collect() -> None:
+    global _last_collect_us
+    if board.current is not None:
+        board.current.recorder.collections.append(_now_us())
+        board.current.hal(COLLECT_US)
+    _last_collect_us = _now_us()
+
+
+def mem_alloc() -> int:
+    if _is_tracing():
+        _cpython_gc.collect()  # free unreachable cycles now rather than in the middle of a measurement
+        snapshot = tracemalloc.take_snapshot().filter_traces([_firmware_filter])
+        return sum(statistic.size for statistic in snapshot.statistics("filename"))
+    garbage = (_now_us() - _last_collect_us) * GARBAGE_BYTES_PER_SECOND // 1_000_000
+    return min(HEAP_SIZE, LIVE_BYTES + garbage)
+
+
+def _is_tracing() -> bool:
+    return tracemalloc.is_tracing() and _firmware_filter is not None
+
+
+def mem_free() -> int:
+    return (TRACED_HEAP_SIZE if _is_tracing() else HEAP_SIZE) - mem_alloc()
+
+
+def threshold(amount: int | None = None):
+    return -1 if amount is None else None
@@ -0,0 +1,174 @@
+"""MicroPython's machine module for the rp2 port, backed by the simulated board."""
+
+from .. import board as _board
+
+_DEFAULT_I2C_FREQ = 400_000
+
+
+def freq(hz: int | None = None):
+    return 125_000_000 if hz is None else None
+
+
+def idle() -> None:
+    _board.get().hal()
+
+
+def reset() -> None:
+    raise SystemExit("machine.reset()")
+
+
+def unique_id() -> bytes:
+    return b"\xe6\x61\x38\x52\x83\x4a\x2e\x29"
+
+
+def disable_irq() -> int:
+    return 0
+
+
+def enable_irq(state: int = 0) -> None:
+    pass
+
+
+class Pin:
+    IN = _board.PIN_IN
+    OUT = _board.PIN_OUT
+    PULL_UP = _board.PULL_UP
+    PULL_DOWN = _board.PULL_DOWN
+    IRQ_FALLING = _board.IRQ_FALLING
+    IRQ_RISING = _board.IRQ_RISING
+
+    def __init__(self, id: int, mode: int = -1, pull: int | None = -1, *, value: int | None = None) -> None:
+        self._id = id
+        self._state = _board.get().pin(id)
+        self.init(mode, pull, value=value)
+
+    def init(self, mode: int = -1, pull: int | None = -1, *, value: int | None = None) -> None:
+        state = self._state
+        if mode != -1:
+            state.mode = mode
+        if pull != -1:
+            state.pull = pull
+        if value is not None:
+            _board.get().write_pin(state, value)
+
+    def value(self, x: int | None = None):
+        board = _board.get()
+        board.hal()
+        if x is None:
+            return self._state.level
+        board.write_pin(self._state, x)
+        return None
+
+    __call__ = value
+
+    def on(self) -> None:
+        self.value(1)
+
+    def off(self) -> None:
+        self.value(0)
+
+    high = on
+    low = off
+
+    def toggle(self) -> None:
+        self.value(0 if self._state.out_value else 1)
+
+    def irq(self, handler=None, trigger: int = IRQ_FALLING | IRQ_RISING, hard: bool = False):
+        state = self._state
+        state.irq_handler = handler
+        state.irq_trigger = trigger if handler is not None else 0
+        state.irq_hard = hard
+        state.irq_pin = self
+        return None
+
+    def __repr__(self) -> str:
+        return f"Pin({self._id}, mode={'OUT' if self._state.mode == Pin.OUT else 'IN'})"
+
+
+class I2C:
+    def __init__(self, id: int, *, scl=None, sda=None, freq: int = _DEFAULT_I2C_FREQ, timeout: int = 50000) -> None:
+        self._id = id
+        self._freq = freq
+
+    def scan(self) -> list[int]:
+        return sorted(_board.get().i2c_devices.get(self._id, {}))
+
+    def _transfer(self, address: int, nbytes: int):
+        board = _board.get()
+        device = board.i2c_device(self._id, address)
+        board.i2c_bytes += nbytes
+        board.hal(board.i2c_transfer_us(nbytes, self._freq))
+        return device
+
+    def writeto(self, addr: int, buf, stop: bool = True) -> int:
+        data = bytes(buf)
+        device = self._transfer(addr, len(data))
+        device.write(data)
+        return len(data)
+
+    def writevto(self, addr: int, vector, stop: bool = True) -> int:
+        data = b"".join(bytes(buf) for buf in vector)
+        device = self._transfer(addr, len(data))
+        device.write(data)
+        return len(data)
+
+    def readfrom_into(self, addr: int, buf, stop: bool = True) -> None:
+        device = self._transfer(addr, len(buf))
+        data = device.read(len(buf))
+        buf[: len(data)] = data
+
+    def readfrom(self, addr: int, nbytes: int, stop: bool = True) -> bytes:
+        buf = bytearray(nbytes)
+        self.readfrom_into(addr, buf, stop)
+        return bytes(buf)
+
+
+class ADC:
+    CORE_TEMP = 4
+
+    def __init__(self, pin) -> None:
+        if isinstance(pin, Pin):
+            self._pin = pin._id
+        elif pin in _board.ADC_PINS:
+            self._pin = pin
+        else:
+            self._pin = _board.ADC_PINS[pin] if 0 <= pin < len(_board.ADC_PINS) else pin
+
+    def read_u16(self) -> int:
+        board = _board.get()
+        board.hal(_board.ADC_READ_US)
+        return board.read_adc_u16(self._pin)
+
+
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id: int = -1, **kwargs) -> None:
+        self._generation = 0
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, *, mode: int = PERIODIC, freq: float = -1, period: int = -1, tick_hz: int = 1000, callback=None, hard: bool = True) -> None:
+        self.deinit()
+        if freq > 0:
+            period_us = max(int(1_000_000 / freq), 1)
+        elif period > 0:
+            period_us = max(int(period) * 1_000_000 // tick_hz, 1)
+        else:
+            raise ValueError("period or freq required")
+        generation = self._generation
+        clock = _board.get().clock
+
+        def fire():
+            if generation != self._generation:
+                return  # deinitialised or re-initialised since this was scheduled
+            if mode == Timer.PERIODIC:
+                clock.after(period_us, fire)
+            if callback is not None:
+                _board.get().interrupt(callback, self, hard)
+
+        clock.after(period_us, fire)
+
+    def deinit(self) -> None:
+        self._generation += 1
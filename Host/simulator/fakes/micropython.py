@@ -0,0 +1,48 @@
+"""MicroPython's micropython module: code emitters are no-ops and schedule() queues a soft interrupt."""
+
+from .. import board
+from . import gc
+
+
+def const(value):
+    return value
+
+
+def native(function):
+    return function
+
+
+def viper(function):
+    return function
+
+
+def schedule(function, argument) -> None:
+    board.get().schedule(function, argument)
+
+
+def alloc_emergency_exception_buf(size: int) -> None:
+    pass
+
+
+def opt_level(level: int | None = None):
+    return 0 if level is None else None
+
+
+def mem_info(verbose=None) -> None:
+    """Same format as the Pico, with the numbers of the gc fake and an unfragmented heap."""
+    used, free = gc.mem_alloc(), gc.mem_free()
+    print("stack: 0 out of 7936")
+    print(f"GC: total: {used + free}, used: {used}, free: {free}")
+    print(f" No. of 1-blocks: 0, 2-blocks: 0, max blk sz: 0, max free sz: {free // 16}")
+
+
+def heap_lock() -> int:
+    return 0
+
+
+def heap_unlock() -> int:
+    return 0
+
+
+def kbd_intr(char: int) -> None:
+    pass
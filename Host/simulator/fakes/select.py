@@ -0,0 +1,35 @@
+"""MicroPython's select module. Only the simulated USB serial input (sys.stdin) ever becomes readable."""
+
+POLLIN = 0x0001
+POLLOUT = 0x0004
+POLLERR = 0x0008
+POLLHUP = 0x0010
+
+
+class poll:
+    """Never blocks: a timeout would have to advance the virtual clock, so every poll is poll(0)."""
+
+    def __init__(self) -> None:
+        self._masks = {}
+
+    def register(self, stream, eventmask: int = POLLIN | POLLOUT) -> None:
+        self._masks[stream] = eventmask
+
+    def unregister(self, stream) -> None:
+        self._masks.pop(stream, None)
+
+    def modify(self, stream, eventmask: int) -> None:
+        self._masks[stream] = eventmask
+
+    def poll(self, timeout: int = -1) -> list:
+        ready = []
+        for stream, mask in self._masks.items():
+            events = mask & POLLOUT
+            if mask & POLLIN and getattr(stream, "in_waiting", 0):
+                events |= POLLIN
+            if events:
+                ready.append((stream, events))
+        return ready
+
+    def ipoll(self, timeout: int = -1, flags: int = 0):
+        return iter(self.poll(timeout))
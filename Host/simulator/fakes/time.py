@@ -0,0 +1,48 @@
+"""MicroPython's time module on the virtual clock. Anything else falls through to CPython's time."""
+
+import time as _cpython_time
+
+from .. import board
+
+TICKS_PERIOD = 1 << 30  # ticks wrap around like on the rp2 port
+_TICKS_HALF_PERIOD = TICKS_PERIOD // 2
+
+
+def __getattr__(name):
+    return getattr(_cpython_time, name)
+
+
+def ticks_us() -> int:
+    current = board.get()
+    current.hal()
+    return current.clock.now_us % TICKS_PERIOD
+
+
+def ticks_ms() -> int:
+    current = board.get()
+    current.hal()
+    return (current.clock.now_us // 1000) % TICKS_PERIOD
+
+
+def ticks_cpu() -> int:
+    return ticks_us()
+
+
+def ticks_add(ticks: int, delta: int) -> int:
+    return (ticks + delta) % TICKS_PERIOD
+
+
+def ticks_diff(ticks1: int, ticks2: int) -> int:
+    return ((ticks1 - ticks2 + _TICKS_HALF_PERIOD) % TICKS_PERIOD) - _TICKS_HALF_PERIOD
+
+
+def sleep_us(us: int) -> None:
+    board.get().hal(max(int(us), 0))
+
+
+def sleep_ms(ms: int) -> None:
+    sleep_us(ms * 1000)
+
+
+def sleep(seconds: float) -> None:
+    sleep_us(int(seconds * 1_000_000))
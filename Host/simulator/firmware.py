@@ -0,0 +1,256 @@
+"""Runs the unmodified firmware in Software/ on the simulated board."""
+
+import builtins
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+import types
+from pathlib import Path
+
+from . import board as board_module
+from .board import Board
+from .clock import SimulationEnd, VirtualClock
+from .devices import MCP4725_ADDRESS, SSD1306_ADDRESS, MCP4725Model, SSD1306Model
+from .fakes import framebuf, gc, machine, micropython, select
+from .fakes import time as fake_time
+from .recorder import Recorder, SerialLine
+
+SOFTWARE_DIR = Path(__file__).resolve().parents[2] / "Software"
+LIB_DIR = SOFTWARE_DIR / "lib"
+MAIN_PATH = SOFTWARE_DIR / "main.py"
+
+# pins of the sequencer, see the wiring notes in Software/main.py
+CLOCK_INPUT_PIN = 22
+DIGITAL_INPUT_PIN = 21
+DIGITAL_OUTPUT_PIN = 23
+ROTARY_CLK_PIN = 18
+ROTARY_DT_PIN = 19
+ROTARY_BUTTON_PIN = 20
+I2C_BUS = 0
+
+FAKE_MODULES = {"machine": machine, "micropython": micropython, "framebuf": framebuf, "time": fake_time, "gc": gc, "select": select}
+
+# (clk, dt) levels an encoder passes through for one detent, ending back at rest (1, 1)
+_ENCODER_CLOCKWISE = ((1, 0), (0, 0), (0, 1), (1, 1))
+_ENCODER_COUNTER_CLOCKWISE = ((0, 1), (0, 0), (1, 0), (1, 1))
+
+
+class _SerialWriter(io.TextIOBase):
+    """Captures the firmware's print() output as timestamped lines."""
+
+    def __init__(self, board: Board, echo) -> None:
+        self.board = board
+        self.echo = echo
+        self._line = ""
+
+    def write(self, text: str) -> int:
+        if self.echo is not None:
+            self.echo.write(text)
+        self._line += text
+        while "\n" in self._line:
+            line, self._line = self._line.split("\n", 1)
+            self.board.recorder.serial.append(SerialLine(self.board.clock.now_us, line))
+        return len(text)
+
+
+class _SerialReader(io.TextIOBase):
+    """The firmware's sys.stdin: characters sent by the host wait here until read."""
+
+    def __init__(self) -> None:
+        self._pending = ""
+
+    def send(self, text: str) -> None:
+        self._pending += text
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self._pending)
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> str:
+        if size is None or size < 0:
+            size = len(self._pending)
+        text, self._pending = self._pending[:size], self._pending[size:]
+        return text
+
+
+class Simulator:
+    """A Pi Pico with the sequencer's OLED, DAC, encoder and jacks attached.
+
+    Schedule stimuli (clock pulses, encoder turns, button presses, CVs) on the virtual
+    clock, then run() the firmware. Everything it outputs lands in .recorder.
+
+    Example:
+        sim = Simulator()
+        sim.clock_pulses(period_us=125_000, width_us=5_000)
+        sim.run(seconds=10)
+        print(sim.recorder.dac_writes)
+    """
+
+    def __init__(
+        self,
+        *,
+        seed: int | None = 0,
+        hal_call_us: int | None = None,
+        flash_dir: str | None = None,
+        echo_serial: bool = False,
+        trace_memory: bool = False,
+    ) -> None:
+        self.clock = VirtualClock()
+        self.recorder = Recorder()
+        self.board = Board(self.clock, self.recorder, **({} if hal_call_us is None else {"hal_call_us": hal_call_us}))
+        self.dac = MCP4725Model(self.board)
+        self.display = SSD1306Model(self.board)
+        self.board.attach_i2c(I2C_BUS, MCP4725_ADDRESS, self.dac)
+        self.board.attach_i2c(I2C_BUS, SSD1306_ADDRESS, self.display)
+        # the encoder and its switch rest high through the pull-ups,
+        # unpatched input jacks leave their inverting transistors off so the pins read high
+        for pin in (ROTARY_CLK_PIN, ROTARY_DT_PIN, ROTARY_BUTTON_PIN, CLOCK_INPUT_PIN, DIGITAL_INPUT_PIN):
+            self.board.drive(pin, 1)
+        self.seed = seed
+        self.flash_dir = flash_dir
+        self.echo_serial = echo_serial
+        self.trace_memory = trace_memory
+        self.serial_in = _SerialReader()
+        self.main = types.ModuleType("__main__")
+        """Globals of main.py, populated while the firmware runs."""
+
+    @property
+    def now_us(self) -> int:
+        return self.clock.now_us
+
+    # stimuli
+
+    def at(self, time_us: int, callback) -> None:
+        """Runs callback() at a virtual time, e.g. to change a firmware variable mid-run."""
+        self.clock.at(time_us, callback)
+
+    def jack(self, pin: int, high: bool, at_us: int) -> None:
+        """Sets an input jack at a virtual time. Input jacks reach the Pico through an inverting transistor."""
+        self.clock.at(at_us, lambda: self.board.drive(pin, 0 if high else 1))
+
+    def clock_pulses(self, period_us: int, width_us: int = 5_000, count: int | None = None, start_us: int = 0, until_us: int | None = None, pin: int = CLOCK_INPUT_PIN) -> list[int]:
+        """Schedules a pulse train on the clock input jack until count pulses or until_us, returns the rising edge times."""
+        if count is None and until_us is None:
+            raise ValueError("give count or until_us")
+        rising_edges = []
+        time_us, pulse = start_us, 0
+        while (count is None or pulse < count) and (until_us is None or time_us < until_us):
+            self.jack(pin, True, time_us)
+            self.jack(pin, False, time_us + width_us)
+            rising_edges.append(time_us)
+            time_us += period_us
+            pulse += 1
+        return rising_edges
+
+    def turn_encoder(self, detents: int, at_us: int, step_us: int = 25_000) -> int:
+        """Turns the encoder (positive is clockwise), returns the time the last detent settles.
+
+        The rotary handlers are soft interrupts that read the pins when they finally run, so
+        transitions closer together than a display redraw (about 24 ms) get lost, as on the Pico.
+        """
+        sequence = _ENCODER_CLOCKWISE if detents > 0 else _ENCODER_COUNTER_CLOCKWISE
+        time_us = at_us
+        for _ in range(abs(detents)):
+            for clk, dt in sequence:
+                self.clock.at(time_us, lambda clk=clk: self.board.drive(ROTARY_CLK_PIN, clk))
+                self.clock.at(time_us, lambda dt=dt: self.board.drive(ROTARY_DT_PIN, dt))
+                time_us += step_us
+        return time_us
+
+    def press_button(self, at_us: int, hold_us: int = 150_000) -> int:
+        """Presses the encoder switch, long enough to pass the 50 ms debounce. Returns the release time."""
+        self.clock.at(at_us, lambda: self.board.drive(ROTARY_BUTTON_PIN, 0))
+        self.clock.at(at_us + hold_us, lambda: self.board.drive(ROTARY_BUTTON_PIN, 1))
+        return at_us + hold_us
+
+    def serial_input(self, text: str, at_us: int) -> None:
+        """Sends text to the firmware over USB serial at a virtual time."""
+        self.clock.at(at_us, lambda: self.serial_in.send(text))
+
+    def set_adc(self, pin: int, volts) -> None:
+        """Sets an ADC pin (26 - 29) to volts at the pin (0 - 3.3), or to a function of time in microseconds."""
+        self.board.set_adc(pin, volts)
+
+    # running
+
+    def run(self, seconds: float | None = None, until_us: int | None = None, main_path: Path = MAIN_PATH) -> "Simulator":
+        """Runs main.py until the virtual clock reaches the end time."""
+        if until_us is None:
+            if seconds is None:
+                raise ValueError("give seconds or until_us")
+            until_us = self.clock.now_us + int(seconds * 1_000_000)
+        self.clock.end_us = until_us
+        code = compile(Path(main_path).read_text(), str(main_path), "exec")
+        self.main.__file__ = str(main_path)
+        with self.installed():
+            try:
+                exec(code, self.main.__dict__)
+            except SimulationEnd:
+                pass
+        return self
+
+    @contextlib.contextmanager
+    def installed(self):
+        """Binds the fake MicroPython modules to this board and imports the firmware from Software/lib."""
+        saved_modules = {name: sys.modules.get(name) for name in FAKE_MODULES}
+        saved_path = list(sys.path)
+        saved_const = getattr(builtins, "const", None)
+        saved_board = board_module.current
+        saved_cwd = os.getcwd()
+        saved_stdin = sys.stdin
+        saved_random_state = random.getstate()
+        flash = None
+        if self.flash_dir is None:
+            flash = tempfile.TemporaryDirectory(prefix="pico-flash-")
+            self.flash_dir = flash.name
+        _forget_firmware_modules()
+        sys.modules.update(FAKE_MODULES)
+        sys.path.insert(0, str(LIB_DIR))
+        builtins.const = micropython.const  # MicroPython compiles const() even without an import
+        board_module.current = self.board
+        os.chdir(self.flash_dir)
+        sys.stdin = self.serial_in
+        if self.seed is not None:
+            random.seed(self.seed)
+        gc._reset(str(SOFTWARE_DIR) if self.trace_memory else None)
+        if self.trace_memory:
+            tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(_SerialWriter(self.board, sys.__stdout__ if self.echo_serial else None)):
+                yield self
+        finally:
+            if self.trace_memory:
+                tracemalloc.stop()
+            sys.stdin = saved_stdin
+            os.chdir(saved_cwd)
+            random.setstate(saved_random_state)
+            board_module.current = saved_board
+            if saved_const is None:
+                del builtins.const
+            else:
+                builtins.const = saved_const
+            sys.path[:] = saved_path
+            _forget_firmware_modules()
+            for name, module in saved_modules.items():
+                if module is None:
+                    sys.modules.pop(name, None)
+                else:
+                    sys.modules[name] = module
+            if flash is not None:
+                flash.cleanup()
+                self.flash_dir = None
+
+
+def _forget_firmware_modules() -> None:
+    """Drops modules imported from Software/ so the next run constructs its hardware again."""
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path and Path(path).resolve().is_relative_to(SOFTWARE_DIR):
+            del sys.modules[name]
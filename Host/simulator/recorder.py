@@ -0,0 +1,73 @@
+"""Timestamped log of everything the firmware drives: DAC writes, pin edges, display frames, serial output and GC runs."""
+
+from typing import NamedTuple
+
+
+class DacWrite(NamedTuple):
+    t_us: int
+    value: int
+
+
+class PinEdge(NamedTuple):
+    t_us: int
+    pin: int
+    level: int
+
+
+class RenderCost(NamedTuple):
+    """framebuf drawing that went into a frame, us is the estimate of fakes/framebuf.py"""
+
+    calls: int
+    pixels: int
+    us: int
+
+
+class Frame(NamedTuple):
+    t_us: int
+    data: bytes  # SSD1306 GDDRAM contents, one byte per 8 px column of a page
+    texts: tuple  # (string, x, y, colour) of every FrameBuffer.text() call since the last fill()
+    render: RenderCost = RenderCost(0, 0, 0)  # drawing since the previous data write
+
+
+class SerialLine(NamedTuple):
+    t_us: int
+    text: str
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.dac_writes: list[DacWrite] = []
+        self.pin_edges: list[PinEdge] = []
+        self.frames: list[Frame] = []
+        self.serial: list[SerialLine] = []
+        self.collections: list[int] = []  # start times of gc.collect() calls
+
+    def edges(self, pin: int) -> list[PinEdge]:
+        return [edge for edge in self.pin_edges if edge.pin == pin]
+
+    def gate_on_times(self, pin: int, inverted: bool = True) -> list[int]:
+        """Times when an output jack went high. Output jacks are driven through an inverting transistor."""
+        on_level = 0 if inverted else 1
+        return [edge.t_us for edge in self.edges(pin) if edge.level == on_level]
+
+    def gate_intervals(self, pin: int, inverted: bool = True) -> list[tuple[int, int]]:
+        """(on, off) times of every complete gate on an output jack."""
+        on_level = 0 if inverted else 1
+        intervals, on_us = [], None
+        for edge in self.edges(pin):
+            if edge.level == on_level:
+                if on_us is None:
+                    on_us = edge.t_us
+            elif on_us is not None:
+                intervals.append((on_us, edge.t_us))
+                on_us = None
+        return intervals
+
+    def summary(self) -> dict:
+        return {
+            "dac_writes": len(self.dac_writes),
+            "pin_edges": len(self.pin_edges),
+            "frames": len(self.frames),
+            "serial_lines": len(self.serial),
+            "collections": len(self.collections),
+        }
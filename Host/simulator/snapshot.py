@@ -0,0 +1,53 @@
+"""Display frames as images: PBM for golden image tests, PNG to look at."""
+
+import struct
+import zlib
+
+WIDTH = 128
+HEIGHT = 64
+
+
+def pixels(data: bytes, width: int = WIDTH, height: int = HEIGHT) -> list[list[int]]:
+    """Rows of 1/0 from SSD1306 RAM (one byte per 8 px column of a page, bit 0 on top)"""
+    return [[(data[(y >> 3) * width + x] >> (y & 7)) & 1 for x in range(width)] for y in range(height)]
+
+
+def to_pbm(data: bytes, width: int = WIDTH, height: int = HEIGHT) -> bytes:
+    """Binary PBM (P4), lit pixels are black"""
+    rows = []
+    for row in pixels(data, width, height):
+        packed = bytearray((width + 7) // 8)
+        for x, lit in enumerate(row):
+            if lit:
+                packed[x >> 3] |= 0x80 >> (x & 7)
+        rows.append(bytes(packed))
+    return b"P4\n%d %d\n" % (width, height) + b"".join(rows)
+
+
+def from_pbm(pbm: bytes) -> tuple[int, int, bytes]:
+    """(width, height, SSD1306 RAM) of a P4 file written by to_pbm()"""
+    magic, size, body = pbm.split(b"\n", 2)
+    if magic != b"P4":
+        raise ValueError("not a binary PBM")
+    width, height = (int(value) for value in size.split())
+    row_bytes = (width + 7) // 8
+    data = bytearray(width * ((height + 7) // 8))
+    for y in range(height):
+        for x in range(width):
+            if body[y * row_bytes + (x >> 3)] & (0x80 >> (x & 7)):
+                data[(y >> 3) * width + x] |= 1 << (y & 7)
+    return width, height, bytes(data)
+
+
+def to_png(data: bytes, width: int = WIDTH, height: int = HEIGHT, scale: int = 4) -> bytes:
+    """Greyscale PNG that looks like the OLED: lit pixels white on black, scaled up"""
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    raw = bytearray()
+    for row in pixels(data, width, height):
+        line = b"\x00" + bytes(0xFF if lit else 0x00 for lit in row for _ in range(scale))
+        raw += line * scale
+    header = struct.pack(">IIBBBBB", width * scale, height * scale, 8, 0, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(bytes(raw))) + chunk(b"IEND", b"")
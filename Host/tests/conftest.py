@@ -0,0 +1,9 @@
+import os
+import sys
+
+# the simulator package lives in Host/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def pytest_addoption(parser):
+    parser.addoption("--update-golden", action="store_true", help="rewrite the golden display images in tests/golden from this run")
@@ -0,0 +1,49 @@
+"""The benchmark suite measures every hot path and its compare mode flags regressions."""
+
+import copy
+import importlib.util
+import os
+
+import pytest
+
+SUITE_PATH = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "bench_suite.py")
+
+
+@pytest.fixture(scope="module")
+def bench_suite():
+    spec = importlib.util.spec_from_file_location("bench_suite", SUITE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def results(bench_suite) -> dict:
+    return bench_suite.run(repeats=1, scale=0.05)
+
+
+def test_every_benchmark_has_its_metrics(results):
+    benchmarks = results["benchmarks"]
+    assert len(benchmarks) == 13
+    for result in benchmarks.values():
+        assert result["calls"] >= 1
+        assert set(result) == {"calls", "us", "virtual_us", "i2c_bytes", "render_us"}
+
+
+def test_bus_traffic_is_counted(results):
+    benchmarks = results["benchmarks"]
+    assert benchmarks["SSD1306.show"]["i2c_bytes"] == 1037  # 6 two byte commands, the data control byte and a 128x64 frame
+    assert benchmarks["MCP4725.write"]["i2c_bytes"] == 2  # fast mode write
+    assert benchmarks["main.step advance (50% CV and trig probability)"]["i2c_bytes"] == 2  # one DAC write per step
+    assert benchmarks["scales.fill_12_bit_values chromatic 5 oct"]["i2c_bytes"] == 0
+    assert benchmarks["menu redraw MainMenu"]["render_us"] > benchmarks["SSD1306.show"]["render_us"] == 0
+
+
+def test_compare_flags_only_regressions_past_the_threshold(bench_suite, results, capsys):
+    assert bench_suite.compare(results, results, threshold=10) == []
+    slower = copy.deepcopy(results)
+    slower["benchmarks"]["SSD1306.show"]["virtual_us"] *= 1.2
+    slower["benchmarks"]["MCP4725.write"]["virtual_us"] *= 1.05
+    slower["benchmarks"]["AnalogueReader.percent"]["us"] *= 1.2  # host noise below the host threshold
+    assert bench_suite.compare(results, slower, threshold=10, host_threshold=25) == ["SSD1306.show virtual_us"]
+    assert "REGRESSION" in capsys.readouterr().out
@@ -0,0 +1,31 @@
+"""The sequencer outputs its first note and follows the clock before the user interface is set up."""
+
+from simulator import Simulator
+
+PERIOD_US = 12_000
+LONGEST_BOOT_STAGE_US = 30_000  # setting up the display, its init sequence and a full flush
+
+
+def test_first_note_before_the_display():
+    sim = Simulator()
+    sim.run(until_us=1_000_000)
+    recorder = sim.recorder
+
+    assert recorder.dac_writes[0].t_us <= sim.main.first_dac_write_us
+    assert recorder.dac_writes[0].t_us < recorder.frames[0].t_us
+    assert 0 < sim.main.first_dac_write_us < sim.main.ui_ready_us
+    assert sim.main.ui_boot is None
+    assert all(len(line) <= 16 for line in sim.main.boot_report_lines())
+
+
+def test_clock_is_followed_while_the_user_interface_boots():
+    sim = Simulator()
+    edges = sim.clock_pulses(PERIOD_US, 2_000, start_us=0, until_us=1_000_000)
+    sim.run(until_us=1_000_000)
+    boot_edges = [edge for edge in edges if sim.main.first_dac_write_us < edge < sim.main.ui_ready_us]
+    steps = [write.t_us for write in sim.recorder.dac_writes]
+
+    assert len(boot_edges) >= 3
+    for edge in boot_edges:
+        # a pulse that falls entirely into a boot stage is latched and played when the stage ends
+        assert any(edge <= step < edge + LONGEST_BOOT_STAGE_US for step in steps), edge
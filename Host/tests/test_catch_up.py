@@ -0,0 +1,87 @@
+"""Clock edges are counted by an IRQ: steps wrap inside the edge handler and edges the main loop missed are caught up."""
+
+import pytest
+
+from simulator import Simulator
+
+START_US = 500_000
+PERIOD_US = 20_000
+WIDTH_US = 2_000
+
+
+def log_steps(sim: Simulator) -> list[tuple[int, int]]:
+    """(t_us, step) of every step output from the start"""
+    steps = []
+
+    def wrap() -> None:
+        main = sim.main
+        output_step = main.output_step
+
+        def logged() -> None:
+            steps.append((sim.now_us, main.current_step))
+            output_step()
+
+        main.output_step = logged
+
+    sim.at(START_US - 1, wrap)
+    return steps
+
+
+def stall(sim: Simulator, at_us: int, length_us: int) -> None:
+    """Blocks the main loop, like a display flush or a boot stage"""
+    sim.at(at_us, lambda: sim.clock.advance(length_us))
+
+
+def test_every_edge_plays_a_step_across_the_wrap():
+    sim = Simulator(seed=0)
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, count=40, start_us=START_US)
+    steps = log_steps(sim)
+    sim.run(until_us=edges[-1] + PERIOD_US)
+
+    assert [step for _, step in steps] == [edge % 16 for edge in range(40)]
+    # no main loop pass is spent on the wrap: step 0 comes right on its edge
+    for (step_us, step), edge_us in zip(steps, edges):
+        assert 0 <= step_us - edge_us < 500, step
+
+
+@pytest.mark.parametrize(
+    "policy, played",
+    [("Latest", [10, 13, 14, 15, 0]), ("All", [10, 11, 12, 13, 14, 15, 0])],
+)
+def test_edges_inside_a_stall_are_caught_up(policy, played):
+    sim = Simulator(seed=0)
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, count=17, start_us=START_US)
+
+    def select() -> None:
+        main = sim.main
+        main.catch_up_menu.set_selected(main.CATCH_UP_NAMES.index(policy))
+        main.update_sequencer_values()
+
+    sim.at(START_US - 50_000, select)
+    stall(sim, edges[10] + 5_000, 3 * PERIOD_US)  # the pulses of edges 11 to 13 fall into it
+    steps = log_steps(sim)
+    sim.run(until_us=edges[-1] + PERIOD_US)
+
+    assert [step for step_us, step in steps if step_us > edges[9] + PERIOD_US // 2] == played
+    assert sim.main.caught_up_clock_edges == 2
+    # the sequence stays on the beat: the edge after the stall plays its own step
+    assert next(step for step_us, step in steps if step_us > edges[14]) == 14
+
+
+def test_lowering_the_steps_never_plays_past_the_new_length():
+    sim = Simulator(seed=0)
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, count=30, start_us=START_US)
+
+    def shorten() -> None:
+        main = sim.main
+        main.steps_menu.set_selected(5)
+        main.update_sequencer_values()
+
+    sim.at(edges[12] + PERIOD_US // 2, shorten)  # the next step was 13
+    steps = log_steps(sim)
+    sim.run(until_us=edges[-1] + PERIOD_US)
+
+    after = [step for step_us, step in steps if step_us > edges[12] + PERIOD_US // 2]
+    assert after[:6] == [3, 4, 0, 1, 2, 3]
+    assert max(after) < 5
+    assert len(steps) == len(edges)
@@ -0,0 +1,139 @@
+"""Clock multiplication and division, and ratchets, timed by the microsecond event scheduler."""
+
+import bisect
+
+import pytest
+
+from simulator import DIGITAL_OUTPUT_PIN, Simulator
+
+START_US = 500_000
+WIDTH_US = 5_000
+LOCKED_EDGES = 3  # the tempo tracker has a period to divide after the first edges
+
+
+def set_clock_ratio(sim: Simulator, name: str, at_us: int = START_US - 50_000) -> None:
+    def select() -> None:
+        main = sim.main
+        main.clock_ratio_menu.set_selected(main.CLOCK_RATIO_NAMES.index(name))
+        main.update_sequencer_values()
+
+    sim.at(at_us, select)
+
+
+def step_times(sim: Simulator, after_us: int) -> list[int]:
+    return [write.t_us for write in sim.recorder.dac_writes if write.t_us >= after_us]
+
+
+@pytest.mark.parametrize("period_us", [120_000, 40_000])
+def test_multiplied_steps_are_placed_from_the_measured_period(period_us):
+    sim = Simulator(seed=0)
+    edges = sim.clock_pulses(period_us, WIDTH_US, count=40, start_us=START_US)
+    set_clock_ratio(sim, "x8")
+    sim.run(until_us=edges[-1] + period_us)
+
+    steps = step_times(sim, edges[LOCKED_EDGES])
+    assert len(steps) == 8 * (len(edges) - LOCKED_EDGES)
+    errors = []
+    for edge_us in edges[LOCKED_EDGES:-1]:
+        for step in range(8):
+            ideal_us = edge_us + step * period_us // 8
+            errors.append(steps[bisect.bisect_left(steps, ideal_us - period_us // 16)] - ideal_us)
+    # the steps in between are timed from the clock IRQ's timestamp of the edge
+    assert 0 <= min(errors) and max(errors) < 500
+    scheduler = sim.main.scheduler
+    assert scheduler.max_late_us < 200
+    assert scheduler.dropped == 0
+
+
+def test_a_divided_clock_steps_on_every_nth_edge_with_longer_gates():
+    period_us = 50_000
+    sim = Simulator(seed=0)
+    edges = sim.clock_pulses(period_us, WIDTH_US, count=31, start_us=START_US)
+    set_clock_ratio(sim, "/3")
+    sim.run(until_us=edges[-1] + 3 * period_us)
+
+    steps = step_times(sim, START_US)
+    assert len(steps) == 11
+    assert all(steps[index] - edges[3 * index] < 500 for index in range(len(steps)))
+    # TrgLngth 50 % of 3 periods
+    widths = [off_us - on_us for on_us, off_us in sim.recorder.gate_intervals(DIGITAL_OUTPUT_PIN)[LOCKED_EDGES:]]
+    assert all(abs(width_us - 75_000) <= 1_500 for width_us in widths)
+
+
+def test_ratchets_split_a_step_into_evenly_spaced_gates():
+    period_us = 120_000
+    sim = Simulator(seed=0)
+    edges = sim.clock_pulses(period_us, WIDTH_US, count=10, start_us=START_US)
+
+    def ratchet_every_step() -> None:
+        main = sim.main
+        main.ratchet_sequence[:] = bytearray([4] * main.MAX_NUMBER_OF_STEPS)
+        main.trigger_sequence[:] = [1] * main.MAX_NUMBER_OF_STEPS
+
+    sim.at(START_US - 50_000, ratchet_every_step)
+    sim.run(until_us=edges[-1] + period_us)
+
+    gates = [gate for gate in sim.recorder.gate_intervals(DIGITAL_OUTPUT_PIN) if gate[0] >= edges[LOCKED_EDGES]]
+    assert len(gates) == 4 * (len(edges) - LOCKED_EDGES)
+    for on_us, off_us in gates:
+        assert abs(off_us - on_us - 15_000) < 300  # 50 % of a quarter period
+    for edge_us in edges[LOCKED_EDGES:]:
+        starts = [on_us for on_us, _ in gates if edge_us <= on_us < edge_us + period_us]
+        assert all(abs(later - earlier - 30_000) < 300 for earlier, later in zip(starts, starts[1:]))
+
+
+def test_ratchet_mutation_draws_nothing_at_zero_probability():
+    runs = []
+    for ratchet_probability in (0, 100):
+        sim = Simulator(seed=3)
+        sim.clock_pulses(100_000, WIDTH_US, count=20, start_us=START_US)
+        sim.at(START_US - 50_000, lambda: setattr(sim.main, "cv_probability_of_change", 50))
+        sim.at(START_US - 50_000, lambda probability=ratchet_probability: setattr(sim.main, "ratchet_probability_of_change", probability))
+        sim.run(until_us=START_US + 2_000_000)
+        runs.append(sim.main)
+    without, with_ratchets = runs
+    assert list(without.ratchet_sequence) == [1] * without.MAX_NUMBER_OF_STEPS
+    assert len(set(with_ratchets.ratchet_sequence)) > 2
+    assert without.cv_sequence != with_ratchets.cv_sequence  # the ratchets took random numbers
+
+
+def test_clock_ratio_and_ratchets_are_saved_in_the_preset(tmp_path):
+    with Simulator(flash_dir=str(tmp_path)).installed():
+        from preset_store import PresetStore
+
+        store = PresetStore(check_interval_ms=0)
+        ratchets = bytearray(step % 8 + 1 for step in range(16))
+        assert store.save_if_changed(100_000, "major", 0, 1, 16, 0, 0, 50, [100] * 16, [1] * 16, -3, 25, ratchets)
+        loaded = PresetStore()
+        assert loaded.load()
+        assert (loaded.clock_ratio(), loaded.parameter(7)) == (-3, 25)
+        cv_sequence, trigger_sequence, loaded_ratchets = [0] * 16, [0] * 16, bytearray(16)
+        loaded.read_steps(cv_sequence, trigger_sequence, loaded_ratchets)
+        assert (cv_sequence, trigger_sequence, loaded_ratchets) == ([100] * 16, [1] * 16, ratchets)
+
+        # records saved before the clock ratio existed have zeros there
+        assert store.save_if_changed(100_000, "major", 0, 1, 16, 0, 0, 50, [200] * 16, [1] * 16)
+        loaded = PresetStore()
+        assert loaded.load()
+        assert loaded.clock_ratio() == 1
+
+
+def test_events_run_in_deadline_order():
+    sim = Simulator(seed=0)
+    fired = []
+
+    def schedule_shuffled() -> None:
+        from scheduler import EventScheduler
+
+        scheduler = EventScheduler(lambda event, argument, late_us: fired.append((event, late_us)), capacity=8)
+        now_us = sim.now_us
+        for event in (5, 1, 7, 3, 2, 8, 4, 6, 9):
+            scheduler.schedule(now_us + event * 1_000, event)
+        assert scheduler.dropped == 1
+        scheduler.cancel(4)
+
+    sim.at(1_000_000, schedule_shuffled)  # after boot, its stages block the loop
+    sim.run(until_us=1_100_000)
+
+    assert [event for event, _ in fired] == [1, 2, 3, 5, 6, 7, 8]
+    assert all(late_us < 200 for _, late_us in fired)
@@ -0,0 +1,67 @@
+"""The Bench screen times the hardware paths while the clock is stopped and leaves the sequencer as it was."""
+
+from simulator import CLOCK_INPUT_PIN, Simulator
+
+OPEN_US = 3_800_000
+END_US = 7_000_000
+
+
+def open_bench_screen(sim: Simulator) -> int:
+    """Scrolls to the Bench screen, the last entry of the main menu, and opens it. Returns the press time."""
+    settled_us = sim.turn_encoder(32, at_us=300_000)  # the menu stops at its last entry
+    assert settled_us < OPEN_US
+    sim.press_button(OPEN_US)
+    return OPEN_US
+
+
+def results(sim: Simulator) -> dict[str, int]:
+    lines = [line.text for line in sim.recorder.serial]
+    start = len(lines) - 1 - lines[::-1].index("benchmark,value,unit")
+    return {name: int(value) for name, value, _ in (line.split(",") for line in lines[start + 1 : start + 7])}
+
+
+def test_the_benchmarks_run_and_the_sequencer_is_put_back():
+    sim = Simulator(seed=1)
+    sim.at(100_000, lambda: setattr(sim.main, "cv_probability_of_change", 50))
+    before = {}
+
+    def snapshot() -> None:
+        main = sim.main
+        before.update(cv=list(main.cv_sequence), trig=list(main.trigger_sequence), step=main.current_step, rng=(main.rng.high, main.rng.low))
+
+    sim.at(open_bench_screen(sim) - 1, snapshot)
+    sim.run(until_us=END_US)
+
+    measured = results(sim)
+    assert set(measured) == {"dac_writes", "full_flushes", "partial_flushes", "adc_samples", "main_loop", "step_advance"}
+    assert all(value > 0 for value in measured.values())
+    assert measured["partial_flushes"] > 3 * measured["full_flushes"]  # 2 of the 8 pages
+    assert "DAC:" in sim.recorder.frames[-1].texts[1][0]
+
+    main = sim.main
+    assert list(main.cv_sequence) == before["cv"]  # the steps played at 50% CVProb were undone
+    assert list(main.trigger_sequence) == before["trig"]
+    assert main.current_step == before["step"]
+    assert (main.rng.high, main.rng.low) == before["rng"]
+    assert not main.trigger_active
+    assert sim.recorder.dac_writes[-1].value == before["cv"][0]
+
+
+def test_a_running_clock_skips_the_benchmarks():
+    sim = Simulator(seed=1)
+    sim.clock_pulses(period_us=125_000, start_us=200_000, until_us=END_US)
+    open_bench_screen(sim)
+    sim.run(until_us=END_US)
+    assert "benchmark,value,unit" not in [line.text for line in sim.recorder.serial]
+    assert any(text[0] == "Clock running" for frame in sim.recorder.frames for text in frame.texts)
+
+
+def test_a_clock_edge_stops_the_run():
+    sim = Simulator(seed=1)
+    sim.jack(CLOCK_INPUT_PIN, True, OPEN_US + 400_000)  # during the display flushes
+    sim.jack(CLOCK_INPUT_PIN, False, OPEN_US + 405_000)
+    open_bench_screen(sim)
+    sim.run(until_us=END_US)
+    measured = results(sim)
+    assert measured["dac_writes"] > 0
+    assert measured["step_advance"] == -1
@@ -0,0 +1,72 @@
+"""Fixed memory mode only collects garbage between steps, and the self-test catches collections in the edge handler."""
+
+from simulator import DIGITAL_OUTPUT_PIN, Simulator
+from simulator.fakes import gc
+
+WIDTH_US = 5_000
+ENABLE_US = 400_000
+START_US = 500_000
+END_US = 4_000_000
+
+
+def toggle(sim: Simulator, menu_name: str) -> None:
+    menu = getattr(sim.main, menu_name)
+    menu.value = True
+    sim.main.update_sequencer_values()
+
+
+def run_fixed_memory(period_us: int) -> Simulator:
+    sim = Simulator()
+    sim.clock_pulses(period_us, WIDTH_US, start_us=START_US, until_us=END_US)
+    sim.at(ENABLE_US, lambda: toggle(sim, "fixed_memory_toggle_menu"))
+    sim.run(until_us=END_US)
+    return sim
+
+
+def test_collections_only_run_between_steps():
+    period_us = 125_000  # 120 BPM 16ths
+    sim = run_fixed_memory(period_us)
+    assert not gc.isenabled()
+    collections = [t for t in sim.recorder.collections if t > START_US]
+    steps = (END_US - START_US) // period_us
+    assert len(collections) >= steps - 2
+
+    edges = range(START_US, END_US, period_us)
+    busy = [(edge, edge + WIDTH_US) for edge in edges] + sim.recorder.gate_intervals(DIGITAL_OUTPUT_PIN)
+    for start in collections:
+        end = start + gc.COLLECT_US
+        assert not any(start < busy_end and busy_start < end for busy_start, busy_end in busy), start
+        # and never so late that the pause runs into the next clock edge
+        assert (start - START_US) % period_us + gc.COLLECT_US < period_us - 1_000
+
+
+def test_no_collection_when_the_idle_window_is_shorter_than_the_budget():
+    sim = run_fixed_memory(period_us=8_000)  # gate off to next edge leaves less than the 5 ms budget
+    collections = [t for t in sim.recorder.collections if t > START_US]
+    assert collections == []
+    assert sim.main.idle_collector.skipped > 0
+
+
+def test_self_test_logs_a_collection_inside_the_edge_handler():
+    sim = Simulator()
+    sim.clock_pulses(125_000, WIDTH_US, start_us=START_US, until_us=2_000_000)
+    sim.at(ENABLE_US, lambda: toggle(sim, "gc_self_test_toggle_menu"))
+
+    def collect_during_next_dac_write():
+        dac = sim.main.dac
+        write = dac.write
+
+        def collecting_write(value):
+            # like an allocation that finds the heap full
+            dac.write = write
+            gc.collect()
+            return write(value)
+
+        dac.write = collecting_write
+
+    sim.at(1_050_000, collect_during_next_dac_write)
+    sim.run(until_us=2_000_000)
+
+    warnings = [line for line in sim.recorder.serial if "GC inside edge handler" in line.text]
+    assert len(warnings) == 1
+    assert sim.main.idle_collector.edge_collections == 1
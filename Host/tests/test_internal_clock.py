@@ -0,0 +1,94 @@
+"""The internal clock plays steps from a machine.Timer, hands over to an external clock and can be sent out."""
+
+from scenarios.scenario import scroll_and_toggle
+from simulator import DIGITAL_OUTPUT_PIN, Simulator
+
+ON_US = 450_000  # after the user interface is up
+BPM = 150
+PERIOD_US = 100_000  # a 16th at 150 BPM
+
+
+def internal_clock(sim: Simulator, clock_out: bool = False) -> None:
+    def switch_on() -> None:
+        main = sim.main
+        main.bpm_menu.set_selected(BPM)
+        main.clock_out_toggle_menu.value = clock_out
+        main.internal_clock_toggle_menu.value = True
+        main.update_sequencer_values()
+
+    sim.at(ON_US, switch_on)
+
+
+def step_times(sim: Simulator, start_us: int = ON_US, end_us: int | None = None) -> list[int]:
+    return [write.t_us for write in sim.recorder.dac_writes if write.t_us > start_us and (end_us is None or write.t_us < end_us)]
+
+
+def jitter_us(steps: list[int]) -> int:
+    """Worst distance of a step from the ideal grid started by the first one"""
+    return max(abs(step_us - steps[0] - index * PERIOD_US) for index, step_us in enumerate(steps))
+
+
+def test_steps_follow_the_ideal_period_without_a_patched_clock():
+    sim = Simulator(seed=0)
+    internal_clock(sim)
+    sim.run(until_us=ON_US + 4_050_000)
+
+    steps = step_times(sim)
+    assert sim.main.internal_clock_running
+    assert len(steps) == 40
+    assert jitter_us(steps) < 300
+
+
+def test_menu_redraws_are_kept_away_from_the_internal_clock_steps():
+    sim = Simulator(seed=0)
+    internal_clock(sim)
+    scroll_and_toggle(sim, ON_US + 200_000, ON_US + 4_000_000)
+    sim.run(until_us=ON_US + 4_050_000)
+
+    assert len([frame for frame in sim.recorder.frames if frame.t_us > ON_US]) > 20
+    steps = step_times(sim)
+    assert len(steps) == 40
+    assert jitter_us(steps) < 300  # the redraws wait for room before the predicted step
+
+
+def test_an_external_clock_takes_over_and_the_internal_clock_comes_back():
+    sim = Simulator(seed=0)
+    internal_clock(sim)
+    external_start_us = ON_US + 1_030_000  # between two internal steps
+    edges = sim.clock_pulses(60_000, 5_000, count=20, start_us=external_start_us)
+    running = []
+    sim.at(edges[-1] + 50_000, lambda: running.append(sim.main.internal_clock_running))
+    sim.at(edges[-1] + 2_500_000, lambda: running.append(sim.main.internal_clock_running))
+    sim.run(until_us=edges[-1] + 3_000_000)
+
+    assert running == [False, True]
+    external = step_times(sim, external_start_us - 1, edges[-1] + 60_000)
+    assert len(external) == len(edges)
+    assert all(0 <= step_us - edge_us < 500 for step_us, edge_us in zip(external, edges))
+
+
+def test_clock_out_sends_the_internal_clock_instead_of_the_gates():
+    sim = Simulator(seed=0)
+    internal_clock(sim, clock_out=True)
+    sim.at(ON_US - 1, lambda: setattr(sim.main, "trigger_probability_of_change", 100))
+    sim.run(until_us=ON_US + 2_050_000)
+
+    pulses = [gate for gate in sim.recorder.gate_intervals(DIGITAL_OUTPUT_PIN) if gate[0] > ON_US]
+    assert len(pulses) == 19  # one per step after the first, the output is on from boot until it ends
+    assert all(abs(off_us - on_us - 5_000) < 200 for on_us, off_us in pulses)
+    assert jitter_us([on_us for on_us, _ in pulses]) < 300
+
+
+def test_the_latency_probe_measures_internal_clock_steps_from_their_tick():
+    sim = Simulator(seed=0)
+    sim.clock_pulses(60_000, 5_000, count=10, start_us=ON_US - 400_000)  # an external clock before, long stopped
+    internal_clock(sim)
+    sim.at(ON_US + 3_000_000, lambda: sim.main.set_latency_probe(True))
+    sim.run(until_us=ON_US + 5_050_000)
+
+    assert sim.main.internal_clock_running
+    probe = sim.main.latency_probe
+    assert probe.count >= 15
+    cv = probe.cv_stats()
+    assert 0 <= cv["min"] and cv["max"] < 1_000
+    assert sim.main.tempo.period_us == PERIOD_US
@@ -0,0 +1,45 @@
+"""Every clock response scenario stays within its latency, missed pulse and gate width budget."""
+
+import pytest
+
+from scenarios import SCENARIOS, Budget, run_scenario
+from scenarios.metrics import measure
+from simulator import DIGITAL_OUTPUT_PIN, DacWrite, Frame, PinEdge, Recorder
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=[scenario.name for scenario in SCENARIOS])
+def test_scenario_is_within_budget(scenario):
+    result = run_scenario(scenario)
+    assert result.measurement.pulses > 100
+    assert result.violations == []
+
+
+def test_the_menus_are_really_used():
+    # the menu scenarios only mean something if the display is redrawn while the clock runs
+    quiet = run_scenario(SCENARIOS[0])
+    busy = run_scenario(SCENARIOS[1])
+    assert busy.measurement.worst_gate_width_error_us > 10 * quiet.measurement.worst_gate_width_error_us
+
+
+def test_measure_finds_late_and_missed_steps_and_gate_errors():
+    recorder = Recorder()
+    recorder.dac_writes += [DacWrite(1_200, 0), DacWrite(21_000, 0)]  # the pulse at 10 ms got no step
+    recorder.pin_edges += [PinEdge(1_300, DIGITAL_OUTPUT_PIN, 0), PinEdge(3_300, DIGITAL_OUTPUT_PIN, 1)]
+    measurement = measure(recorder, [1_000, 10_000, 20_000], period_us=5_000, trigger_length_percent=50, end_us=30_000)
+    assert measurement.missed == 1
+    assert measurement.worst_latency_us == 1_000
+    assert measurement.worst_gate_width_error_us == 0
+    assert measurement.violations(Budget(500, 0, 1_000)) == ["latency 1000 us > 500 us", "missed 1 > 0 pulses"]
+
+
+def test_measure_keeps_caught_up_pulses_apart():
+    recorder = Recorder()
+    # the pulses at 10 and 20 ms came during a display flush: the one at 10 ms only moved the sequence on, the other one is late
+    recorder.frames.append(Frame(28_900, b"", ()))
+    recorder.dac_writes += [DacWrite(1_200, 0), DacWrite(29_000, 0), DacWrite(30_100, 0)]
+    measurement = measure(recorder, [1_000, 10_000, 20_000, 30_000], period_us=10_000, trigger_length_percent=50, end_us=40_000, caught_up=1)
+    assert measurement.missed == 0
+    assert measurement.worst_latency_us == 200
+    assert measurement.worst_caught_up_latency_us == 9_000
+    assert measurement.violations(Budget(500, 0, 1_000, max_caught_up=1, max_caught_up_latency_us=10_000)) == []
+    assert measurement.violations(Budget(500, 0, 1_000)) == ["caught up 1 > 0 pulses", "caught up latency 9000 us > 0 us"]
@@ -0,0 +1,76 @@
+"""The latency probe keeps the newest steps in a ring and computes its statistics over them."""
+
+import pytest
+
+from simulator import Simulator
+
+
+@pytest.fixture
+def latency():
+    with Simulator().installed():
+        import latency
+
+        yield latency
+
+
+def test_statistics_cover_only_the_newest_steps_after_a_wrap(latency):
+    probe = latency.LatencyProbe(size=100)
+    for step in range(250):
+        # the first 150 steps are overwritten: they are the only ones with a latency above 1000 us
+        cv_us = 5_000 + step if step < 150 else 100 + step % 100
+        probe.record(step * 10_000, cv_us, latency.NO_GATE if step % 2 else 200 + step % 100)
+
+    assert probe.count == 100
+    assert [probe.edge_us[i] for i in probe._ordered_indexes()] == [step * 10_000 for step in range(150, 250)]
+    cv = probe.cv_stats()
+    assert (cv["n"], cv["min"], cv["max"], cv["mean"]) == (100, 100, 199, 149)
+    assert cv["p99"] == 198  # index 99 * 99 // 100 of the sorted latencies
+    assert cv["jitter"] == 28  # standard deviation of 100 consecutive integers
+
+    gate = probe.gate_stats()  # steps without a gate are left out
+    assert (gate["n"], gate["min"], gate["max"]) == (50, 200, 298)
+
+
+def test_percentile_and_jitter_of_a_short_ring(latency):
+    probe = latency.LatencyProbe(size=8)
+    for cv_us in (300, 100, 200, 100, 10_000):
+        probe.record(0, cv_us)
+    cv = probe.cv_stats()
+    assert (cv["min"], cv["max"], cv["p99"]) == (100, 10_000, 300)
+    assert cv["jitter"] == 3_930  # population standard deviation
+    assert probe.gate_stats() is None
+
+
+def test_clear_starts_over(latency):
+    probe = latency.LatencyProbe(size=4)
+    for step in range(6):
+        probe.record(step, 500 + step, 600)
+    probe.clear()
+    assert probe.count == 0
+    assert probe.cv_stats() is None and probe.gate_stats() is None
+    assert probe.summary_lines() == ["Steps: 0", "CV: no data", "Gt: no data"]
+
+    probe.record(7, 123)
+    assert probe.cv_stats()["n"] == 1
+    assert [probe.edge_us[i] for i in probe._ordered_indexes()] == [7]
+    assert all(len(line) <= 16 for line in probe.summary_lines())
+
+
+@pytest.mark.parametrize("ratio", ["x1", "x4"])
+def test_steps_between_edges_are_measured_from_their_deadline(ratio):
+    sim = Simulator(seed=0)
+
+    def start() -> None:
+        main = sim.main
+        main.clock_ratio_menu.set_selected(main.CLOCK_RATIO_NAMES.index(ratio))
+        main.update_sequencer_values()
+        main.set_latency_probe(True)
+
+    sim.at(450_000, start)
+    edges = sim.clock_pulses(100_000, 5_000, count=20, start_us=500_000)
+    sim.run(until_us=edges[-1] + 100_000)
+
+    probe = sim.main.latency_probe
+    assert probe.count >= 16 * int(ratio[1:])
+    cv = probe.cv_stats()
+    assert 0 <= cv["min"] and cv["max"] < 1_000
@@ -0,0 +1,66 @@
+"""Log messages are buffered and only reach USB serial between steps."""
+
+from simulator import DIGITAL_OUTPUT_PIN, Simulator
+
+PERIOD_US = 125_000  # 120 BPM 16ths
+WIDTH_US = 5_000
+
+
+def change_cv_probability(sim: Simulator, value: int) -> None:
+    sim.main.cv_prob_menu.selected = value
+    sim.main.update_sequencer_values()
+
+
+def test_messages_are_flushed_between_steps():
+    sim = Simulator()
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, start_us=500_000, until_us=4_000_000)
+    for i in range(10):
+        # between the gate turning off and the next clock edge
+        sim.at(1_080_000 + i * 2 * PERIOD_US, lambda i=i: change_cv_probability(sim, 10 + i))
+    sim.run(until_us=4_000_000)
+
+    lines = [line for line in sim.recorder.serial if "CV probability changed:" in line.text]
+    assert [line.text.split()[-1] for line in lines] == [str(10 + i) for i in range(10)]
+    gates = sim.recorder.gate_intervals(DIGITAL_OUTPUT_PIN)
+    busy = [(edge, edge + WIDTH_US) for edge in edges] + gates
+    for line in lines:
+        assert not any(start <= line.t_us < end for start, end in busy), line
+
+
+def test_serial_commands_set_level_and_flush():
+    sim = Simulator()
+    sim.serial_input("w", at_us=500_000)
+    sim.at(1_000_000, lambda: change_cv_probability(sim, 40))
+    sim.serial_input("d", at_us=1_500_000)
+    sim.at(2_000_000, lambda: change_cv_probability(sim, 60))
+    sim.run(until_us=2_500_000)
+
+    texts = [line.text for line in sim.recorder.serial]
+    assert "log level: 30" in texts
+    assert not any(text.endswith("CV probability changed: 40") for text in texts)
+    assert any(" D update_sequencer_values" in text for text in texts)
+    assert any(text.endswith("I CV probability changed: 60") for text in texts)
+
+
+def test_disabled_levels_are_not_buffered_and_overflow_is_counted():
+    sim = Simulator()
+    with sim.installed():
+        import logger
+
+        logger.set_level(logger.WARNING)
+        logger.info("ignored", 1)
+        logger.debug("ignored")
+        assert logger.pending() == 0
+
+        for i in range(logger.BUFFER_SIZE + 3):
+            logger.error("overflow", i)
+        assert logger.pending() == logger.BUFFER_SIZE
+        assert logger.dropped == 3
+        logger.flush()
+        assert logger.pending() == 0
+
+    texts = [line.text for line in sim.recorder.serial]
+    assert texts[0].endswith("W log: 3 dropped")
+    assert texts[1].endswith("E overflow 3")
+    assert texts[-1].endswith(f"E overflow {logger.BUFFER_SIZE + 2}")
+    assert len(texts) == logger.BUFFER_SIZE + 1
@@ -0,0 +1,60 @@
+"""The loop profiler accumulates per-stage times and a power-of-two histogram of iteration times."""
+
+import pytest
+
+from simulator import Simulator
+
+
+@pytest.fixture
+def profiler():
+    with Simulator().installed():
+        import profiler
+
+        yield profiler
+
+
+def test_iterations_land_in_power_of_two_bins(profiler):
+    loop = profiler.LoopProfiler(["menu", "clock"])
+    start_us = loop._window_start_us
+    for elapsed_us in (0, 1, 2, 3, 4, 255, 256, 511, 25_000, 1 << 16, 1 << 20):
+        loop.end_iteration(elapsed_us, start_us)
+
+    histogram = list(loop.histogram)
+    assert histogram[0] == 2  # 0 and 1 us
+    assert histogram[1] == 2  # 2 - 3 us
+    assert histogram[2] == 1
+    assert (histogram[7], histogram[8]) == (1, 2)  # 255 | 256 and 511
+    assert histogram[14] == 1  # a ~25 ms display redraw
+    assert histogram[profiler.HISTOGRAM_BINS - 1] == 2  # 2^16 us and everything above
+    assert sum(histogram) == 11
+    assert "<512us:2" in loop.summary_lines()
+
+
+def test_stage_totals_and_the_loop_rate(profiler):
+    loop = profiler.LoopProfiler(["menu", "clock"])
+    for elapsed_us in (100, 300, 200):
+        loop.add(1, elapsed_us)
+    assert (loop.calls[1], loop.total_us[1], loop.max_us[1], loop.average_us(1)) == (3, 600, 300, 200)
+    assert loop.average_us(0) == 0
+
+    loop.add(0, profiler.MAX_TOTAL_US - 10)
+    loop.add(0, 20)  # would pass 2^30, the total stays a small int
+    assert (loop.calls[0], loop.total_us[0], loop.max_us[0]) == (2, profiler.MAX_TOTAL_US - 10, profiler.MAX_TOTAL_US - 10)
+
+    start_us = loop._window_start_us
+    for iteration in range(1, 2_501):
+        loop.end_iteration(300, start_us + iteration * 400)
+    assert loop.loops_per_second == 2_500  # one window closed after 1 s
+
+
+def test_reset_clears_every_counter(profiler):
+    loop = profiler.LoopProfiler(["menu", "clock", "idle"])
+    loop.add(2, 50)
+    for iteration in range(1, 5):
+        loop.end_iteration(5_000, loop._window_start_us + iteration * 250_000)
+    assert loop.loops_per_second == 4
+    loop.reset()
+    assert list(loop.calls) == list(loop.total_us) == list(loop.max_us) == [0, 0, 0]
+    assert list(loop.histogram) == [0] * profiler.HISTOGRAM_BINS
+    assert loop.loops_per_second == 0
+    assert loop.summary_lines() == ["Loop: 0/s", "stage  avg/max", "menu     0/    0", "clock    0/    0", "idle     0/    0"]
@@ -0,0 +1,65 @@
+"""The memory report snapshots the heap through boot and attributes import costs to modules.
+
+Sizes are CPython object sizes of the firmware's allocations, so only relations are checked.
+"""
+
+from simulator import Simulator
+from simulator.clock import SimulationEnd
+from simulator.fakes.gc import TRACED_HEAP_SIZE
+
+UNKNOWN = -1  # memory_report.UNKNOWN, the boot snapshot does not look for the largest free block
+
+BOOT_US = 1_000_000
+
+
+def open_memory_screen() -> tuple[Simulator, list[str]]:
+    sim = Simulator(trace_memory=True)
+    lines = []
+
+    def open_screen():
+        lines.extend(sim.main.memory_report_lines())
+        sim.main.memory_screen_menu.set_selected(None)  # leaving the screen prints the report
+        raise SimulationEnd
+
+    sim.at(BOOT_US, open_screen)
+    sim.run(until_us=BOOT_US + 10_000_000)
+    return sim, lines
+
+
+def test_snapshots_and_import_deltas():
+    sim, lines = open_memory_screen()
+    report = sim.main.memory_report
+
+    # the sequencer is initialized before the user interface modules are imported
+    assert [snapshot[0] for snapshot in report.snapshots] == ["boot", "init", "mods", "menu", "now"]
+    allocated = [snapshot[1] for snapshot in report.snapshots]
+    assert allocated[0] < allocated[1] < allocated[2] < allocated[3]
+    for name, used, free, largest in report.snapshots:
+        assert used + free == TRACED_HEAP_SIZE
+        assert 0 < largest <= free or (name == "boot" and largest == UNKNOWN)
+
+    imports = dict(report.modules)
+    assert all(size > 0 for size in imports.values())
+    assert list(imports) == ["logger", "mcp4725", "mcp4725_musical_scales", "idle_gc", "preset_store", "prng", "tempo", "scheduler", "menu", "analog_reader", "quantizer", "latency", "profiler", "pattern_bank", "event_log", "device_bench"]
+    # menu also imports the display driver, the encoder and button drivers
+    assert max(imports, key=imports.get) == "menu"
+
+    assert all(len(line) <= 16 for line in lines)
+    assert lines[0] == "kB   use fre blk"
+    assert "import     bytes" in lines
+
+
+def test_report_is_printed_as_csv():
+    sim, _ = open_memory_screen()
+    texts = [line.text for line in sim.recorder.serial]
+    start = texts.index("snapshot,alloc,free,largest_free")
+    assert [text.split(",")[0] for text in texts[start + 1 : start + 6]] == ["boot", "init", "mods", "menu", "now"]
+    module_start = texts.index("module,import_bytes")
+    assert texts[module_start + 1].startswith("logger,")
+
+
+def test_nothing_is_collected_before_the_first_note():
+    sim, _ = open_memory_screen()
+    first_note_us = sim.recorder.dac_writes[0].t_us
+    assert sim.recorder.collections
+    assert all(collection_us >= first_note_us for collection_us in sim.recorder.collections)
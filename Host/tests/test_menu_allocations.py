@@ -0,0 +1,91 @@
+"""Steady-state menu redraws must not allocate, so no GC pause can land on a clock edge."""
+
+from simulator import Simulator
+from simulator.clock import SimulationEnd
+from simulator.fakes import gc
+
+BOOT_US = 1_000_000
+
+
+def redraw_deltas(redraws: dict) -> dict:
+    """Runs every redraw twice after boot, returns gc.mem_alloc() deltas of the second run."""
+    sim = Simulator(trace_memory=True)
+    deltas = {}
+
+    def measure():
+        for name, redraw in redraws.items():
+            redraw(sim.main)  # warm up, fills the label caches
+            before = gc.mem_alloc()
+            redraw(sim.main)
+            deltas[name] = gc.mem_alloc() - before
+        raise SimulationEnd  # redraws advance the virtual clock, stop before the main loop continues
+
+    sim.at(BOOT_US, measure)
+    sim.run(until_us=BOOT_US + 60_000_000)
+    assert len(deltas) == len(redraws)
+    return deltas
+
+
+def scroll_main_menu(main) -> None:
+    menu = main.main_menu
+    for index in range(menu.submenus_length):
+        menu.scroll_main_menu(index)
+        menu.highlighted_index = index
+        menu.draw_main_menu()
+
+
+def scroll_scale_menu(main) -> None:
+    menu = main.scale_menu
+    for index in range(len(menu.items)):
+        menu.scroll(index)
+        menu.set_highlighted_index(index)
+        menu.display_menu()
+
+
+def sweep_numerical_menu(main) -> None:
+    menu = main.cv_prob_menu
+    for value in range(menu.min_val, menu.max_val + 1, menu.increment):
+        menu.scroll(value)
+        menu.display_menu()
+
+
+def test_steady_state_redraws_allocate_zero_bytes():
+    deltas = redraw_deltas(
+        {
+            "main menu": lambda main: main.main_menu.draw_main_menu(),
+            "main menu scroll": scroll_main_menu,
+            "scale menu": lambda main: main.scale_menu.display_menu(),
+            "scale menu scroll": scroll_scale_menu,
+            "numerical menu": lambda main: main.cv_prob_menu.display_menu(),
+            "numerical menu sweep": sweep_numerical_menu,
+        }
+    )
+    assert deltas == {name: 0 for name in deltas}
+
+
+def test_redraw_that_formats_labels_is_detected():
+    """Without the label cache the same redraw formats new strings, and the measurement sees them."""
+
+    def uncached_redraw(main):
+        for submenu in main.main_menu.submenus:
+            submenu._labels.clear()
+        main.main_menu.draw_main_menu()
+
+    assert redraw_deltas({"uncached": uncached_redraw})["uncached"] > 0
+
+
+def test_labels_are_reused_between_redraws():
+    sim = Simulator()
+    texts = []
+
+    def draw_twice():
+        for _ in range(2):
+            sim.main.main_menu.draw_main_menu()
+            texts.append(sim.recorder.frames[-1].texts)
+        raise SimulationEnd
+
+    sim.at(BOOT_US, draw_twice)
+    sim.run(until_us=BOOT_US + 60_000_000)
+    first, second = texts
+    assert [text[0] for text in first] == [text[0] for text in second]
+    assert all(a[0] is b[0] for a, b in zip(first, second))
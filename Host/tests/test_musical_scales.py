@@ -0,0 +1,70 @@
+"""Scales are built from memoized integer degrees, their Notes are only created when they are accessed."""
+
+import pytest
+
+from simulator import Simulator
+
+
+@pytest.fixture
+def ms():
+    with Simulator().installed():
+        import musical_scales
+
+        musical_scales._scale_cache.clear()
+        musical_scales._scale_cache_order.clear()
+        yield musical_scales
+
+
+def test_a_scale_creates_its_notes_on_access(ms):
+    scale = ms.scale("C", "ionian", 2)
+    assert len(scale) == 15
+    assert scale.semitones == (0, 2, 4, 5, 7, 9, 11, 12, 14, 16, 17, 19, 21, 23, 24)
+    assert scale._notes == [None] * 15
+
+    assert scale[1].midi == "D3"
+    assert scale[1] is scale[1]
+    assert sum(note is not None for note in scale._notes) == 1
+    assert [note.midi for note in scale[-3:]] == ["A4", "B4", "C5"]
+    assert scale.names()[:3] == ["C3", "D3", "E3"]
+    assert repr(ms.scale(ms.Note(semitones_from_middle_c=4), "harmonic minor")) == "[E3, F#3, G3, A3, B3, C4, D#4, E4]"
+
+
+def test_scale_equality(ms):
+    scale = ms.scale("C")
+    assert scale == ms.scale(ms.Note("C"))
+    assert scale == [ms.Note(semitones_from_middle_c=degree) for degree in scale.semitones]
+    assert scale != ms.scale("D")
+    assert scale != None  # noqa: E711
+    assert scale != 3
+    assert scale != "C3"
+
+
+def test_notes_compare_by_degree_and_hash_like_their_midi_string(ms):
+    c3, c4 = ms.Note("C"), ms.Note(semitones_from_middle_c=12)
+    assert c3 == ms.Note(semitones_from_middle_c=0)
+    assert c3 != c4 and c4.midi == "C4"
+    assert c3 == "C3" and c3 == "C" and c4 == "C" and c3 != "C4"
+    assert c3 != 0 and c3 != None  # noqa: E711
+    assert len({c3, ms.Note("C"), c4}) == 2
+    assert {c3: "root"}[ms.Note(semitones_from_middle_c=0)] == "root"
+    assert {"C3": "root"}[c3] == "root" and c4 in {"C4"}
+    assert ms.scale("C")[:3] == ["C3", "D3", "E3"]
+
+
+def test_scale_semitones_is_memoized_with_lru_eviction(ms):
+    first = ms.scale_semitones(0)
+    assert first == (0, 2, 4, 5, 7, 9, 11, 12)
+    assert ms.scale_semitones(0) is first
+
+    for start in range(1, ms.SCALE_CACHE_SIZE):
+        ms.scale_semitones(start)
+    assert ms.scale_semitones(0) is first  # now the most recently used
+    ms.scale_semitones(100)  # one more than fits, start 1 is the least recently used
+    assert len(ms._scale_cache) == ms.SCALE_CACHE_SIZE
+    assert (1, "ionian", 1) not in ms._scale_cache
+    assert ms.scale_semitones(0) is first
+
+    with pytest.raises(ms.MusicException):
+        ms.scale_semitones(0, "no such mode")
+    with pytest.raises(ms.MusicException):
+        ms.scale("H")
@@ -0,0 +1,49 @@
+"""The Monte Carlo mutation model agrees with the closed form expectations of play_step()'s mutation."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from mutations import Settings, simulate  # noqa: E402
+from mutations.model import NEVER, expected_bars_to_replace  # noqa: E402
+
+
+@pytest.mark.parametrize("cv_prob", [5, 25, 60])
+def test_mean_time_to_full_replacement_matches_the_exact_expectation(cv_prob):
+    result = simulate(Settings(steps=16, cv_prob=cv_prob), runs=4_000, bars=400, seed=cv_prob)
+    assert not (result.bars_to_replace == NEVER).any()
+    assert result.bars_to_replace.mean() == pytest.approx(expected_bars_to_replace(16, cv_prob), rel=0.03)
+
+
+def test_edge_probabilities():
+    unchanged = simulate(Settings(cv_prob=0, trig_prob=0), runs=50, bars=10)
+    assert (unchanged.bars_to_replace == NEVER).all()
+    assert (unchanged.gate_density == 1).all()
+    assert unchanged.note_counts[0] == unchanged.steps_simulated
+
+    replaced = simulate(Settings(cv_prob=100, trig_prob=100), runs=500, bars=40)
+    assert (replaced.bars_to_replace == 1).all()
+    assert expected_bars_to_replace(16, 100) == 1
+    assert replaced.gate_density.mean() == pytest.approx(0.5, abs=0.01)
+    shares = replaced.note_counts / replaced.note_counts.sum()
+    assert shares == pytest.approx(np.full(len(replaced.scale), 1 / len(replaced.scale)), abs=0.01)
+
+
+def test_gate_density_decays_towards_one_half():
+    density = simulate(Settings(trig_prob=20), runs=2_000, bars=40).gate_density
+    expected = 0.5 + 0.5 * 0.8 ** np.arange(1, 41)  # every bar moves the share of gates 20 % of the way to one half
+    assert density == pytest.approx(expected, abs=0.02)
+
+
+def test_erase_modes_override_the_mutation():
+    erased = simulate(Settings(cv_prob=50, trig_prob=50, cv_erase=True, trig_erase=True), runs=100, bars=20)
+    assert erased.note_counts[1:].sum() == 0
+    assert (erased.gate_density == 1).all()
+    assert (erased.bars_to_replace == 1).all()
+
+
+def test_runs_are_reproducible_per_seed():
+    settings = Settings(scale="aeolian", octaves=2, steps=7, cv_prob=10, trig_prob=10)
+    first, second = simulate(settings, 100, 30, seed=3), simulate(settings, 100, 30, seed=3)
+    assert np.array_equal(first.note_counts, second.note_counts)
+    assert np.array_equal(first.bars_to_replace, second.bars_to_replace)
@@ -0,0 +1,34 @@
+"""The native and viper functions compile for the Pico and their CPython fallbacks give the same results."""
+
+import importlib.util
+import shutil
+
+import pytest
+
+from build_mpy import build, mpy_cross_command
+from simulator import Simulator
+
+
+def test_quantizer_table_fill_matches_the_nearest_note():
+    with Simulator().installed():
+        from quantizer import ADC_CODES, Quantizer
+
+        quantizer = Quantizer()
+        scale = [note * 68 for note in range(0, 49, 2)]
+        quantizer.rebuild(scale)
+        for code in range(ADC_CODES):
+            value = quantizer.adc_code_to_dac_value(code)
+            nearest = min(abs(note - value) for note in scale)
+            assert abs(quantizer.quantize(code) - value) == nearest
+
+
+@pytest.mark.skipif(
+    shutil.which("mpy-cross") is None and importlib.util.find_spec("mpy_cross") is None,
+    reason="mpy-cross is not installed",
+)
+def test_every_module_compiles_for_the_pico(tmp_path):
+    sizes = build(tmp_path, mpy_cross_command(None))
+
+    assert [name for name, _, _ in sizes] == sorted(path.stem for path in (tmp_path / "lib").glob("*.mpy"))
+    assert all(0 < mpy_size < source_size for _, source_size, mpy_size in sizes)
+    assert (tmp_path / "main.py").exists()
@@ -0,0 +1,101 @@
+"""The host pattern tool writes banks byte for byte like the firmware, and its generators stay in the scale."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from patterns import GENERATORS, Bank, decode, encode, scale_table, validate  # noqa: E402
+from patterns.generators import MAX_WALK_MOVE  # noqa: E402
+from simulator import Simulator  # noqa: E402
+
+COUNT = 300
+
+
+def generated(generator: str, steps: int = 12, seed: int = 1) -> Bank:
+    rng = np.random.default_rng(seed)
+    scale = scale_table("dorian", start_note=2, octaves=2)
+    pattern_steps = np.full(COUNT, steps)
+    cv, gates = GENERATORS[generator](rng, scale, pattern_steps, 0.4)
+    return Bank(cv, gates, pattern_steps, np.array([[0, 2], [7, 1], [299, 3]]))
+
+
+@pytest.mark.parametrize("generator", sorted(GENERATORS))
+def test_bank_is_byte_identical_to_the_firmware_and_reads_back(tmp_path, generator):
+    bank = generated(generator)
+    data = encode(bank)
+    assert validate(data) == []
+
+    with Simulator(flash_dir=str(tmp_path)).installed():
+        from pattern_bank import PatternBank, create_bank
+
+        patterns = [(list(map(int, bank.cv[i])), list(map(int, bank.gates[i])), int(bank.steps[i])) for i in range(COUNT)]
+        create_bank("firmware.bin", patterns, [tuple(map(int, entry)) for entry in bank.chain])
+        assert (tmp_path / "firmware.bin").read_bytes() == data
+
+        (tmp_path / "patterns.bin").write_bytes(data)
+        firmware_bank = PatternBank()
+        assert firmware_bank.open()
+        assert (firmware_bank.pattern_count, firmware_bank.chain_length) == (COUNT, 3)
+        assert [firmware_bank.chain_pattern(i) for i in range(3)] == [0, 7, 299]
+        cv_sequence, trigger_sequence = [0] * 16, [0] * 16
+        assert firmware_bank.read_pattern(150, cv_sequence, trigger_sequence) == 12
+        assert cv_sequence[:12] == list(bank.cv[150, :12])
+        assert trigger_sequence[:12] == list(bank.gates[150, :12].astype(int))
+
+    decoded = decode(data)
+    assert np.array_equal(decoded.cv[:, :12], bank.cv[:, :12])
+    assert not decoded.cv[:, 12:].any()
+    assert np.array_equal(decoded.gates[:, :12], bank.gates[:, :12])
+    assert np.array_equal(decoded.chain, bank.chain)
+
+
+def test_generators_stay_in_the_scale():
+    scale = scale_table("dorian", start_note=2, octaves=2)
+    for generator in GENERATORS:
+        assert np.isin(generated(generator).cv, scale).all(), generator
+
+    walk = np.searchsorted(scale, generated("walk", steps=16).cv)
+    assert np.abs(np.diff(walk, axis=1)).max() <= MAX_WALK_MOVE
+
+
+def test_euclidean_pulses_are_spread_evenly():
+    bank = generated("euclidean", steps=16)
+    for gates in bank.gates:
+        onsets = np.flatnonzero(gates)
+        gaps = np.diff(np.append(onsets, onsets[0] + 16))
+        assert gaps.max() - gaps.min() <= 1
+
+
+def test_validate_reports_what_the_firmware_would_trip_over():
+    bank = generated("random")
+    bank.steps[3] = 1  # below the Steps menu's minimum
+    bank.chain[1, 0] = COUNT
+    problems = validate(encode(bank))
+    assert any("step count" in problem for problem in problems)
+    assert any("chain entries pointing past" in problem for problem in problems)
+    assert validate(b"XX" + encode(bank)[2:]) == ["not a pattern bank of this format version"]
+
+
+def test_five_octaves_are_clamped_to_the_dac_range(tmp_path, monkeypatch, capsys):
+    from patterns.__main__ import main
+
+    path = tmp_path / "patterns.bin"
+    monkeypatch.setattr("sys.argv", ["patterns", "generate", str(path), "--octaves", "5", "--start-note", "12", "--count", "50", "--seed", "3"])
+    main()
+    bank = decode(path.read_bytes())
+    in_pattern = np.arange(16) < bank.steps[:, None]
+    assert bank.cv[in_pattern].max() == 4095  # the top notes sit on the DAC's last code, they do not wrap to low ones
+    assert bank.cv[in_pattern].min() >= scale_table("major", 12, 5)[0]
+
+    monkeypatch.setattr("sys.argv", ["patterns", "analyze", str(path)])
+    main()
+    assert capsys.readouterr().out.rstrip().endswith("valid")
+
+    unclamped = generated("random")
+    unclamped.cv[5, 2] = 4352
+    with pytest.raises(ValueError, match="DAC's range"):
+        encode(unclamped)
+    data = bytearray(encode(generated("random")))
+    offset = len(data) - (COUNT - 5) * 34 + 2 + 2 * 2  # pattern 5, step 2
+    data[offset : offset + 2] = (4352 | 1 << 15).to_bytes(2, "little")
+    assert validate(bytes(data)) == ["1 patterns with CVs above 4095, first 5"]
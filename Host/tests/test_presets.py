@@ -0,0 +1,151 @@
+"""Presets are saved to flash between steps, rotate over the record slots and are restored at boot."""
+
+from simulator import Simulator
+
+WIDTH_US = 5_000
+UI_READY_US = 400_000
+START_US = 500_000
+STOP_US = 1_500_000
+END_US = 4_000_000
+
+
+def new_store(**kwargs):
+    from preset_store import PresetStore
+
+    return PresetStore(check_interval_ms=0, **kwargs)
+
+
+def save(store, cv_sequence, steps=16, idle_us=100_000) -> bool:
+    return store.save_if_changed(idle_us, "dorian", 3, 2, steps, 40, 10, 50, cv_sequence, [step % 2 for step in range(16)])
+
+
+def test_saves_rotate_over_the_slots_and_the_newest_valid_record_is_loaded(tmp_path):
+    with Simulator(flash_dir=str(tmp_path)).installed():
+        store = new_store(slots=3)
+        for saved in range(5):
+            assert save(store, [saved * 100 + step for step in range(16)])
+        assert not save(store, [400 + step for step in range(16)])  # unchanged
+        assert store.saves == 5
+        assert store.slot == 1
+
+        loaded = new_store(slots=3)
+        assert loaded.load()
+        assert (loaded.slot, loaded.counter) == (1, 5)
+        assert loaded.scale_name() == "dorian"
+        assert [loaded.parameter(i) for i in range(6)] == [3, 2, 16, 40, 10, 50]
+        cv_sequence, trigger_sequence = [0] * 16, [0] * 16
+        loaded.read_steps(cv_sequence, trigger_sequence)
+        assert cv_sequence == [400 + step for step in range(16)]
+        assert trigger_sequence == [step % 2 for step in range(16)]
+
+        # a write cut short by a power loss leaves the previous record
+        with open("presets.bin", "r+b") as file:
+            file.seek(1 * 74 + 50)
+            file.write(b"\xff")
+        loaded = new_store(slots=3)
+        assert loaded.load()
+        assert (loaded.slot, loaded.counter) == (0, 4)
+
+
+def test_no_save_in_a_short_idle_window(tmp_path):
+    with Simulator(flash_dir=str(tmp_path)).installed():
+        store = new_store()
+        assert not save(store, [0] * 16, idle_us=store.write_budget_us - 1)
+        assert not new_store().load()
+
+
+def change_settings(sim: Simulator) -> None:
+    main = sim.main
+    main.presets.check_interval_ms = 100
+    main.scale_menu.selected = "dorian"
+    main.steps_menu.selected = 8
+    main.cv_prob_menu.selected = 100
+    main.update_sequencer_values()
+
+
+def run_and_record_saves(sim: Simulator, until_us: int) -> list[int]:
+    saves = []
+
+    def record_saves():
+        save_if_changed = sim.main.presets.save_if_changed
+
+        def recorded(*args):
+            saved = save_if_changed(*args)
+            if saved:
+                saves.append(sim.now_us)
+            return saved
+
+        sim.main.presets.save_if_changed = recorded
+
+    sim.at(UI_READY_US - 1, record_saves)
+    sim.run(until_us=until_us)
+    return saves
+
+
+def test_preset_is_saved_between_steps_and_restored_at_boot(tmp_path):
+    period_us = 125_000
+    sim = Simulator(flash_dir=str(tmp_path))
+    edges = sim.clock_pulses(period_us, WIDTH_US, start_us=START_US, until_us=STOP_US)
+    sim.at(UI_READY_US, lambda: change_settings(sim))
+    saves = run_and_record_saves(sim, END_US)
+
+    assert any(save < STOP_US for save in saves)
+    assert saves[-1] > edges[-1]  # saved again after the last step mutated the sequence
+    for save in saves:
+        next_edges = [edge for edge in edges if edge > save]
+        if next_edges:
+            assert next_edges[0] - save >= sim.main.presets.write_budget_us
+
+    restored = Simulator(flash_dir=str(tmp_path)).run(until_us=UI_READY_US)
+    main = restored.main
+    assert main.cv_sequence == sim.main.cv_sequence
+    assert main.trigger_sequence == sim.main.trigger_sequence
+    assert (main.current_scale_interval, main.number_of_steps, main.cv_probability_of_change) == ("dorian", 8, 100)
+    assert main.steps_menu.selected == 8
+    assert restored.recorder.dac_writes[0].value == main.cv_sequence[0]
+    assert main.current_12bit_scale[: main.current_scale_length] == sim.main.current_12bit_scale[: sim.main.current_scale_length]
+
+
+def test_no_save_while_a_fast_clock_leaves_no_room(tmp_path):
+    sim = Simulator(flash_dir=str(tmp_path))
+    sim.clock_pulses(40_000, WIDTH_US, start_us=START_US, until_us=STOP_US)
+    sim.at(UI_READY_US, lambda: change_settings(sim))
+    saves = run_and_record_saves(sim, STOP_US)
+
+    assert [save for save in saves if save > START_US + 100_000] == []
+
+
+def test_notes_above_the_dac_range_are_restored_as_the_dac_plays_them(tmp_path):
+    with Simulator(flash_dir=str(tmp_path)).installed():
+        import mcp4725_musical_scales as sc
+
+        cv_sequence = sc.get_scale_of_12_bit_values(12, "major", 5)[-16:]  # Octaves 5 from C reaches 4896
+        assert max(cv_sequence) > 0x0FFF
+        assert save(new_store(), cv_sequence)
+        loaded = new_store()
+        assert loaded.load()
+        restored, trigger_sequence = [0] * 16, [0] * 16
+        loaded.read_steps(restored, trigger_sequence)
+        assert restored == [min(cv, 0x0FFF) for cv in cv_sequence]
+
+    sim = Simulator(flash_dir=str(tmp_path))
+    sim.at(UI_READY_US, lambda: sim.main.dac.write(cv_sequence[-1]))
+    sim.run(until_us=UI_READY_US + 10_000)
+    assert sim.recorder.dac_writes[-1].value == restored[-1] == 0x0FFF
+
+
+def test_settings_out_of_their_menu_range_are_clamped_at_boot(tmp_path):
+    with Simulator(flash_dir=str(tmp_path)).installed():
+        store = new_store()
+        # a valid record whose fields no menu can set: Start note 200, Octaves 9, Steps 0, CVProb 250
+        assert store.save_if_changed(100_000, "major", 200, 9, 0, 250, 10, 50, list(range(16)), [1] * 16)
+
+    sim = Simulator(flash_dir=str(tmp_path))
+    sim.clock_pulses(50_000, WIDTH_US, count=20, start_us=START_US)
+    sim.run(until_us=START_US + 1_000_000)
+    main = sim.main
+    assert (main.starting_note, main.number_of_octaves, main.number_of_steps) == (36, 5, 2)
+    assert main.cv_probability_of_change == 100
+    assert main.current_scale_length == 5 * 7 + 1  # major over 5 octaves
+    assert main.octaves_menu.selected == 5 and main.starting_note_menu.selected == 36
+    assert all(write.value <= 0x0FFF for write in sim.recorder.dac_writes)
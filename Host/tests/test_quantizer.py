@@ -0,0 +1,78 @@
+"""The quantizer's lookup table maps every ADC code to the nearest scale note and is rebuilt only when the scale changes."""
+
+from array import array
+
+import pytest
+
+from simulator import Simulator
+
+MAJOR_5_OCTAVES = [12 + octave * 12 + degree for octave in range(5) for degree in (0, 2, 4, 5, 7, 9, 11)] + [72]
+SCALES = {
+    "whole tone 2 octaves": [note * 68 for note in range(0, 25, 2)],
+    "major 5 octaves": [min(note * 68, 0x0FFF) for note in MAJOR_5_OCTAVES],  # the top notes sit on 4095
+    "one note": [1000],
+}
+
+
+@pytest.fixture
+def quantizer_module():
+    with Simulator().installed():
+        import quantizer
+
+        yield quantizer
+
+
+def nearest_note(scale: list[int], value: int) -> int:
+    """The closest note, the higher one of two at the same distance"""
+    return min(scale, key=lambda note: (abs(note - value), -note))
+
+
+@pytest.mark.parametrize("name", sorted(SCALES))
+def test_every_adc_code_maps_to_the_nearest_note(quantizer_module, name):
+    scale = sorted(SCALES[name])
+    quantizer = quantizer_module.Quantizer()
+    assert quantizer.rebuild(scale)
+    for code in range(quantizer_module.ADC_CODES):
+        assert quantizer.quantize(code) == nearest_note(scale, quantizer.adc_code_to_dac_value(code)), code
+
+
+def test_the_table_is_rebuilt_only_when_the_scale_changes(quantizer_module):
+    quantizer = quantizer_module.Quantizer()
+    table = quantizer.table
+    major = array("H", [note * 68 for note in (12, 14, 16, 17, 19, 21, 23, 24)] + [0] * 8)  # a preallocated scale array
+    assert quantizer.rebuild(major, 8)
+    top = quantizer.quantize(4095)
+    assert top == 24 * 68
+    assert not quantizer.rebuild(major, 8)
+    assert not quantizer.rebuild(list(major[:8]))
+
+    assert quantizer.rebuild(major, 7)  # shorter: the top note is gone
+    assert quantizer.quantize(4095) == 23 * 68
+    major[0] = 13 * 68  # Start note changed
+    assert quantizer.rebuild(major, 7)
+    assert quantizer.quantize(0) == 13 * 68
+    assert quantizer.table is table  # filled in place
+
+
+class Ptr16:
+    """Viper's ptr16: loads and stores of 16 bit halfwords, a store keeps the low 16 bits"""
+
+    def __init__(self, buffer) -> None:
+        self.buffer = buffer
+
+    def __getitem__(self, index: int) -> int:
+        return self.buffer[index] & 0xFFFF
+
+    def __setitem__(self, index: int, value: int) -> None:
+        self.buffer[index] = value & 0xFFFF
+
+
+@pytest.mark.parametrize("name", sorted(SCALES))
+def test_the_cpython_fallback_matches_the_viper_pointer_semantics(quantizer_module, name):
+    assert quantizer_module.ptr16 is None  # the annotation's fallback, CPython runs _fill_table as plain Python
+    quantizer = quantizer_module.Quantizer()
+    quantizer.rebuild(sorted(SCALES[name]))
+
+    viper_table = array("H", bytes(2 * quantizer_module.ADC_CODES))
+    quantizer_module._fill_table(Ptr16(viper_table), Ptr16(quantizer.scale), quantizer.scale_length - 1, quantizer.adc_vref_mv, quantizer.dac_vref_mv)
+    assert viper_table == quantizer.table
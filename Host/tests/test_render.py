@@ -0,0 +1,94 @@
+"""The menus render to the golden images in tests/golden and every frame reports its render cost.
+
+After an intended change to how the menus look, rewrite the images with
+pytest tests/test_render.py --update-golden and look at the new ones before committing them.
+"""
+
+from pathlib import Path
+
+import pytest
+
+from simulator import Simulator, from_pbm, to_pbm, to_png
+
+GOLDEN_DIR = Path(__file__).parent / "golden"
+STATES = ["main_menu", "main_menu_scrolled", "scale_list", "scale_list_scrolled", "cv_prob", "cv_erase_on", "event_log_screen"]
+
+
+@pytest.fixture(scope="module")
+def session() -> tuple[Simulator, dict[str, bytes]]:
+    """Walks through the menus with the encoder and keeps what the display shows in each state"""
+    sim = Simulator(seed=0)
+    shots = {}
+
+    def shot(name: str, t_us: int) -> None:
+        sim.at(t_us, lambda: shots.__setitem__(name, bytes(sim.display.ram)))
+
+    shot("main_menu", 300_000)
+    t_us = sim.turn_encoder(5, 400_000) + 200_000
+    shot("main_menu_scrolled", t_us)
+    t_us = sim.turn_encoder(-5, t_us) + 100_000
+    t_us = sim.press_button(t_us) + 200_000
+    shot("scale_list", t_us)
+    t_us = sim.turn_encoder(6, t_us) + 200_000
+    shot("scale_list_scrolled", t_us)
+    t_us = sim.press_button(t_us) + 200_000
+    t_us = sim.turn_encoder(1, t_us) + 100_000
+    t_us = sim.press_button(t_us) + 200_000
+    t_us = sim.turn_encoder(3, t_us) + 200_000
+    shot("cv_prob", t_us)
+    t_us = sim.press_button(t_us) + 200_000
+    t_us = sim.turn_encoder(7, t_us) + 100_000
+    t_us = sim.press_button(t_us) + 200_000
+    shot("cv_erase_on", t_us)
+    t_us = sim.turn_encoder(22, t_us) + 100_000
+    t_us = sim.press_button(t_us) + 200_000
+    shot("event_log_screen", t_us)
+    sim.run(until_us=t_us + 100_000)
+    return sim, shots
+
+
+@pytest.mark.parametrize("name", STATES)
+def test_menu_state_matches_its_golden_image(session, name, request, tmp_path):
+    _, shots = session
+    ram = shots[name]
+    golden = GOLDEN_DIR / f"{name}.pbm"
+    if request.config.getoption("--update-golden"):
+        golden.write_bytes(to_pbm(ram))
+    assert golden.exists(), f"no golden image, create it with pytest {__file__} --update-golden"
+    _, _, expected = from_pbm(golden.read_bytes())
+    if ram != expected:
+        (tmp_path / f"{name}.png").write_bytes(to_png(ram))
+        (tmp_path / f"{name}-golden.png").write_bytes(to_png(expected))
+        pytest.fail(f"{name} differs from {golden.name}, both are in {tmp_path}")
+
+
+def test_every_frame_reports_its_render_cost(session):
+    sim, _ = session
+    redraws = [frame for frame in sim.recorder.frames if frame.texts and frame.texts[0][0] == "Main Menu"]
+    assert len(redraws) > 10
+    # fill, title, title box, highlight bar and four lines of text
+    assert {frame.render.calls for frame in redraws} == {8}
+    assert all(frame.render.pixels > 128 * 64 for frame in redraws)  # the fill alone visits every pixel
+    assert all(0 < frame.render.us < 2_000 for frame in redraws)
+
+
+def test_text_and_scroll_draw_like_framebuf():
+    with Simulator().installed():
+        import framebuf
+        from simulator.fakes.font8x8 import glyph
+
+        buffer = bytearray(16 * 2)
+        fb = framebuf.FrameBuffer(buffer, 16, 16, framebuf.MONO_VLSB)
+        fb.text("A", 0, 0, 1)
+        assert bytes(buffer[:8]) == bytes(glyph("A"))
+        fb.text("\x01", 8, 0, 1)  # codes outside 32-127 draw the last glyph
+        assert bytes(buffer[8:16]) == bytes(glyph("\x7f"))
+        fb.text("clipped", -20, 12, 1)  # off the edges, nothing raises
+
+        fb.fill(0)
+        fb.pixel(1, 1, 1)
+        fb.scroll(2, 3)
+        assert fb.pixel(3, 4) == 1
+        assert fb.pixel(1, 1) == 1  # the area scrolled away from is left as it was
+        fb.fill_rect(4, 6, 3, 4, 1)  # across the page boundary at row 8
+        assert [fb.pixel(5, y) for y in range(5, 11)] == [0, 1, 1, 1, 1, 0]
@@ -0,0 +1,126 @@
+"""An event log recorded by the firmware replays on the simulator to exactly the same steps."""
+
+import random
+
+import pytest
+
+from replay import Record, encode, keyframes, parse, read_log, replay
+from replay.log import CLOCK_FALL, CLOCK_RISE, NO_CV, STEP
+from simulator import CLOCK_INPUT_PIN, DIGITAL_INPUT_PIN, Simulator
+
+RECORD_US = 300_000
+END_US = 12_000_000
+
+
+def set_menu(sim: Simulator, name: str, value: int) -> None:
+    main = sim.main
+    main.set_menu_value([submenu.name for submenu in main.submenus].index(name), value)
+
+
+SETTINGS = ((1_000_000, "CVProb", 50), (1_500_000, "TrigProb", 30), (4_000_000, "Steps", 7), (6_000_000, "Scale", 3), (8_000_000, "Octaves", 3))
+
+
+def record(flash_dir, capacity: int = 1024, keyframe_steps: int = 64, settings=SETTINGS) -> list[Record]:
+    """Plays a jittery clock with setting changes on the simulator, logs it and returns the dump"""
+    sim = Simulator(seed=5, flash_dir=str(flash_dir))
+    jitter = random.Random(1)
+    t_us = 400_000
+    while t_us < END_US - 200_000:
+        sim.jack(CLOCK_INPUT_PIN, True, t_us)
+        sim.jack(CLOCK_INPUT_PIN, False, t_us + 4_000 + jitter.randrange(3_000))
+        t_us += 60_000 + jitter.randrange(30_000)
+    sim.jack(DIGITAL_INPUT_PIN, True, 2_000_000)
+    sim.jack(DIGITAL_INPUT_PIN, False, 2_100_000)
+
+    def start() -> None:
+        sim.main.event_log = sim.main.el.EventLog(capacity, keyframe_steps)
+        set_menu(sim, "Record", 1)
+
+    sim.at(RECORD_US, start)
+    for t_us, name, value in settings:
+        sim.at(t_us, lambda name=name, value=value: set_menu(sim, name, value))
+    sim.at(END_US - 1_000, lambda: sim.main.event_log.dump())
+    sim.run(until_us=END_US)
+    return read_log(flash_dir / "events.bin")
+
+
+@pytest.fixture(scope="module")
+def recorded(tmp_path_factory) -> list[Record]:
+    return record(tmp_path_factory.mktemp("flash"))
+
+
+def test_prng_is_xorshift32():
+    with Simulator().installed():
+        from prng import Xorshift32
+
+        rng = Xorshift32(2463534242)
+        x = 2463534242
+        for _ in range(1000):
+            x ^= (x << 13) & 0xFFFFFFFF
+            x ^= x >> 17
+            x ^= (x << 5) & 0xFFFFFFFF
+            assert rng.next() == x >> 2
+        assert all(0 <= rng.randint(3, 9) <= 9 for _ in range(1000))
+
+
+@pytest.mark.parametrize("fast", [False, True])
+def test_replay_reproduces_the_logged_steps(recorded, fast):
+    result = replay(recorded, fast=fast)
+    assert len(result.expected) > 100
+    assert result.first_mismatch is None
+    assert result.late_parameters == 0
+    # the setting changes took effect: random CVs, random gates and 7 steps after 4 s
+    assert len({step.cv for step in result.expected}) > 3
+    assert {step.gate for step in result.expected} == {0, 1}
+    assert max(step.step for step in result.expected[-20:]) == 6
+
+
+def test_a_wrapped_ring_replays_from_its_oldest_keyframe(tmp_path):
+    records = record(tmp_path, capacity=300, keyframe_steps=16)
+    assert len(records) == 300
+    first = keyframes(records)[0]
+    assert first.index > 0
+    result = replay(records, fast=True)
+    assert len(result.expected) > 30
+    assert result.first_mismatch is None
+
+
+def test_notes_above_the_dac_range_replay_from_a_keyframe(tmp_path):
+    # Octaves 5 from a high start note goes past 4095, the DAC and the log clamp it
+    settings = ((1_000_000, "Octaves", 5), (1_000_000, "Start note", 24), (1_200_000, "CVProb", 100))
+    records = record(tmp_path, capacity=300, keyframe_steps=16, settings=settings)
+    first = keyframes(records)[0]
+    assert first.index > 0
+    assert max(first.sequences()[0]) == 0x0FFF
+    assert max(record.value for record in records if record.kind == STEP) == 0x0FFF
+
+    result = replay(records, fast=True)
+    assert len(result.expected) > 30
+    assert result.first_mismatch is None
+
+
+def test_a_diverging_step_is_reported(recorded):
+    step_records = [index for index, record in enumerate(recorded) if record.kind == STEP]
+    tampered = list(recorded)
+    index = step_records[40]
+    cv = tampered[index].value
+    tampered[index] = tampered[index]._replace(value=NO_CV if cv != NO_CV else 0)
+    tampered = parse(encode(tampered))
+    first_step = sum(1 for i in step_records if i < keyframes(tampered)[0].index)
+    assert replay(tampered, fast=True).first_mismatch == 40 - first_step
+
+
+def test_fast_forward_replays_an_hour_in_seconds(recorded):
+    first = keyframes(recorded)[0]
+    keyframe = [record._replace(t_us=record.t_us - first.t_us) for record in recorded[first.index : first.index + 1 + recorded[first.index].arg]]
+    period_us = 125_000  # 16ths at 120 BPM
+    edges = []
+    for pulse in range(3600 * 1_000_000 // period_us):
+        t_us = 100_000 + pulse * period_us
+        edges += [Record(t_us, CLOCK_RISE, 0, 0), Record(t_us + 5_000, CLOCK_FALL, 0, 0)]
+    records = parse(encode(keyframe + edges))
+    assert records[-1].t_us > 1 << 30  # the logged ticks_us wrapped around three times
+
+    result = replay(records, fast=True)
+    assert len(result.replayed) == 3600 * 1_000_000 // period_us
+    assert result.real_s < 30
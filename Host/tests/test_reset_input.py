@@ -0,0 +1,193 @@
+"""The digital input resets the sequence on the next clock edge, holds mutation, reverses or mutates the sequence."""
+
+import pytest
+
+from simulator import DIGITAL_INPUT_PIN, Simulator
+
+START_US = 500_000
+PERIOD_US = 50_000
+WIDTH_US = 5_000
+
+
+def set_reset_mode(sim: Simulator, name: str) -> None:
+    def select() -> None:
+        main = sim.main
+        main.reset_mode_menu.set_selected(main.RESET_MODE_NAMES.index(name))
+        main.update_sequencer_values()
+
+    sim.at(START_US - 50_000, select)
+
+
+def trigger(sim: Simulator, at_us: int) -> None:
+    sim.jack(DIGITAL_INPUT_PIN, True, at_us)
+    sim.jack(DIGITAL_INPUT_PIN, False, at_us + 5_000)
+
+
+def log_steps(sim: Simulator) -> list[tuple[int, int]]:
+    """(t_us, step) of every step output from the start"""
+    steps = []
+
+    def wrap() -> None:
+        main = sim.main
+        output_step = main.output_step
+
+        def logged() -> None:
+            steps.append((sim.now_us, main.current_step))
+            output_step()
+
+        main.output_step = logged
+
+    sim.at(START_US - 1, wrap)
+    return steps
+
+
+def steps_after(steps: list[tuple[int, int]], t_us: int) -> list[int]:
+    return [step for step_us, step in steps if step_us > t_us]
+
+
+def test_a_reset_between_edges_takes_effect_on_the_next_edge():
+    sim = Simulator(seed=0)
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, count=20, start_us=START_US)
+    reset_us = edges[10] + 20_000
+    trigger(sim, reset_us)
+    steps = log_steps(sim)
+    sim.run(until_us=edges[-1] + PERIOD_US)
+
+    assert steps_after(steps, START_US)[:11] == list(range(11))
+    assert steps_after(steps, reset_us)[:4] == [0, 1, 2, 3]
+    first_us = next(step_us for step_us, _ in steps if step_us > reset_us)
+    assert 0 <= first_us - edges[11] < 500  # on the edge, not a main loop pass later
+
+
+def test_a_reset_just_after_an_edge_belongs_to_that_edge():
+    sim = Simulator(seed=0)
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, count=20, start_us=START_US)
+    reset_us = edges[10] + 1_000  # the step of the edge is already out
+    trigger(sim, reset_us)
+    steps = log_steps(sim)
+    sim.run(until_us=edges[-1] + PERIOD_US)
+
+    assert steps_after(steps, edges[10] - 1)[:5] == [10, 0, 1, 2, 3]
+    replayed_us = next(step_us for step_us, _ in steps if step_us >= reset_us)
+    assert replayed_us - reset_us < 1_000
+
+
+def stall(sim: Simulator, at_us: int, length_us: int) -> None:
+    """Blocks the main loop, like a display flush"""
+    sim.at(at_us, lambda: sim.clock.advance(length_us))
+
+
+def test_a_reset_after_an_edge_the_main_loop_has_not_played_yet_waits_for_the_next_edge():
+    sim = Simulator(seed=0)
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, count=20, start_us=START_US)
+    stall(sim, edges[10] - 1_000, 25_000)  # the edge comes in during the flush
+    reset_us = edges[10] + 5_000
+    trigger(sim, reset_us)
+    steps = log_steps(sim)
+    sim.run(until_us=edges[-1] + PERIOD_US)
+
+    assert steps_after(steps, edges[9] + PERIOD_US // 2)[:4] == [10, 0, 1, 2]
+    first_us = next(step_us for step_us, step in steps if step_us > reset_us and step == 0)
+    assert 0 <= first_us - edges[11] < 500
+
+
+def test_caught_up_edges_reset_by_their_own_timestamps():
+    sim = Simulator(seed=0)
+
+    def play_all() -> None:
+        main = sim.main
+        main.catch_up_menu.set_selected(main.CATCH_UP_NAMES.index("All"))
+        main.update_sequencer_values()
+
+    sim.at(START_US - 50_000, play_all)
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, count=20, start_us=START_US)
+    stall(sim, edges[10] + 10_000, 3 * PERIOD_US)  # edges 11 to 13 fall into it
+    trigger(sim, edges[11] + 20_000)  # between edges 11 and 12
+    steps = log_steps(sim)
+    sim.run(until_us=edges[-1] + PERIOD_US)
+
+    assert steps_after(steps, edges[9] + PERIOD_US // 2)[:6] == [10, 11, 0, 1, 2, 3]
+    assert not sim.main.reset_pending
+
+
+def test_a_reset_together_with_the_clock_edge_plays_the_first_step_once():
+    sim = Simulator(seed=0)
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, count=20, start_us=START_US)
+    trigger(sim, edges[10])
+    steps = log_steps(sim)
+    sim.run(until_us=edges[-1] + PERIOD_US)
+
+    assert steps_after(steps, edges[9] + PERIOD_US // 2)[:4] == [0, 1, 2, 3]
+    assert not sim.main.reset_pending
+
+
+def test_hold_freezes_mutation_while_the_input_is_high():
+    sim = Simulator(seed=0)
+    sim.at(START_US - 50_000, lambda: setattr(sim.main, "cv_probability_of_change", 100))
+    set_reset_mode(sim, "Hold")
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, count=40, start_us=START_US)
+    sim.jack(DIGITAL_INPUT_PIN, True, edges[20] - 10_000)
+    held = []
+    sim.at(edges[20] - 5_000, lambda: held.append(list(sim.main.cv_sequence)))
+    sim.at(edges[-1] + 10_000, lambda: held.append(list(sim.main.cv_sequence)))
+    sim.run(until_us=edges[-1] + PERIOD_US)
+
+    assert held[0] == held[1]
+    assert not sim.main.reset_pending  # Hold does not reset
+
+
+def test_reverse_turns_the_play_direction_around():
+    sim = Simulator(seed=0)
+    set_reset_mode(sim, "Reverse")
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, count=30, start_us=START_US)
+    trigger(sim, edges[5] + 20_000)
+    trigger(sim, edges[20] + 20_000)
+    steps = log_steps(sim)
+    sim.run(until_us=edges[-1] + PERIOD_US)
+
+    played = steps_after(steps, START_US)
+    assert played[:6] == [0, 1, 2, 3, 4, 5]
+    assert played[6:15] == [6, 5, 4, 3, 2, 1, 0, 15, 14]
+    assert played[20:24] == [8, 7, 8, 9]
+
+
+def test_mutate_draws_the_whole_sequence_at_once():
+    sim = Simulator(seed=0)
+    set_reset_mode(sim, "Mutate")
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, count=10, start_us=START_US)
+    mutate_us = edges[5] + 20_000
+    trigger(sim, mutate_us)
+    sequences = []
+    sim.at(mutate_us - 1_000, lambda: sequences.append(list(sim.main.cv_sequence)))
+    sim.at(mutate_us + 1_000, lambda: sequences.append(list(sim.main.cv_sequence)))
+    sim.run(until_us=edges[-1] + PERIOD_US)
+
+    before, after = sequences
+    assert sum(a != b for a, b in zip(before, after)) > 8
+    assert set(after) <= set(sim.main.current_12bit_scale)
+
+
+@pytest.mark.parametrize("mode", ["Reverse", "Mutate"])
+def test_a_clock_edge_before_the_soft_handler_does_not_reset_in_other_modes(mode):
+    sim = Simulator(seed=0)
+    set_reset_mode(sim, mode)
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, count=12, start_us=START_US)
+    trigger_us = edges[5] + 20_000
+    trigger(sim, trigger_us)
+    deferred = []
+
+    def defer_soft_handler() -> None:
+        # on the device the scheduled handler can run after the next clock edge
+        main = sim.main
+        handle_digital_edge = main.handle_digital_edge
+        main.handle_digital_edge = deferred.append
+        sim.at(edges[6] + 10_000, lambda: [handle_digital_edge(level) for level in deferred])
+
+    sim.at(trigger_us - 1_000, defer_soft_handler)
+    steps = log_steps(sim)
+    sim.run(until_us=edges[-1] + PERIOD_US)
+
+    played = steps_after(steps, START_US)
+    assert played[6] == 6  # the edge before the handler plays on
+    assert played[7:9] == ([7, 6] if mode == "Reverse" else [7, 8])
+    assert not sim.main.reset_pending
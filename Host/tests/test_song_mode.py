@@ -0,0 +1,206 @@
+"""Song mode plays the bank's chain with only two patterns in RAM, prefetching between steps."""
+
+import tracemalloc
+
+from simulator import DIGITAL_INPUT_PIN, DIGITAL_OUTPUT_PIN, Simulator
+
+WIDTH_US = 5_000
+PERIOD_US = 50_000
+ENABLE_US = 400_000
+START_US = 500_000
+END_US = 2_500_000
+
+STEPS = (4, 3, 5)
+CHAIN = [(0, 2), (2, 1), (1, 1)]
+
+
+def pattern_cv(pattern: int, step: int) -> int:
+    return 1000 * (pattern + 1) + step
+
+
+def write_bank(flash_dir: str, patterns: int = len(STEPS), chain=CHAIN) -> None:
+    with Simulator(flash_dir=flash_dir).installed():
+        from pattern_bank import create_bank
+
+        create_bank(
+            "patterns.bin",
+            [
+                ([pattern_cv(pattern, step) for step in range(16)], [1] * 16, STEPS[pattern % len(STEPS)])
+                for pattern in range(patterns)
+            ],
+            chain,
+        )
+
+
+def enable_song(sim: Simulator) -> None:
+    sim.main.song_toggle_menu.value = True
+    sim.main.update_sequencer_values()
+
+
+def test_patterns_switch_on_bar_boundaries(tmp_path):
+    write_bank(str(tmp_path))
+    sim = Simulator(flash_dir=str(tmp_path))
+    sim.clock_pulses(PERIOD_US, WIDTH_US, start_us=START_US, until_us=END_US)
+    sim.at(ENABLE_US, lambda: enable_song(sim))
+    sim.run(until_us=END_US)
+
+    played = [write.value for write in sim.recorder.dac_writes if write.t_us >= START_US]
+    song = []
+    while len(song) < len(played):
+        for pattern, bars in CHAIN:
+            song += [pattern_cv(pattern, step) for step in range(STEPS[pattern])] * bars
+    assert played == song[: len(played)]
+    assert sim.main.song.late_prefetches == 0
+
+
+def test_next_pattern_is_read_between_steps_before_the_boundary(tmp_path):
+    write_bank(str(tmp_path))
+    sim = Simulator(flash_dir=str(tmp_path))
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, start_us=START_US, until_us=END_US)
+    reads = []
+
+    def enable_and_record_reads():
+        enable_song(sim)
+        bank = sim.main.song.bank
+        read_pattern = bank.read_pattern
+
+        def recorded(*args):
+            reads.append(sim.now_us)
+            return read_pattern(*args)
+
+        bank.read_pattern = recorded
+
+    sim.at(ENABLE_US, enable_and_record_reads)
+    sim.run(until_us=END_US)
+
+    # one read per chain entry, in the step before the boundary
+    boundaries = []
+    step = 0
+    while len(boundaries) < len(reads):
+        for pattern, bars in CHAIN:
+            step += STEPS[pattern] * bars
+            boundaries.append(START_US + step * PERIOD_US)
+    assert len(reads) >= 6
+    assert boundaries[len(reads) - 1] > edges[-1] - PERIOD_US
+    for read, boundary in zip(reads, boundaries):
+        assert boundary - 2 * PERIOD_US < read < boundary - WIDTH_US
+    gates = sim.recorder.gate_intervals(DIGITAL_OUTPUT_PIN)
+    assert not any(on <= read < off for on, off in gates for read in reads)
+
+
+def test_late_prefetch_repeats_the_bar(tmp_path):
+    write_bank(str(tmp_path))
+    with Simulator(flash_dir=str(tmp_path)).installed():
+        from pattern_bank import PatternBank, Song
+
+        song = Song(PatternBank())
+        assert song.bank.open()
+        cv_sequence, trigger_sequence = [0] * 16, [0] * 16
+        assert song.start(cv_sequence, trigger_sequence) == 4
+        boundaries = [step for step in range(1, 9) if song.step_played()]  # two bars, never prefetched
+        assert boundaries == []
+        assert song.late_prefetches == 1
+
+        for step in range(1, 5):
+            # due once three of the repeated bar's four steps have played
+            assert song.prefetch(cv_sequence, trigger_sequence) == (step == 4)
+            assert song.step_played() == (step == 4)
+        assert song.position == 1
+        assert cv_sequence[:5] == [pattern_cv(2, step) for step in range(5)]
+
+
+def ram_used_by_song(flash_dir, patterns: int) -> int:
+    flash_dir.mkdir()
+    flash_dir = str(flash_dir)
+    write_bank(flash_dir, patterns, chain=())
+    with Simulator(flash_dir=flash_dir).installed():
+        from pattern_bank import PatternBank, Song
+
+        tracemalloc.start()
+        song = Song(PatternBank())
+        song.bank.open()
+        cv_sequence, trigger_sequence = [0] * 16, [0] * 16
+        song.start(cv_sequence, trigger_sequence)
+        for _ in range(3 * patterns):
+            song.prefetch(cv_sequence, trigger_sequence)
+            song.step_played()
+        used, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        song.bank.close()
+        return used
+
+
+def test_ram_does_not_grow_with_the_bank(tmp_path):
+    small = ram_used_by_song(tmp_path / "small", 10)
+    large = ram_used_by_song(tmp_path / "large", 600)
+    # a copy of the bank would be 600 * 34 bytes, the difference left is CPython boxing the
+    # counters and indexes above 256 (position, reads, pattern count), small ints on the Pico
+    assert large - small < 512
+
+
+def test_a_chain_entry_past_the_last_pattern_is_rejected(tmp_path):
+    write_bank(str(tmp_path), chain=[(0, 1), (3, 1)])
+    with Simulator(flash_dir=str(tmp_path)).installed():
+        from pattern_bank import PatternBank
+
+        bank = PatternBank()
+        assert not bank.open()
+        assert bank.file is None
+
+    sim = Simulator(flash_dir=str(tmp_path))
+    sim.at(ENABLE_US, lambda: enable_song(sim))
+    sim.run(until_us=ENABLE_US + 10_000)
+    assert not sim.main.is_song_mode
+    assert not sim.main.song_toggle_menu.value
+
+
+def test_notes_above_the_dac_range_are_stored_clamped(tmp_path):
+    with Simulator(flash_dir=str(tmp_path)).installed():
+        import mcp4725_musical_scales as sc
+        from pattern_bank import PatternBank, create_bank
+
+        cv_sequence = sc.get_scale_of_12_bit_values(12, "major", 5)[-16:]  # Octaves 5 from C reaches 4896
+        create_bank("patterns.bin", [(cv_sequence, [1] * 16, 16)])
+        bank = PatternBank()
+        assert bank.open()
+        read_cv, read_triggers = [0] * 16, [0] * 16
+        assert bank.read_pattern(0, read_cv, read_triggers) == 16
+        assert read_cv == [min(cv, 0x0FFF) for cv in cv_sequence]
+        assert read_triggers == [1] * 16
+
+
+def test_a_reset_starts_the_bar_over(tmp_path):
+    write_bank(str(tmp_path))
+    sim = Simulator(flash_dir=str(tmp_path))
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, start_us=START_US, until_us=END_US)
+    sim.at(ENABLE_US, lambda: enable_song(sim))
+    reset_us = edges[1] + 20_000  # two steps into the first bar of pattern 0
+    sim.jack(DIGITAL_INPUT_PIN, True, reset_us)
+    sim.jack(DIGITAL_INPUT_PIN, False, reset_us + 5_000)
+    sim.run(until_us=END_US)
+
+    played = [write.value for write in sim.recorder.dac_writes if write.t_us >= START_US]
+    song = [pattern_cv(0, step) for step in range(2)]
+    while len(song) < len(played):
+        for pattern, bars in CHAIN:
+            song += [pattern_cv(pattern, step) for step in range(STEPS[pattern])] * bars
+    assert played == song[: len(played)]
+
+
+def test_a_pattern_is_at_least_as_long_as_the_steps_menu_allows(tmp_path):
+    with Simulator(flash_dir=str(tmp_path)).installed():
+        from pattern_bank import MIN_STEPS, PatternBank, create_bank
+
+        create_bank("patterns.bin", [([1000 + step for step in range(16)], [1] * 16, 1)])
+        bank = PatternBank()
+        assert bank.open()
+        read_cv, read_triggers = [0] * 16, [0] * 16
+        assert bank.read_pattern(0, read_cv, read_triggers) == MIN_STEPS == 2
+        bank.close()
+
+    sim = Simulator(flash_dir=str(tmp_path))
+    sim.clock_pulses(PERIOD_US, WIDTH_US, count=10, start_us=START_US)
+    sim.at(ENABLE_US, lambda: enable_song(sim))
+    sim.run(until_us=START_US + 10 * PERIOD_US)
+    assert sim.main.number_of_steps == sim.main.steps_menu.min_val == 2
+    assert [write.value for write in sim.recorder.dac_writes if write.t_us >= START_US] == [1000, 0] * 5
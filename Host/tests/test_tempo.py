@@ -0,0 +1,101 @@
+"""The tempo tracker follows the clock through jitter, late pulses, tempo changes and stops and predicts the next edge."""
+
+import random
+
+from simulator import CLOCK_INPUT_PIN, DIGITAL_OUTPUT_PIN, Simulator
+
+START_US = 500_000
+PERIOD_US = 100_000  # 16ths at 150 BPM
+WIDTH_US = 5_000
+
+
+def play(sim: Simulator, rising_edges: list[int]) -> None:
+    for edge_us in rising_edges:
+        sim.jack(CLOCK_INPUT_PIN, True, edge_us)
+        sim.jack(CLOCK_INPUT_PIN, False, edge_us + WIDTH_US)
+
+
+def jittery_edges(count: int, period_us: int, jitter_us: int, seed: int = 0, start_us: int = START_US) -> list[int]:
+    rng = random.Random(seed)
+    return [start_us + pulse * period_us + rng.randint(-jitter_us, jitter_us) for pulse in range(count)]
+
+
+def test_one_late_pulse_moves_neither_the_period_nor_the_gates():
+    sim = Simulator(seed=0)
+    edges = jittery_edges(40, PERIOD_US, jitter_us=500)
+    edges[20] += 15_000  # a late pulse
+    play(sim, edges)
+    periods = []
+    for edge_us in edges[10:]:
+        sim.at(edge_us + 2_000, lambda: periods.append(sim.main.tempo.period_us))
+    sim.run(until_us=edges[-1] + PERIOD_US)
+
+    assert all(abs(period_us - PERIOD_US) < PERIOD_US // 50 for period_us in periods)
+    assert sim.main.tempo.changes == 0
+    # TrgLngth 50 % of the estimated period, in whole milliseconds
+    widths = [off_us - on_us for on_us, off_us in sim.recorder.gate_intervals(DIGITAL_OUTPUT_PIN)[5:]]
+    assert all(abs(width_us - PERIOD_US // 2) <= 2_500 for width_us in widths)
+
+
+def test_the_next_edge_is_predicted():
+    sim = Simulator(seed=0)
+    edges = jittery_edges(60, PERIOD_US, jitter_us=300)
+    play(sim, edges)
+    predictions = []
+    for edge_us in edges[8:]:
+        sim.at(edge_us - 5_000, lambda: predictions.append(sim.main.tempo.next_edge_us))
+    sim.run(until_us=edges[-1] + PERIOD_US)
+
+    errors = [abs(predicted_us - edge_us) for predicted_us, edge_us in zip(predictions, edges[8:])]
+    assert max(errors) < 1_500  # the clock's jitter plus the main loop noticing the edge
+    assert sim.main.tempo.jitter_us < 1_000
+
+
+def test_a_tempo_change_is_followed_within_a_few_edges():
+    sim = Simulator(seed=0)
+    slow = jittery_edges(20, PERIOD_US, jitter_us=200)
+    fast = jittery_edges(20, 60_000, jitter_us=200, seed=1, start_us=slow[-1] + 60_000)
+    play(sim, slow + fast)
+    periods = []
+    for edge_us in fast[3:]:
+        sim.at(edge_us + 2_000, lambda: periods.append(sim.main.tempo.period_us))
+    sim.run(until_us=fast[-1] + 60_000)
+
+    assert sim.main.tempo.changes == 1
+    assert all(abs(period_us - 60_000) < 1_500 for period_us in periods)
+
+
+def test_a_stopped_clock_is_detected_and_the_gap_is_not_a_period():
+    sim = Simulator(seed=0)
+    before = sim.clock_pulses(PERIOD_US, WIDTH_US, count=10, start_us=START_US)
+    after = sim.clock_pulses(PERIOD_US, WIDTH_US, count=10, start_us=before[-1] + 3_000_000)
+    stopped = []
+    sim.at(before[-1] + 150_000, lambda: stopped.append(sim.main.is_clock_stopped()))
+    sim.at(before[-1] + 2_500_000, lambda: stopped.append(sim.main.is_clock_stopped()))
+    sim.at(after[0] + 2_000, lambda: stopped.append(sim.main.is_clock_stopped()))
+    sim.run(until_us=after[-1] + 50_000)
+
+    assert stopped == [False, True, False]
+    tempo = sim.main.tempo
+    assert tempo.stops == 1
+    assert tempo.changes == 0
+    assert abs(tempo.period_us - PERIOD_US) < 1_000
+    assert abs(tempo.bpm_x10() - 1500) <= 10
+
+
+def test_edges_the_main_loop_got_to_late_keep_their_own_timestamps():
+    sim = Simulator(seed=0)
+    edges = sim.clock_pulses(PERIOD_US, WIDTH_US, count=30, start_us=START_US)
+    stalls = {10: 20_000, 20: 3 * PERIOD_US}  # edge 10 comes during a flush, edges 20 to 22 fall into a longer stall
+    for edge, length_us in stalls.items():
+        sim.at(edges[edge] - 1_000, lambda length_us=length_us: sim.clock.advance(length_us))
+    last_edges = []
+    sim.at(edges[10] + 25_000, lambda: last_edges.append(sim.main.tempo.last_edge_us))
+    sim.run(until_us=edges[-1] + PERIOD_US // 2)
+
+    tempo = sim.main.tempo
+    assert last_edges == [edges[10]]
+    assert tempo.edges == len(edges)
+    assert tempo.changes == 0 and tempo.stops == 0
+    assert tempo.period_us == PERIOD_US
+    assert tempo.jitter_us < 100
@@ -7,6 +7,7 @@ https://github.com/Allen-Synthesis/EuroPi/blob/main/software/firmware/europi.py
 Changes:
 - Added invert to AnalogueReader
 - Added map_value()
+- Added code() for integer 12 bit reads
 
 """
 
@@ -20,6 +21,7 @@ DEFAULT_SAMPLES = 32
 
 # Standard max int consts.
 MAX_UINT16 = 65535
+MAX_UINT12 = 4095
 
 
 def clamp(value, low, high):
@@ -81,6 +83,17 @@ class AnalogueReader:
         else:
             return clamp(value, 0.0, 1.0)
 
+    def code(self, samples=None):
+        """Return the over-sampled reading as a 12 bit ADC code (0 - 4095), using integer math only."""
+        samples = samples or self._samples
+        value = 0
+        for _ in range(samples):
+            value += self.pin.read_u16()
+        value = (value // samples) >> 4
+        if self.invert:
+            return MAX_UINT12 - value
+        return value
+
     def range(self, steps=100, samples=None, deadzone=None):
         """Return a value (upper bound excluded) chosen by the current voltage value."""
         if not isinstance(steps, int):
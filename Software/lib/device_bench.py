@@ -0,0 +1,104 @@
+"""
+On-device benchmarks
+
+Times what the host benchmarks can not: DAC writes and display flushes at the configured
+I2C frequency, ADC reads, main loop iterations and a step advance on the RP2040 itself.
+Every benchmark calls its code path for WINDOW_US and counts the calls, in batches so the
+clock check does not dominate fast paths like an ADC read.
+The firmware only runs them while the clock is stopped, and a run is abandoned as soon as
+interrupted() returns True, e.g. on a clock edge, so a performance is never held up.
+"""
+
+import time
+
+WINDOW_US = 250_000
+ADC_BATCH = 64
+NOT_RUN = -1
+
+
+class DeviceBench:
+    def __init__(self, window_us: int = WINDOW_US) -> None:
+        self.window_us = window_us
+        self.reset()
+
+    def reset(self) -> None:
+        self.dac_writes_per_s = NOT_RUN
+        self.full_flushes_per_s = NOT_RUN
+        self.partial_flushes_per_s = NOT_RUN
+        self.adc_samples_per_s = NOT_RUN
+        self.loop_hz = NOT_RUN
+        self.step_advance_us = NOT_RUN
+        self.aborted = False  # a clock was running, the results are incomplete
+
+    def skip(self) -> None:
+        """Records that the benchmarks were not run because a clock is running"""
+        self.reset()
+        self.aborted = True
+
+    def _time(self, call, batch: int, interrupted):
+        """Returns (calls, elapsed us) of calling call() for the window, None if interrupted"""
+        calls = 0
+        start_us = time.ticks_us()
+        while True:
+            for _ in range(batch):
+                call()
+            calls += batch
+            elapsed_us = time.ticks_diff(time.ticks_us(), start_us)
+            if interrupted():
+                return None
+            if elapsed_us >= self.window_us:
+                return calls, elapsed_us
+
+    def _per_second(self, call, interrupted, batch: int = 1) -> int:
+        timed = self._time(call, batch, interrupted)
+        if timed is None:
+            self.aborted = True
+            return NOT_RUN
+        calls, elapsed_us = timed
+        return calls * 1_000_000 // elapsed_us
+
+    def run(self, dac_write, full_flush, partial_flush, adc_sample, loop_iteration, step_advance, interrupted) -> bool:
+        """
+        Runs every benchmark, each argument is a function that runs its code path once.
+        Returns False if interrupted() cut the run short, the benchmarks left are NOT_RUN.
+        """
+        self.reset()
+        benchmarks = (
+            ("dac_writes_per_s", dac_write, 1),
+            ("full_flushes_per_s", full_flush, 1),
+            ("partial_flushes_per_s", partial_flush, 1),
+            ("adc_samples_per_s", adc_sample, ADC_BATCH),
+            ("loop_hz", loop_iteration, 1),
+        )
+        for name, call, batch in benchmarks:
+            setattr(self, name, self._per_second(call, interrupted, batch))
+            if self.aborted:
+                return False
+        steps_per_s = self._per_second(step_advance, interrupted)
+        if self.aborted:
+            return False
+        self.step_advance_us = 1_000_000 // steps_per_s
+        return True
+
+    def summary_lines(self) -> list[str]:
+        """Lines of at most 16 characters for the 128px wide display"""
+        if self.aborted:
+            return ["Clock running", "stop it and", "open again"]
+        return [
+            f"DAC:{self.dac_writes_per_s:>9}/s",
+            f"Flush:{self.full_flushes_per_s:>7}/s",
+            f"Part:{self.partial_flushes_per_s:>8}/s",
+            f"ADC:{self.adc_samples_per_s:>9}/s",
+            f"Loop:{self.loop_hz:>8}Hz",
+            f"Step:{self.step_advance_us:>8}us",
+        ]
+
+    def dump(self) -> None:
+        """Prints the results over USB serial"""
+        print("benchmark,value,unit")
+        print(f"dac_writes,{self.dac_writes_per_s},1/s")
+        print(f"full_flushes,{self.full_flushes_per_s},1/s")
+        print(f"partial_flushes,{self.partial_flushes_per_s},1/s")
+        print(f"adc_samples,{self.adc_samples_per_s},1/s")
+        print(f"main_loop,{self.loop_hz},Hz")
+        print(f"step_advance,{self.step_advance_us},us")
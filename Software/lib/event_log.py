@@ -0,0 +1,168 @@
+"""
+Event log for deterministic replay
+
+Records what goes into the sequencer and what comes out of it, in a preallocated ring of
+8 byte records, little endian: ticks_us (u32), kind (u8), arg (u8), value (u16)
+
+kind        arg                            value
+KEYFRAME    number of records that follow  0
+STATE       state field, see below         state value
+PARAMETER   index in the main menu         setting: selected index, number or 1/0 for toggles
+CLOCK_RISE  0                              0
+CLOCK_FALL  0                              0
+DIGITAL     pin level                      0
+STEP        step | gate << 7               DAC value written at the step, NO_CV if none
+
+The sequencer draws its random numbers from prng.Xorshift32, so a keyframe (the PRNG state,
+the sequences and every setting) plus the clock edges and parameter changes after it decide
+every later step. Keyframes are written between steps, every keyframe_steps steps, so when the
+ring has wrapped a replay starts from the oldest keyframe left in it.
+Clock edges are logged when the main loop sees them. Analog inputs are not logged.
+
+dump() writes the ring to flash, oldest record first, after a "<2sBBHHI" header:
+magic b"EL", version, record size, capacity, records in the file, records logged since clear().
+Host/replay feeds a dump through the simulator and checks it outputs the same steps.
+"""
+
+import machine
+import struct
+import time
+import logger
+
+EVENT_LOG_PATH = "events.bin"
+MAGIC = b"EL"
+VERSION = 1
+RECORD_SIZE = 8
+HEADER_SIZE = 12
+DEFAULT_CAPACITY = 1024
+DEFAULT_KEYFRAME_STEPS = 64
+NO_CV = 0xFFFF
+GATE_FLAG = 0x80
+
+# kinds
+KEYFRAME = 1
+STATE = 2
+PARAMETER = 3
+CLOCK_RISE = 4
+CLOCK_FALL = 5
+DIGITAL = 6
+STEP = 7
+
+# state fields of a keyframe
+PRNG_HIGH = 0
+PRNG_LOW = 1
+CURRENT_STEP = 2
+NUMBER_OF_STEPS = 3
+CLOCK_MS = 4
+REVERSE = 5  # 1 while the sequence plays backwards
+STATE_FIELDS = 6
+SEQUENCE = 16  # SEQUENCE + step: 12 bit CV | gate << 15
+
+
+class EventLog:
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, keyframe_steps: int = DEFAULT_KEYFRAME_STEPS) -> None:
+        self.capacity = capacity
+        self.keyframe_steps = keyframe_steps
+        self.buffer = bytearray(capacity * RECORD_SIZE)
+        self._header = bytearray(HEADER_SIZE)
+        self.index = 0  # next record to write
+        self.total = 0
+        self.steps = 0  # STEP records since clear()
+        self.keyframes = 0
+        self._keyframe_step = 0
+
+    def clear(self) -> None:
+        self.index = 0
+        self.total = 0
+        self.steps = 0
+        self.keyframes = 0
+        self._keyframe_step = 0
+
+    def _claim(self, records: int) -> int:
+        """Reserves consecutive records, the digital input IRQ logs too. Returns the first index."""
+        state = machine.disable_irq()
+        index = self.index
+        self.index = (index + records) % self.capacity
+        self.total += records
+        machine.enable_irq(state)
+        return index
+
+    def _write(self, index: int, t_us: int, kind: int, arg: int, value: int) -> None:
+        struct.pack_into("<IBBH", self.buffer, (index % self.capacity) * RECORD_SIZE, t_us, kind, arg, value)
+
+    def record(self, kind: int, arg: int = 0, value: int = 0) -> None:
+        t_us = time.ticks_us()
+        self._write(self._claim(1), t_us, kind, arg, value)
+
+    def step(self, step: int, gate: int, cv: int) -> None:
+        """Logs the output of a step, gate is 1 or 0, cv is the DAC value written (NO_CV if none)"""
+        if 0x0FFF < cv < NO_CV:
+            cv = 0x0FFF  # the DAC clamps the top of a 5 octave scale
+        self.record(STEP, step | GATE_FLAG if gate else step, cv)
+        self.steps += 1
+
+    def keyframe_due(self) -> bool:
+        return self.keyframes == 0 or self.steps - self._keyframe_step >= self.keyframe_steps
+
+    def keyframe(self, prng, current_step: int, number_of_steps: int, clock_ms: int, cv_sequence, trigger_sequence, settings, reverse: bool = False) -> None:
+        """
+        Logs everything the coming steps depend on as one block of records.
+        settings holds the main menu values by menu index, -1 for menus without a value.
+        """
+        parameters = 0
+        for value in settings:
+            if value >= 0:
+                parameters += 1
+        steps = len(cv_sequence)
+        records = STATE_FIELDS + steps + parameters
+        t_us = time.ticks_us()
+        index = self._claim(1 + records)
+        self._write(index, t_us, KEYFRAME, records, 0)
+        self._write(index + 1, t_us, STATE, PRNG_HIGH, prng.high)
+        self._write(index + 2, t_us, STATE, PRNG_LOW, prng.low)
+        self._write(index + 3, t_us, STATE, CURRENT_STEP, current_step)
+        self._write(index + 4, t_us, STATE, NUMBER_OF_STEPS, number_of_steps)
+        self._write(index + 5, t_us, STATE, CLOCK_MS, min(clock_ms, 0xFFFF))
+        self._write(index + 6, t_us, STATE, REVERSE, 1 if reverse else 0)
+        index += 1 + STATE_FIELDS
+        for step in range(steps):
+            self._write(index, t_us, STATE, SEQUENCE + step, min(cv_sequence[step], 0x0FFF) | (trigger_sequence[step] << 15))
+            index += 1
+        for menu_index in range(len(settings)):
+            if settings[menu_index] >= 0:
+                self._write(index, t_us, PARAMETER, menu_index, settings[menu_index])
+                index += 1
+        self.keyframes += 1
+        self._keyframe_step = self.steps
+
+    def digital_edge_irq(self, pin) -> None:
+        """Logs the digital input, for a pin IRQ that only logs"""
+        self.record(DIGITAL, pin.value())
+
+    def dump(self, path: str = EVENT_LOG_PATH) -> bool:
+        """Writes the logged records to flash, oldest first. Returns False if the write failed."""
+        count = min(self.total, self.capacity)
+        struct.pack_into("<2sBBHHI", self._header, 0, MAGIC, VERSION, RECORD_SIZE, self.capacity, count, self.total)
+        view = memoryview(self.buffer)
+        split = self.index * RECORD_SIZE
+        try:
+            with open(path, "wb") as file:
+                file.write(self._header)
+                if count == self.capacity:
+                    file.write(view[split:])
+                file.write(view[:split])
+        except OSError:
+            logger.error("Event log dump failed:", path)
+            return False
+        logger.info("Event log dumped, records:", count)
+        return True
+
+    def summary_lines(self) -> list[str]:
+        """Lines of at most 16 characters for the 128px wide display"""
+        return [
+            f"Events:{self.total:>9}",
+            f"Kept:{min(self.total, self.capacity):>11}",
+            f"Steps:{self.steps:>10}",
+            f"Keyframes:{self.keyframes:>6}",
+            "Press: dump",
+        ]
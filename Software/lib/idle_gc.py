@@ -0,0 +1,74 @@
+"""
+Garbage collection in idle windows
+
+In fixed memory mode automatic collections are switched off (gc.disable()) and the main
+loop calls collect() in the idle window after each step, when the gate is off and the clock
+is low. A collection only runs if the time left before the next expected clock edge is at
+least the pause budget, so a GC pause cannot delay a step.
+MicroPython still collects on its own if an allocation finds the heap full, which is why
+the firmware allocates its buffers at boot and the edge handler does not allocate.
+
+The self-test compares gc.mem_free() before and after the edge handler: free memory only
+grows when a collection ran, so any collection inside the handler is counted and logged.
+gc.mem_free() walks the whole heap, so the self-test is only for diagnostics.
+"""
+
+import gc
+import time
+import logger
+
+DEFAULT_PAUSE_BUDGET_US = 5_000
+
+
+class IdleCollector:
+    def __init__(self, pause_budget_us: int = DEFAULT_PAUSE_BUDGET_US) -> None:
+        self.pause_budget_us = pause_budget_us
+        self.enabled = False
+        self.due = False  # a step was output since the last collection
+        self.collections = 0
+        self.skipped = 0  # steps whose idle window was shorter than the budget
+        self.last_pause_us = 0
+        self.max_pause_us = 0
+        self.edge_collections = 0
+        self._free_before_edge = 0
+
+    def set_enabled(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self.due = False
+        if enabled:
+            gc.collect()
+            gc.disable()
+        else:
+            gc.enable()
+
+    def collect(self, idle_us: int) -> bool:
+        """
+        Collects once per step if idle_us, the time until the next expected clock edge,
+        fits the pause budget. Returns True if a collection ran.
+        """
+        if not self.due:
+            return False
+        self.due = False
+        if idle_us < self.pause_budget_us:
+            self.skipped += 1
+            return False
+        start_us = time.ticks_us()
+        gc.collect()
+        pause_us = time.ticks_diff(time.ticks_us(), start_us)
+        self.collections += 1
+        self.last_pause_us = pause_us
+        if pause_us > self.max_pause_us:
+            self.max_pause_us = pause_us
+        if pause_us > self.pause_budget_us:
+            logger.warning("GC pause over budget us:", pause_us)
+        return True
+
+    def edge_started(self) -> None:
+        """Self-test: call first thing in the edge handler"""
+        self._free_before_edge = gc.mem_free()
+
+    def edge_finished(self) -> None:
+        """Self-test: call last thing in the edge handler"""
+        if gc.mem_free() > self._free_before_edge:
+            self.edge_collections += 1
+            logger.warning("GC inside edge handler, count:", self.edge_collections)
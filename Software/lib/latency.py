@@ -0,0 +1,87 @@
+"""
+Clock to output latency instrumentation
+
+Each clock step stores when the clock edge was detected (ticks_us) and how many
+microseconds later the DAC write completed and the gate turned on.
+The ring buffer is preallocated, so recording a step does not allocate.
+Statistics (min, mean, max, 99th percentile and jitter) are only computed on demand.
+"""
+
+from array import array
+
+DEFAULT_SIZE = 128
+NO_GATE = -1  # the step had no gate
+
+
+class LatencyProbe:
+    def __init__(self, size: int = DEFAULT_SIZE) -> None:
+        self.size = size
+        self.edge_us = array("l", (0 for _ in range(size)))
+        self.cv_latency_us = array("l", (0 for _ in range(size)))
+        self.gate_latency_us = array("l", (NO_GATE for _ in range(size)))
+        self.index = 0  # next slot to write
+        self.count = 0
+
+    def clear(self) -> None:
+        self.index = 0
+        self.count = 0
+
+    def record(self, edge_us: int, cv_latency_us: int, gate_latency_us: int = NO_GATE) -> None:
+        """Stores one step, overwriting the oldest one once the buffer is full"""
+        index = self.index
+        self.edge_us[index] = edge_us
+        self.cv_latency_us[index] = cv_latency_us
+        self.gate_latency_us[index] = gate_latency_us
+        index += 1
+        self.index = 0 if index == self.size else index
+        if self.count < self.size:
+            self.count += 1
+
+    def _ordered_indexes(self):
+        """Slot indexes from the oldest to the newest step"""
+        start = self.index - self.count
+        for i in range(self.count):
+            yield (start + i) % self.size
+
+    def stats(self, latencies: array) -> dict | None:
+        """
+        Returns min, mean, max, 99th percentile (p99) and jitter (standard deviation) in microseconds.
+        Returns None if nothing was recorded.
+        """
+        values = sorted(latencies[i] for i in self._ordered_indexes() if latencies[i] != NO_GATE)
+        n = len(values)
+        if n == 0:
+            return None
+        mean = sum(values) / n
+        variance = sum((value - mean) * (value - mean) for value in values) / n
+        return {
+            "n": n,
+            "min": values[0],
+            "mean": int(mean),
+            "max": values[-1],
+            "p99": values[(99 * (n - 1)) // 100],
+            "jitter": int(variance**0.5),
+        }
+
+    def cv_stats(self) -> dict | None:
+        return self.stats(self.cv_latency_us)
+
+    def gate_stats(self) -> dict | None:
+        return self.stats(self.gate_latency_us)
+
+    def summary_lines(self) -> list[str]:
+        """Lines of at most 16 characters for the 128px wide display"""
+        lines = [f"Steps: {self.count}"]
+        for label, stats in (("CV", self.cv_stats()), ("Gt", self.gate_stats())):
+            if stats is None:
+                lines.append(f"{label}: no data")
+                continue
+            for name, key in (("min", "min"), ("avg", "mean"), ("max", "max"), ("p99", "p99"), ("jit", "jitter")):
+                lines.append(f"{label} {name}:{stats[key]:>6}us")
+        return lines
+
+    def dump_csv(self) -> None:
+        """Prints every recorded step over USB serial, oldest first"""
+        print("edge_us,cv_us,gate_us")
+        for i in self._ordered_indexes():
+            print(f"{self.edge_us[i]},{self.cv_latency_us[i]},{self.gate_latency_us[i]}")
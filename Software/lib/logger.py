@@ -0,0 +1,145 @@
+"""
+Buffered, level filtered logging
+
+Messages below `level` are dropped with a single comparison: nothing is formatted and,
+because every function takes a fixed number of arguments instead of *args, no tuple is built.
+Accepted messages are stored by reference in a preallocated ring buffer together with their
+level and ticks_ms. They are only formatted and printed by flush(), which the main loop calls
+in idle time (idle()) so a USB host that is attached but not reading cannot block a clock step.
+Values are formatted when flushed, so a logged list shows its contents at flush time.
+When the buffer is full the oldest message is overwritten and counted as dropped.
+
+Serial commands (one character each, read by idle() when the port has input):
+f   flush every buffered message now
+d   level DEBUG
+i   level INFO
+w   level WARNING
+e   level ERROR
+o   logging off
+"""
+
+from array import array
+from micropython import const
+import sys
+import time
+
+DEBUG = const(10)
+INFO = const(20)
+WARNING = const(30)
+ERROR = const(40)
+OFF = const(50)
+
+LEVEL_NAMES = {DEBUG: "D", INFO: "I", WARNING: "W", ERROR: "E"}
+LEVEL_COMMANDS = {"d": DEBUG, "i": INFO, "w": WARNING, "e": ERROR, "o": OFF}
+
+BUFFER_SIZE = 32
+LINES_PER_IDLE = 2  # flushing one line takes ~100 us over USB, keep idle() short
+_NO_VALUE = object()
+
+level = INFO
+
+_messages = [None] * BUFFER_SIZE
+_values = [None] * BUFFER_SIZE
+_levels = bytearray(BUFFER_SIZE)
+_ticks = array("L", (0 for _ in range(BUFFER_SIZE)))
+_index = 0  # next slot to write
+_count = 0
+dropped = 0
+
+try:
+    import select
+
+    _poller = select.poll()
+    _poller.register(sys.stdin, select.POLLIN)
+except (ImportError, AttributeError, OSError, ValueError):
+    _poller = None  # no serial input to read commands from
+
+
+def set_level(new_level: int) -> None:
+    global level
+    level = new_level
+
+
+def pending() -> int:
+    """Number of buffered messages"""
+    return _count
+
+
+def log(message_level: int, message: str, value=_NO_VALUE) -> None:
+    global _index, _count, dropped
+    if message_level < level:
+        return
+    index = _index
+    _messages[index] = message
+    _values[index] = value
+    _levels[index] = message_level
+    _ticks[index] = time.ticks_ms()
+    index += 1
+    _index = 0 if index == BUFFER_SIZE else index
+    if _count < BUFFER_SIZE:
+        _count += 1
+    else:
+        dropped += 1
+
+
+def debug(message: str, value=_NO_VALUE) -> None:
+    if DEBUG >= level:
+        log(DEBUG, message, value)
+
+
+def info(message: str, value=_NO_VALUE) -> None:
+    if INFO >= level:
+        log(INFO, message, value)
+
+
+def warning(message: str, value=_NO_VALUE) -> None:
+    if WARNING >= level:
+        log(WARNING, message, value)
+
+
+def error(message: str, value=_NO_VALUE) -> None:
+    if ERROR >= level:
+        log(ERROR, message, value)
+
+
+def flush(max_lines: int = BUFFER_SIZE) -> None:
+    """Prints up to max_lines buffered messages, oldest first"""
+    global _count, dropped
+    if dropped:
+        print(f"{time.ticks_ms()} W log: {dropped} dropped")
+        dropped = 0
+    while _count and max_lines:
+        index = (_index - _count) % BUFFER_SIZE
+        value = _values[index]
+        prefix = f"{_ticks[index]} {LEVEL_NAMES[_levels[index]]} {_messages[index]}"
+        if value is _NO_VALUE:
+            print(prefix)
+        else:
+            print(prefix, value)
+        _messages[index] = None
+        _values[index] = None  # do not keep logged objects alive
+        _count -= 1
+        max_lines -= 1
+
+
+def poll_command() -> None:
+    """Reads and runs one serial command if one is waiting"""
+    if _poller is None:
+        return
+    for _ in _poller.ipoll(0):  # ipoll does not allocate a result list
+        run_command(sys.stdin.read(1))
+
+
+def run_command(command: str) -> None:
+    if command == "f":
+        flush()
+    elif command in LEVEL_COMMANDS:
+        set_level(LEVEL_COMMANDS[command])
+        print("log level:", level)
+
+
+def idle() -> None:
+    """Call when nothing time critical is due, e.g. between clock steps"""
+    poll_command()
+    if _count:
+        flush(LINES_PER_IDLE)
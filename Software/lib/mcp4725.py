@@ -6,6 +6,7 @@ All credits go to wayoda
 """
 
 # Library for the MCP4725 I2C bus DAC
+import micropython
 from machine import I2C
 
 # The MCP4725 has support from 2 addresses
@@ -21,10 +22,12 @@ class MCP4725:
         self.address = address
         self._writeBuffer = bytearray(2)
 
+    @micropython.native
     def write(self, value):
         if value < 0:
             value = 0
-        value = value & 0xFFF
+        elif value > 0xFFF:
+            value = 0xFFF  # the top of a 5 octave scale is above the DAC's range
         self._writeBuffer[0] = (value >> 8) & 0xFF
         self._writeBuffer[1] = value & 0xFF
         return self.i2c.writeto(self.address, self._writeBuffer) == 2
@@ -56,7 +59,8 @@ class MCP4725:
         # check value range
         if value < 0:
             value = 0
-        value = value & 0xFFF
+        elif value > 0xFFF:
+            value = 0xFFF
         buf.append(value >> 4)
         buf.append((value & 0x0F) << 4)
         return self.i2c.writeto(self.address, buf) == 3
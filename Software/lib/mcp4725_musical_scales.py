@@ -91,6 +91,24 @@ def get_scale_of_12_bit_values(starting_note: int = 0, scale_interval: str = "io
     return dac_scale
 
 
+def fill_12_bit_values(values, starting_note: int = 0, scale_interval: str = "ionian", octaves: int = 1) -> int:
+    """Writes the 12 bit values of a scale into a preallocated array and returns how many were written.
+
+    Same values as get_scale_of_12_bit_values() without building any lists.
+    values needs room for octaves * 12 + 1 entries.
+    """
+    note = starting_note
+    values[0] = note * multiplier
+    length = 1
+    intervals = scale_intervals[scale_interval]
+    for octave in range(0, octaves):
+        for interval in intervals:
+            note += interval
+            values[length] = note * multiplier
+            length += 1
+    return length
+
+
 def get_intervals() -> list[str]:
     """Returns a list of available scale intervals to choose from"""
     intervals_list = list(scale_intervals.keys())
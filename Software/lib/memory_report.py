@@ -0,0 +1,133 @@
+"""
+Heap usage report
+
+snapshot() runs a collection, then stores the allocated and free heap bytes and the largest
+free block. The largest free block shows fragmentation: a heap can have plenty of free
+bytes and still fail to allocate a framebuffer if no single block is big enough.
+It is parsed from the "max free sz" line of micropython.mem_info(), captured with
+os.dupterm(). Ports without dupterm fall back to probing with bytearray allocations.
+
+measure_imports() imports modules one by one and records how much each one allocated.
+A module imported by an earlier one is counted there, so list dependencies first.
+Later `import` statements of the same modules are free, they come from sys.modules.
+
+Before the first note is out, snapshot() and measure_imports() are called with collect=False:
+no collection and no mem_info() (the largest free block is unknown), only gc.mem_alloc() readings.
+Garbage left by compiling a module is then counted with it, precompiled .mpy modules leave little.
+"""
+
+import gc
+import io
+import micropython
+import os
+
+BYTES_PER_BLOCK = 16  # MicroPython's GC block size on 32 bit ports
+UNKNOWN = -1
+
+
+class _Capture(io.IOBase):
+    """A dupterm stream that keeps what is printed"""
+
+    def __init__(self) -> None:
+        self.data = bytearray()
+
+    def write(self, data) -> int:
+        self.data.extend(data)
+        return len(data)
+
+    def readinto(self, buffer):
+        return None
+
+
+def _largest_free_block_from_mem_info() -> int:
+    capture = _Capture()
+    previous = os.dupterm(capture)
+    try:
+        micropython.mem_info()
+    finally:
+        os.dupterm(previous)
+    text = bytes(capture.data).decode()
+    start = text.find("max free sz:")
+    if start == -1:
+        return UNKNOWN
+    digits = ""
+    for char in text[start + len("max free sz:"):].lstrip():
+        if not char.isdigit():
+            break
+        digits += char
+    return int(digits) * BYTES_PER_BLOCK if digits else UNKNOWN
+
+
+def _largest_free_block_by_probing() -> int:
+    """Binary search for the biggest bytearray that can be allocated"""
+    low, high = 0, gc.mem_free()
+    while low < high:
+        size = (low + high + 1) // 2
+        try:
+            block = bytearray(size)
+            del block
+            low = size
+        except MemoryError:
+            high = size - 1
+    return low
+
+
+def largest_free_block() -> int:
+    if hasattr(os, "dupterm"):
+        try:
+            return _largest_free_block_from_mem_info()
+        except (OSError, ValueError):
+            pass
+    return _largest_free_block_by_probing()
+
+
+class MemoryReport:
+    def __init__(self) -> None:
+        self.snapshots = []  # (name, allocated, free, largest free block)
+        self.modules = []  # (name, bytes allocated by the import)
+
+    def snapshot(self, name: str, collect: bool = True) -> None:
+        """Records the heap under name, replacing an earlier snapshot of the same name"""
+        if collect:
+            gc.collect()
+        allocated = gc.mem_alloc()
+        free = gc.mem_free()
+        snapshot = (name, allocated, free, largest_free_block() if collect else UNKNOWN)
+        for i, existing in enumerate(self.snapshots):
+            if existing[0] == name:
+                self.snapshots[i] = snapshot
+                return
+        self.snapshots.append(snapshot)
+
+    def measure_imports(self, module_names, collect: bool = True) -> None:
+        if collect:
+            gc.collect()
+        before = gc.mem_alloc()
+        for name in module_names:
+            __import__(name)
+            if collect:
+                gc.collect()  # also frees the compiler's garbage, only what the module keeps is counted
+            after = gc.mem_alloc()
+            self.modules.append((name, after - before))
+            before = after
+
+    def summary_lines(self) -> list[str]:
+        """Lines of at most 16 characters for the 128px wide display"""
+        lines = ["kB   use fre blk"]
+        for name, allocated, free, largest in self.snapshots:
+            largest_text = "?" if largest == UNKNOWN else str(largest // 1024)
+            lines.append(f"{name[:4]:<4}{allocated // 1024:>4}{free // 1024:>4}{largest_text:>4}")
+        if self.modules:
+            lines.append("import     bytes")
+            for name, allocated in self.modules:
+                lines.append(f"{name[:10]:<10}{allocated:>6}")
+        return lines
+
+    def dump(self) -> None:
+        """Prints the report over USB serial"""
+        print("snapshot,alloc,free,largest_free")
+        for name, allocated, free, largest in self.snapshots:
+            print(f"{name},{allocated},{free},{largest}")
+        print("module,import_bytes")
+        for name, allocated in self.modules:
+            print(f"{name},{allocated}")
@@ -33,15 +33,22 @@ Submenus (implemented)
         - a list of strings
     - Numerical value range menu
         - a list from min to max value
+    - Toggle
+        - a boolean flipped by the button
+    - Screens
+        - like a summary of what is going on
+        - read only lines, scrolled with the encoder, the button goes back to the main menu
 
 Submenus (to implement)
     - Button
         - actions: press, hold
-    - Screens
-        - like a summary of what is going on
 
 # todo put below in a readme
 How the menu system works:
+SETTING UP THE HARDWARE:
+The display and encoder are set up when the MainMenu is created, unless init_display() and init_encoder()
+were called before (for example to share an I2C bus or to spread the work out).
+
 SETTING SUBMENUS:
 First, you would have to create instances of submenus in your main program.
 Then you can put those instances in a list called submenu_list.
@@ -68,6 +75,7 @@ import machine
 from ssd1306 import SSD1306_I2C
 from rotary_irq_rp2 import RotaryIRQ
 from mp_button import Button
+import logger
 
 # Pins
 SDA_PIN = 16
@@ -81,15 +89,31 @@ ROTARY_BUTTON_PIN = 20
 rotary_val_old: int = -1
 rotary_val_new: int = 0
 
-rotary = RotaryIRQ(
-    pin_num_clk=ROTARY_CLK_PIN,
-    pin_num_dt=ROTARY_DT_PIN,
-    reverse=False,
-    pull_up=True,
-    range_mode=RotaryIRQ.RANGE_BOUNDED,
-)
-i2c = machine.I2C(0, sda=machine.Pin(SDA_PIN), scl=machine.Pin(SCL_PIN))
-display = SSD1306_I2C(DISPLAY_WIDTH, DISPLAY_HEIGHT, i2c)
+# the hardware is set up by init_display() and init_encoder(), not on import,
+# so a program can start its time critical outputs first
+rotary = None
+i2c = None
+display = None
+
+
+def init_display(i2c_bus=None) -> None:
+    """Sets up the display, which runs its init sequence and clears the screen (about 25 ms at 400 kHz)"""
+    global i2c, display
+    if i2c_bus is None:
+        i2c_bus = machine.I2C(0, sda=machine.Pin(SDA_PIN), scl=machine.Pin(SCL_PIN))
+    i2c = i2c_bus
+    display = SSD1306_I2C(DISPLAY_WIDTH, DISPLAY_HEIGHT, i2c)
+
+
+def init_encoder() -> None:
+    global rotary
+    rotary = RotaryIRQ(
+        pin_num_clk=ROTARY_CLK_PIN,
+        pin_num_dt=ROTARY_DT_PIN,
+        reverse=False,
+        pull_up=True,
+        range_mode=RotaryIRQ.RANGE_BOUNDED,
+    )
 
 
 class MainMenu:
@@ -116,6 +140,10 @@ class MainMenu:
         self.menu_start_index = menu_start_index
         self.highlighted_index = highlighted_index
         self.current_menu_index = current_menu_index
+        if display is None:
+            init_display()
+        if rotary is None:
+            init_encoder()
         self.button = Button(
             ROTARY_BUTTON_PIN, internal_pullup=True, callback=self.button_action
         )
@@ -139,13 +167,11 @@ class MainMenu:
         display.rect(0, 0, display.width, 15, 1)
 
         # draw submenu lines
-        # print("---Submenu lines---")
         for i in range(
             min(self.submenus_length - self.menu_start_index, self.total_lines)
         ):
             item_index = self.menu_start_index + i
-            submenu_text_line = self.submenus[item_index].__repr__()
-            # print(submenu_text_line)
+            submenu_text_line = self.submenus[item_index].label()
             if item_index == self.highlighted_index:
                 # draw highlighted item
                 display.fill_rect(
@@ -156,19 +182,18 @@ class MainMenu:
                     1,
                 )
                 display.text(
-                    f"{submenu_text_line}",
+                    submenu_text_line,
                     0,
                     (i * (line_height + spacer)) + pixel_y_shift,
                     0,
                 )
             else:
                 display.text(
-                    f"{submenu_text_line}",
+                    submenu_text_line,
                     0,
                     (i * (line_height + spacer)) + pixel_y_shift,
                     1,
                 )
-        # print("-------------------")
         display.show()
 
     def scroll_main_menu(self, index) -> None:
@@ -205,7 +230,7 @@ class MainMenu:
     def button_action(self, pin, event) -> None:
         global rotary_val_new
         if event == Button.PRESSED:
-            print("current_menu_index:", self.current_menu_index)
+            logger.debug("current_menu_index:", self.current_menu_index)
             if self.current_menu_index == -1:
                 # button pressed in main menu
                 # latch on submenu selected
@@ -267,12 +292,33 @@ class MainMenu:
 
 
 class Submenu:
-    """A base class of submenus"""
+    """
+    A base class of submenus
+
+    label() returns the "name:value" line shown in the main menu.
+    Labels are memoized per value, so redrawing the main menu does not allocate new strings.
+    """
 
     def __init__(self, name: str, selected, button: Button) -> None:
         self.name = name
         self.selected = selected
         self.button = button
+        self._labels = {}
+
+    def label_value(self):
+        """The value shown after the name in the main menu"""
+        return self.selected
+
+    def label(self) -> str:
+        value = self.label_value()
+        label = self._labels.get(value)
+        if label is None:
+            label = f"{self.name}:{value}"
+            self._labels[value] = label
+        return label
+
+    def __repr__(self) -> str:
+        return self.label()
 
 
 class SingleSelectVerticalScrollMenu(Submenu):
@@ -294,11 +340,24 @@ class SingleSelectVerticalScrollMenu(Submenu):
         self.menu_start_index = 0
         self.total_lines = total_lines
         self.highlighted_index = 0
+        # every string drawn is built once here instead of on every redraw
+        self.selected_index = items.index(selected)
+        self.starred_items = ["*" + item for item in items]
+        self.labels = [
+            f"{name}:{item if len(item) < 9 else remove_vowels(item)}" for item in items
+        ]
+        self.titles = [
+            f"{name}:{item if len(item) <= 9 else remove_vowels(item)}" for item in items
+        ]
 
     def set_selected(self, selected: int) -> None:
         """Sets selected attribute to the referenced index's string value from the items list"""
+        self.selected_index = selected
         self.selected = self.items[selected]
 
+    def label(self) -> str:
+        return self.labels[self.selected_index]
+
     def set_menu_start_index(self, menu_start_index) -> None:
         """
         menu_start_index determines the first item that will be shown in the display.
@@ -328,13 +387,7 @@ class SingleSelectVerticalScrollMenu(Submenu):
 
         # shift all item positions down to prevent clipping issues
         display.fill(0)
-        display.text(
-            f"{self.name}:{self.selected if len(
-            self.selected) <= 9 else remove_vowels(self.selected)}",
-            2,
-            4,
-            1,
-        )
+        display.text(self.titles[self.selected_index], 2, 4, 1)
         display.rect(0, 0, 128, 15, 1)
         for i in range(min(len(self.items) - self.menu_start_index, self.total_lines)):
             item_index = self.menu_start_index + i
@@ -350,8 +403,8 @@ class SingleSelectVerticalScrollMenu(Submenu):
                 # selected
                 display.text(
                     (
-                        "*" + self.items[item_index]
-                        if self.selected == self.items[item_index]
+                        self.starred_items[item_index]
+                        if item_index == self.selected_index
                         else self.items[item_index]
                     ),
                     0,
@@ -361,8 +414,8 @@ class SingleSelectVerticalScrollMenu(Submenu):
             else:
                 display.text(
                     (
-                        "*" + self.items[item_index]
-                        if self.selected == self.items[item_index]
+                        self.starred_items[item_index]
+                        if item_index == self.selected_index
                         else self.items[item_index]
                     ),
                     0,
@@ -388,17 +441,9 @@ class SingleSelectVerticalScrollMenu(Submenu):
             self.scroll(rotary_val_new)
             self.set_highlighted_index(rotary_val_new)
             self.display_menu()
-            print("---")
-            print("Menu Start Index:", self.menu_start_index)
-            print("Highlighted Index:", self.highlighted_index)
-            print("Number of submenus:", self.total_lines)
-            print("---")
-
-    def __repr__(self) -> str:
-        selected_shortened = (
-            self.selected if len(self.selected) < 9 else remove_vowels(self.selected)
-        )
-        return f"{self.name}:{selected_shortened}"
+            logger.debug("Menu Start Index:", self.menu_start_index)
+            logger.debug("Highlighted Index:", self.highlighted_index)
+            logger.debug("Number of submenus:", self.total_lines)
 
 
 class NumericalValueRangeMenu(Submenu):
@@ -420,6 +465,9 @@ class NumericalValueRangeMenu(Submenu):
         self.min_val = min_val
         self.max_val = max_val
         self.increment = increment
+        self._old_texts = {}
+        self._new_texts = {}
+        self._new_selected_texts = {}
 
     def set_selected(self, selection) -> None:
         self.selected = selection
@@ -444,11 +492,18 @@ class NumericalValueRangeMenu(Submenu):
         display.text(self.name, 2, 4, 1)
         display.rect(0, 0, 128, 15, 1)
         # old value
-        display.text(f"Old: {self.selected}", 0, 20, 1)
+        text = self._old_texts.get(self.selected)
+        if text is None:
+            text = self._old_texts[self.selected] = f"Old: {self.selected}"
+        display.text(text, 0, 20, 1)
         if self.new_value == self.selected:
-            text = f"New: *{self.new_value}"
+            text = self._new_selected_texts.get(self.new_value)
+            if text is None:
+                text = self._new_selected_texts[self.new_value] = f"New: *{self.new_value}"
         else:
-            text = f"New: {self.new_value}"
+            text = self._new_texts.get(self.new_value)
+            if text is None:
+                text = self._new_texts[self.new_value] = f"New: {self.new_value}"
         display.fill_rect(0, 30, 128, 10, 1)
         display.text(text, 0, 31, 0)
         display.show()
@@ -462,9 +517,6 @@ class NumericalValueRangeMenu(Submenu):
             self.scroll(rotary_val_new)
             self.display_menu()
 
-    def __repr__(self) -> str:
-        return f"{self.name}:{self.selected}"
-
 
 class ToggleMenu(Submenu):
     """A submenu type that lets a user toggle a boolean value using the rotary encoder's button"""
@@ -476,13 +528,83 @@ class ToggleMenu(Submenu):
     def toggle(self) -> None:
         self.value = not self.value
 
-    def __repr__(self) -> str:
-        bool_str = "Off"
-        if self.value:
-            bool_str = "On"
-        else:
-            bool_str = "Off"
-        return f"{self.name}:{bool_str}"
+    def label_value(self):
+        return "On" if self.value else "Off"
+
+
+class ScreenMenu(Submenu):
+    """
+    A submenu type that shows read only lines of text, like a summary of what is going on.
+    The lines are fetched from lines_callback when the screen is opened and can be scrolled with the encoder.
+    action_callback is called when the button is pressed to leave the screen.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        button: Button,
+        *,
+        lines_callback,
+        action_callback=None,
+        total_lines: int = 4,
+    ) -> None:
+        super().__init__(name, None, button)
+        self.lines_callback = lines_callback
+        self.action_callback = action_callback
+        self.total_lines = total_lines
+        self.lines = []
+        self.menu_start_index = 0
+
+    def set_selected(self, selected) -> None:
+        """Called when the button is pressed to leave the screen"""
+        if self.action_callback is not None:
+            self.action_callback()
+
+    def start(self) -> None:
+        global rotary_val_new, rotary_val_old
+        rotary_val_new = 0
+        rotary_val_old = -1
+        self.lines = self.lines_callback()
+        self.menu_start_index = 0
+        rotary.set(
+            value=0,
+            min_val=0,
+            max_val=max(len(self.lines) - self.total_lines, 0),
+            incr=1,
+        )
+        self.display_menu()
+
+    def display_menu(self) -> None:
+        pixel_y_shift = 20
+        line_height = 10
+        spacer = 2
+
+        display.fill(0)
+        display.text(self.name, 2, 4, 1)
+        display.rect(0, 0, 128, 15, 1)
+        for i in range(min(len(self.lines) - self.menu_start_index, self.total_lines)):
+            display.text(
+                self.lines[self.menu_start_index + i],
+                0,
+                (i * (line_height + spacer)) + pixel_y_shift,
+                1,
+            )
+        display.show()
+
+    def read_and_update_rotary_value(self) -> None:
+        global rotary_val_new, rotary_val_old
+        rotary_val_new = rotary.value()
+        self.button.update()
+        if rotary_val_old != rotary_val_new:
+            rotary_val_old = rotary_val_new
+            self.menu_start_index = rotary_val_new
+            self.display_menu()
+
+    def label(self) -> str:
+        label = self._labels.get(None)
+        if label is None:
+            label = self._labels[None] = f"{self.name}>"
+        return label
 
 
 class CVMenu(Submenu):
@@ -4,8 +4,6 @@ This program is licensed under the MIT license.
 All credits go to Hector Miller-Bakewell. https://github.com/hmillerbakewell/musical-scales/blob/main/license
 """
 
-import math
-
 
 class MusicException(Exception):
     """Base exception for the musical_scales module."""
@@ -21,6 +19,8 @@ class Note:
         * Note(2) # D3
     """
 
+    __slots__ = ("semitones_from_middle_c", "name", "octave")
+
     semitones_from_middle_c: int
     name: str
     octave: int
@@ -48,7 +48,7 @@ class Note:
         """
         self.semitones_from_middle_c = semitones_from_middle_c
         self.name = names_from_interval[semitones_from_middle_c % 12]
-        self.octave = math.floor(semitones_from_middle_c / 12) + 3
+        self.octave = semitones_from_middle_c // 12 + 3
 
     def __str__(self):
         """MIDI-style string representation e.g. C#3."""
@@ -72,11 +72,102 @@ class Note:
         return self + (-shift)
 
     def __eq__(self, other):
-        """Check equality via .midi."""
+        """Check equality via the degree, or via .midi and .name for strings."""
         if isinstance(other, Note):
-            return self.midi == other.midi
-        else:
+            return self.semitones_from_middle_c == other.semitones_from_middle_c
+        if isinstance(other, str):
             return self.midi == other or self.name == other
+        return NotImplemented
+
+    def __hash__(self):
+        """Hashes like .midi, so a Note and its MIDI string find each other in sets and dicts. The bare name does not."""
+        return hash(self.midi)
+
+
+class Scale:
+    """A sequence of Notes that only creates Note objects when they are accessed.
+
+    The degrees are kept as plain integers in .semitones
+    """
+
+    __slots__ = ("semitones", "_notes")
+
+    def __init__(self, semitones: tuple):
+        self.semitones = semitones
+        self._notes = [None] * len(semitones)
+
+    def __len__(self):
+        return len(self.semitones)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.semitones)))]
+        note = self._notes[index]
+        if note is None:
+            note = Note(semitones_from_middle_c=self.semitones[index])
+            self._notes[index] = note
+        return note
+
+    def __iter__(self):
+        for index in range(len(self.semitones)):
+            yield self[index]
+
+    def __eq__(self, other):
+        """Equal to a Scale with the same degrees, or a list or tuple of the same Notes."""
+        if isinstance(other, Scale):
+            return self.semitones == other.semitones
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        """Same as the repr of a list of Notes e.g. [C3, D3]."""
+        return f"[{', '.join(self.names())}]"
+
+    def names(self):
+        """MIDI-style names of every note e.g. ["C3", "D3"], without creating Notes."""
+        return [f"{names_from_interval[degree % 12]}{degree // 12 + 3}" for degree in self.semitones]
+
+
+SCALE_CACHE_SIZE = 16
+"""Maximum number of scales kept by scale_semitones()."""
+
+_scale_cache = {}
+_scale_cache_order = []  # least recently used key first
+
+
+def scale_semitones(starting_semitones, mode="ionian", octaves=1):
+    """Return a tuple of degrees (semitones from middle C) of a scale.
+
+    Integer-only version of scale(). Results are memoized, keyed by
+    (starting_semitones, mode, octaves), and the least recently used scale is
+    evicted once more than SCALE_CACHE_SIZE scales are cached.
+
+    Example:
+        * scale_semitones(0) # (0, 2, 4, 5, 7, 9, 11, 12)
+    """
+    key = (starting_semitones, mode, octaves)
+    semitones = _scale_cache.get(key)
+    if semitones is not None:
+        if _scale_cache_order[-1] != key:
+            _scale_cache_order.remove(key)
+            _scale_cache_order.append(key)
+        return semitones
+    if mode not in scale_intervals:
+        raise MusicException(f"The mode {mode} is not available.")
+    degrees = [starting_semitones]
+    degree = starting_semitones
+    intervals = scale_intervals[mode]
+    for octave in range(0, octaves):
+        for interval in intervals:
+            degree += interval
+            degrees.append(degree)
+    semitones = tuple(degrees)
+    _scale_cache[key] = semitones
+    _scale_cache_order.append(key)
+    if len(_scale_cache_order) > SCALE_CACHE_SIZE:
+        del _scale_cache[_scale_cache_order.pop(0)]
+    return semitones
 
 
 def scale(starting_note, mode="ionian", octaves=1):
@@ -86,17 +177,13 @@ def scale(starting_note, mode="ionian", octaves=1):
         * scale("C") # C major (ionian)
         * scale(Note(4), "harmonic minor") # E harmonic minor
     """
-    if mode not in scale_intervals:
-        raise MusicException(f"The mode {mode} is not available.")
-    if not isinstance(starting_note, Note):
-        starting_note = Note(starting_note)
-    notes = [starting_note]
-    for octave in range(0, octaves):
-        for interval in scale_intervals[mode]:
-            # notes[-1] accesses the last item in the notes list
-            # for example the starting note is C0 and the interval is 2, the next note should be D0
-            notes.append(notes[-1] + interval)
-    return notes
+    if isinstance(starting_note, Note):
+        starting_semitones = starting_note.semitones_from_middle_c
+    elif starting_note in interval_from_names:
+        starting_semitones = interval_from_names[starting_note]
+    else:
+        raise MusicException(f"No note found with name {starting_note}.")
+    return Scale(scale_semitones(starting_semitones, mode, octaves))
 
 
 # Found at https://en.wikipedia.org/wiki/List_of_musical_scales_and_modes
@@ -0,0 +1,212 @@
+"""
+Pattern bank on flash and song mode
+
+A bank file holds up to 65535 patterns of up to 16 steps and a chain (song) of up to 64
+entries, little endian:
+
+offset       size  field
+0            2     magic b"PB"
+2            1     format version
+3            1     steps per pattern record (16)
+4            2     number of patterns
+6            2     chain length, 0 plays every pattern once in order
+8            256   chain: 64 x (pattern number, bars), 2 bytes each
+264 + n*34   34    pattern n: number of steps, reserved, 16 steps of 12 bit CV | gate << 15
+
+Patterns sit at fixed offsets, so reading one is a seek and a readinto() into a
+preallocated record, and RAM use does not depend on how many patterns the bank holds.
+
+Song follows the chain: it counts the steps played, reads the next entry's pattern in
+the idle time of the step before the bar boundary (prefetch()) and reports the boundary
+(step_played()), where the sequencer swaps to the prefetched sequences without touching
+the file. If the prefetch did not happen in time the current pattern plays one more bar.
+A bar is one pass through the pattern's steps.
+"""
+
+import struct
+import logger
+
+BANK_PATH = "patterns.bin"
+MAGIC = b"PB"
+VERSION = 1
+MAX_STEPS = 16
+MIN_STEPS = 2  # as short as the Steps menu goes
+MAX_CHAIN_LENGTH = 64
+HEADER_SIZE = 8
+CHAIN_SIZE = 4 * MAX_CHAIN_LENGTH
+PATTERNS_OFFSET = HEADER_SIZE + CHAIN_SIZE
+PATTERN_SIZE = 2 + 2 * MAX_STEPS
+PREFETCH_STEPS = 1  # the next pattern is read this many steps before the bar boundary
+
+
+def pattern_offset(number: int) -> int:
+    return PATTERNS_OFFSET + number * PATTERN_SIZE
+
+
+def encode_pattern(record, cv_sequence, trigger_sequence, steps: int) -> None:
+    """Packs a pattern into a PATTERN_SIZE record, steps past the pattern's length are zero"""
+    record[0] = steps
+    record[1] = 0
+    for step in range(MAX_STEPS):
+        # clamped like the DAC clamps it, a 5 octave scale goes above 12 bits
+        value = min(cv_sequence[step], 0x0FFF) | (trigger_sequence[step] << 15) if step < steps else 0
+        record[2 + 2 * step] = value & 0xFF
+        record[3 + 2 * step] = value >> 8
+
+
+def decode_pattern(record, cv_sequence, trigger_sequence) -> int:
+    """Unpacks a record into the sequences in place, returns the number of steps"""
+    for step in range(MAX_STEPS):
+        value = record[2 + 2 * step] | record[3 + 2 * step] << 8
+        cv_sequence[step] = value & 0x0FFF
+        trigger_sequence[step] = value >> 15
+    return record[0]
+
+
+def create_bank(path: str, patterns, chain=()) -> None:
+    """
+    Writes a bank file. patterns are (cv_sequence, trigger_sequence, steps) tuples,
+    chain entries (pattern number, bars) tuples.
+    """
+    if len(chain) > MAX_CHAIN_LENGTH:
+        raise ValueError(f"chain longer than {MAX_CHAIN_LENGTH} entries")
+    header = bytearray(PATTERNS_OFFSET)
+    struct.pack_into("<2sBBHH", header, 0, MAGIC, VERSION, MAX_STEPS, len(patterns), len(chain))
+    for i, (number, bars) in enumerate(chain):
+        struct.pack_into("<HH", header, HEADER_SIZE + 4 * i, number, bars)
+    record = bytearray(PATTERN_SIZE)
+    with open(path, "wb") as file:
+        file.write(header)
+        for cv_sequence, trigger_sequence, steps in patterns:
+            encode_pattern(record, cv_sequence, trigger_sequence, steps)
+            file.write(record)
+
+
+class PatternBank:
+    def __init__(self, path: str = BANK_PATH) -> None:
+        self.path = path
+        self.file = None
+        self.pattern_count = 0
+        self.chain_length = 0
+        self.header = bytearray(PATTERNS_OFFSET)  # header and chain, read when the bank is opened
+        self.record = bytearray(PATTERN_SIZE)
+        self.reads = 0
+
+    def open(self) -> bool:
+        """Opens the bank and reads its header and chain. Returns False if there is no valid bank."""
+        if self.file is not None:
+            return True
+        try:
+            file = open(self.path, "rb")
+        except OSError:
+            logger.warning("No pattern bank", self.path)
+            return False
+        if file.readinto(self.header) != PATTERNS_OFFSET or self.header[0:2] != MAGIC or self.header[2] != VERSION or self.header[3] != MAX_STEPS:
+            file.close()
+            logger.warning("Invalid pattern bank", self.path)
+            return False
+        self.pattern_count, self.chain_length = struct.unpack_from("<HH", self.header, 4)
+        if self.chain_length > MAX_CHAIN_LENGTH or not self._chain_is_valid():
+            file.close()
+            logger.warning("Pattern bank chain points past its patterns", self.path)
+            self.pattern_count = self.chain_length = 0
+            return False
+        self.file = file
+        logger.info("Pattern bank patterns:", self.pattern_count)
+        return self.pattern_count > 0
+
+    def _chain_is_valid(self) -> bool:
+        """Every chain entry is a pattern of the bank, read_pattern() does not check it"""
+        for position in range(self.chain_length):
+            if self.chain_pattern(position) >= self.pattern_count:
+                return False
+        return True
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def song_length(self) -> int:
+        return self.chain_length if self.chain_length else self.pattern_count
+
+    def chain_pattern(self, position: int) -> int:
+        if not self.chain_length:
+            return position
+        return self.header[HEADER_SIZE + 4 * position] | self.header[HEADER_SIZE + 4 * position + 1] << 8
+
+    def chain_bars(self, position: int) -> int:
+        if not self.chain_length:
+            return 1
+        return self.header[HEADER_SIZE + 4 * position + 2] | self.header[HEADER_SIZE + 4 * position + 3] << 8
+
+    def read_pattern(self, number: int, cv_sequence, trigger_sequence) -> int:
+        """Reads pattern number into the sequences, returns its number of steps"""
+        self.file.seek(pattern_offset(number))
+        self.file.readinto(self.record)
+        self.reads += 1
+        steps = decode_pattern(self.record, cv_sequence, trigger_sequence)
+        if steps == 0 or steps > MAX_STEPS:
+            return MAX_STEPS
+        return steps if steps >= MIN_STEPS else MIN_STEPS
+
+
+class Song:
+    def __init__(self, bank: PatternBank, prefetch_steps: int = PREFETCH_STEPS) -> None:
+        self.bank = bank
+        self.prefetch_steps = prefetch_steps
+        self.position = 0  # chain entry that is playing
+        self.pattern_steps = 0
+        self.bars_left = 0
+        self.steps_left = 0  # steps of the current bar not played yet
+        self.next_position = 0
+        self.next_steps = 0  # steps of the prefetched pattern, 0 until it is read
+        self.late_prefetches = 0
+
+    def start(self, cv_sequence, trigger_sequence) -> int:
+        """Reads the first chain entry into the sequences, returns its number of steps"""
+        steps = self.bank.read_pattern(self.bank.chain_pattern(0), cv_sequence, trigger_sequence)
+        self._enter(0, steps)
+        return steps
+
+    def _enter(self, position: int, steps: int) -> None:
+        self.position = position
+        self.pattern_steps = steps
+        self.bars_left = self.bank.chain_bars(position)
+        self.steps_left = steps
+        self.next_position = (position + 1) % self.bank.song_length()
+        self.next_steps = 0
+
+    def restart_bar(self) -> None:
+        """The sequence was reset to its first step, the bar starts over"""
+        self.steps_left = self.pattern_steps
+
+    def prefetch_due(self) -> bool:
+        return self.next_steps == 0 and self.bars_left == 1 and self.steps_left <= self.prefetch_steps
+
+    def prefetch(self, next_cv_sequence, next_trigger_sequence) -> bool:
+        """Reads the next entry's pattern into the next sequences when it is due, call between steps"""
+        if not self.prefetch_due():
+            return False
+        self.next_steps = self.bank.read_pattern(self.bank.chain_pattern(self.next_position), next_cv_sequence, next_trigger_sequence)
+        return True
+
+    def step_played(self) -> bool:
+        """
+        Counts a played step. Returns True at the bar boundary where the prefetched pattern starts:
+        the caller swaps in the next sequences and plays pattern_steps steps from step 0.
+        """
+        self.steps_left -= 1
+        if self.steps_left > 0:
+            return False
+        self.steps_left = self.pattern_steps
+        self.bars_left -= 1
+        if self.bars_left > 0:
+            return False
+        if self.next_steps == 0:
+            self.late_prefetches += 1
+            self.bars_left = 1
+            logger.warning("Pattern prefetch late, count:", self.late_prefetches)
+            return False
+        self._enter(self.next_position, self.next_steps)
+        return True
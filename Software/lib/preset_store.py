@@ -0,0 +1,227 @@
+"""
+Preset storage in flash
+
+The sequencer's settings and steps are saved as fixed size binary records, little endian:
+
+offset size field
+0      2    magic b"RS"
+2      1    format version
+3      1    number of steps in the record
+4      4    save counter, the valid record with the highest counter is the newest
+8      24   scale name, ASCII padded with zeros
+32     8    start note, octaves, steps, CV probability, trig probability, trig length %,
+            clock ratio (signed, negative divides, 0 in older records is x1), ratchet probability
+40     32   steps: 12 bit CV | (ratchets - 1) << 12 | gate << 15
+72     2    CRC-16/CCITT of bytes 0 - 71
+
+The file holds SLOTS records and every save goes to the slot after the newest one, so writes
+rotate over the slots and a power cut during a write leaves the previous record readable.
+At boot the whole file is read with a single readinto() into a preallocated buffer and the
+newest record with a valid CRC is used as is, there is nothing to parse.
+
+save_if_changed() only writes in idle windows long enough for a flash write,
+at most every check interval and only if the record differs from the last one saved.
+"""
+
+import struct
+import time
+import logger
+
+PRESET_PATH = "presets.bin"
+SLOTS = 4
+MAX_STEPS = 16
+MAGIC = b"RS"
+VERSION = 1
+SCALE_NAME_SIZE = 24
+PARAMETERS = 8
+RECORD_SIZE = 74
+NO_SLOT = -1
+DEFAULT_WRITE_BUDGET_US = 50_000  # a file write can erase a 4 kB flash sector
+DEFAULT_CHECK_INTERVAL_MS = 10_000
+
+_COUNTER_OFFSET = 4
+_SCALE_OFFSET = 8
+_PARAMETERS_OFFSET = _SCALE_OFFSET + SCALE_NAME_SIZE
+_STEPS_OFFSET = _PARAMETERS_OFFSET + PARAMETERS
+_CRC_OFFSET = _STEPS_OFFSET + 2 * MAX_STEPS
+
+# parameter indexes
+START_NOTE = 0
+OCTAVES = 1
+STEPS = 2
+CV_PROBABILITY = 3
+TRIG_PROBABILITY = 4
+TRIG_LENGTH = 5
+CLOCK_RATIO = 6
+RATCHET_PROBABILITY = 7
+
+
+def crc16(data, start: int, end: int) -> int:
+    """CRC-16/CCITT-FALSE of data[start:end]"""
+    crc = 0xFFFF
+    for i in range(start, end):
+        crc ^= data[i] << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x1021) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+    return crc
+
+
+class PresetStore:
+    def __init__(
+        self,
+        path: str = PRESET_PATH,
+        slots: int = SLOTS,
+        write_budget_us: int = DEFAULT_WRITE_BUDGET_US,
+        check_interval_ms: int = DEFAULT_CHECK_INTERVAL_MS,
+    ) -> None:
+        self.path = path
+        self.slots = slots
+        self.write_budget_us = write_budget_us
+        self.check_interval_ms = check_interval_ms
+        self.file_buffer = bytearray(slots * RECORD_SIZE)  # the whole file, read at boot
+        self.record = bytearray(RECORD_SIZE)  # the newest record, loaded or saved
+        self._pending = bytearray(RECORD_SIZE)
+        self.slot = NO_SLOT
+        self.counter = 0
+        self.saves = 0
+        self._checked_ms = time.ticks_ms()
+
+    def load(self) -> bool:
+        """Reads the file and selects its newest valid record. Returns False if there is none."""
+        try:
+            with open(self.path, "rb") as file:
+                file.readinto(self.file_buffer)
+        except OSError:
+            return False
+        for slot in range(self.slots):
+            offset = slot * RECORD_SIZE
+            if not self._is_valid(offset):
+                continue
+            counter = struct.unpack_from("<I", self.file_buffer, offset + _COUNTER_OFFSET)[0]
+            if self.slot == NO_SLOT or counter > self.counter:
+                self.slot = slot
+                self.counter = counter
+        if self.slot == NO_SLOT:
+            logger.warning("No valid preset in", self.path)
+            return False
+        offset = self.slot * RECORD_SIZE
+        self.record[:] = self.file_buffer[offset:offset + RECORD_SIZE]
+        logger.info("Preset loaded from slot:", self.slot)
+        return True
+
+    def _is_valid(self, offset: int) -> bool:
+        buffer = self.file_buffer
+        if buffer[offset] != MAGIC[0] or buffer[offset + 1] != MAGIC[1]:
+            return False
+        if buffer[offset + 2] != VERSION or buffer[offset + 3] != MAX_STEPS:
+            return False
+        crc = buffer[offset + _CRC_OFFSET] | buffer[offset + _CRC_OFFSET + 1] << 8
+        return crc == crc16(buffer, offset, offset + _CRC_OFFSET)
+
+    def scale_name(self) -> str:
+        name = bytes(self.record[_SCALE_OFFSET:_PARAMETERS_OFFSET])
+        end = name.find(b"\x00")
+        return (name if end == -1 else name[:end]).decode()
+
+    def parameter(self, index: int) -> int:
+        return self.record[_PARAMETERS_OFFSET + index]
+
+    def clock_ratio(self) -> int:
+        ratio = self.record[_PARAMETERS_OFFSET + CLOCK_RATIO]
+        if ratio > 127:
+            return ratio - 256
+        return ratio or 1
+
+    def read_steps(self, cv_sequence, trigger_sequence, ratchet_sequence=None) -> None:
+        """Copies the record's steps into the sequences, in place"""
+        record = self.record
+        for step in range(MAX_STEPS):
+            offset = _STEPS_OFFSET + 2 * step
+            value = record[offset] | record[offset + 1] << 8
+            cv_sequence[step] = value & 0x0FFF
+            trigger_sequence[step] = value >> 15
+            if ratchet_sequence is not None:
+                ratchet_sequence[step] = ((value >> 12) & 0x07) + 1
+
+    def save_if_changed(
+        self,
+        idle_us: int,
+        scale_name: str,
+        start_note: int,
+        octaves: int,
+        steps: int,
+        cv_probability: int,
+        trig_probability: int,
+        trig_length: int,
+        cv_sequence,
+        trigger_sequence,
+        clock_ratio: int = 1,
+        ratchet_probability: int = 0,
+        ratchet_sequence=None,
+    ) -> bool:
+        """
+        Saves a record when the check interval has passed, idle_us (the time until the next
+        expected clock edge) fits the write budget and the settings or steps changed.
+        Returns True if a record was written.
+        """
+        if time.ticks_diff(time.ticks_ms(), self._checked_ms) < self.check_interval_ms:
+            return False
+        if idle_us < self.write_budget_us:
+            return False
+        self._checked_ms = time.ticks_ms()
+
+        pending = self._pending
+        name = scale_name.encode()
+        for i in range(SCALE_NAME_SIZE):
+            pending[_SCALE_OFFSET + i] = name[i] if i < len(name) else 0
+        pending[_PARAMETERS_OFFSET + START_NOTE] = start_note
+        pending[_PARAMETERS_OFFSET + OCTAVES] = octaves
+        pending[_PARAMETERS_OFFSET + STEPS] = steps
+        pending[_PARAMETERS_OFFSET + CV_PROBABILITY] = cv_probability
+        pending[_PARAMETERS_OFFSET + TRIG_PROBABILITY] = trig_probability
+        pending[_PARAMETERS_OFFSET + TRIG_LENGTH] = trig_length
+        pending[_PARAMETERS_OFFSET + CLOCK_RATIO] = clock_ratio & 0xFF
+        pending[_PARAMETERS_OFFSET + RATCHET_PROBABILITY] = ratchet_probability
+        for step in range(MAX_STEPS):
+            # clamped like the DAC clamps it, a 5 octave scale goes above 12 bits
+            value = min(cv_sequence[step], 0x0FFF) | (trigger_sequence[step] << 15)
+            if ratchet_sequence is not None:
+                value |= (ratchet_sequence[step] - 1) << 12
+            offset = _STEPS_OFFSET + 2 * step
+            pending[offset] = value & 0xFF
+            pending[offset + 1] = value >> 8
+        if self.slot != NO_SLOT and self._is_unchanged():
+            return False
+
+        slot = (self.slot + 1) % self.slots
+        counter = self.counter + 1
+        struct.pack_into("<2sBBI", pending, 0, MAGIC, VERSION, MAX_STEPS, counter)
+        crc = crc16(pending, 0, _CRC_OFFSET)
+        pending[_CRC_OFFSET] = crc & 0xFF
+        pending[_CRC_OFFSET + 1] = crc >> 8
+        try:
+            try:
+                file = open(self.path, "r+b")
+            except OSError:
+                file = open(self.path, "wb")  # the first save creates the file
+            with file:
+                file.seek(slot * RECORD_SIZE)
+                file.write(pending)
+        except OSError:
+            logger.error("Preset save failed, slot:", slot)
+            return False
+        self.record[:] = pending
+        self.slot = slot
+        self.counter = counter
+        self.saves += 1
+        logger.info("Preset saved to slot:", slot)
+        return True
+
+    def _is_unchanged(self) -> bool:
+        for i in range(_SCALE_OFFSET, _CRC_OFFSET):
+            if self._pending[i] != self.record[i]:
+                return False
+        return True
@@ -0,0 +1,47 @@
+"""
+Pseudo random numbers that come out the same on the Pico and on the host
+
+MicroPython's random module and CPython's use different generators, so a run recorded on the Pico
+could not be reproduced by the simulator from the same seed. This is Marsaglia's xorshift32 (13, 17, 5)
+worked on two 16 bit halves, every intermediate value stays a small int and drawing a number does not allocate.
+"""
+
+import micropython
+
+
+class Xorshift32:
+    def __init__(self, seed: int = 1) -> None:
+        self.high = 0
+        self.low = 1
+        self.seed(seed)
+
+    def seed(self, seed: int) -> None:
+        self.set_state((seed >> 16) & 0xFFFF, seed & 0xFFFF)
+
+    def set_state(self, high: int, low: int) -> None:
+        """Restores a state read from high and low, e.g. from an event log keyframe"""
+        if high == 0 and low == 0:
+            low = 1  # xorshift never leaves the all zero state
+        self.high = high
+        self.low = low
+
+    @micropython.native
+    def next(self) -> int:
+        """The next random number, 30 bits (the top 30 of the 32 bit state)"""
+        high = self.high
+        low = self.low
+        # x ^= x << 13
+        high ^= ((high << 13) | (low >> 3)) & 0xFFFF
+        low ^= (low << 13) & 0xFFFF
+        # x ^= x >> 17
+        low ^= high >> 1
+        # x ^= x << 5
+        high ^= ((high << 5) | (low >> 11)) & 0xFFFF
+        low ^= (low << 5) & 0xFFFF
+        self.high = high
+        self.low = low
+        return (high << 14) | (low >> 2)
+
+    def randint(self, a: int, b: int) -> int:
+        """A random integer from a to b, both included, like random.randint()"""
+        return a + self.next() % (b - a + 1)
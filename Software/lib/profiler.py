@@ -0,0 +1,86 @@
+"""
+Main loop profiler
+
+Accumulates per-stage call counts, total and max microseconds, the number of loop
+iterations per second and a histogram of whole-iteration times.
+The histogram bins are powers of two (bin i counts iterations of 2^i to 2^(i+1) - 1 us),
+so a display redraw of ~25 ms shows up clearly away from the ~300 us idle iterations.
+All counters are preallocated arrays, so recording does not allocate.
+Totals are kept below 2^30 us (small ints) by starting a new window with reset().
+"""
+
+from array import array
+import time
+
+HISTOGRAM_BINS = 16  # the last bin also counts everything over 2^16 us
+MAX_TOTAL_US = 1 << 30
+
+
+class LoopProfiler:
+    def __init__(self, stage_names: list[str]) -> None:
+        self.stage_names = stage_names
+        stages = len(stage_names)
+        self.calls = array("L", (0 for _ in range(stages)))
+        self.total_us = array("L", (0 for _ in range(stages)))
+        self.max_us = array("L", (0 for _ in range(stages)))
+        self.histogram = array("L", (0 for _ in range(HISTOGRAM_BINS)))
+        self.loops_per_second = 0
+        self._window_iterations = 0
+        self._window_start_us = time.ticks_us()
+
+    def reset(self) -> None:
+        for i in range(len(self.stage_names)):
+            self.calls[i] = 0
+            self.total_us[i] = 0
+            self.max_us[i] = 0
+        for i in range(HISTOGRAM_BINS):
+            self.histogram[i] = 0
+        self.loops_per_second = 0
+        self._window_iterations = 0
+        self._window_start_us = time.ticks_us()
+
+    def add(self, stage: int, elapsed_us: int) -> None:
+        """Adds one call of a stage"""
+        self.calls[stage] += 1
+        if self.total_us[stage] < MAX_TOTAL_US - elapsed_us:
+            self.total_us[stage] += elapsed_us
+        if elapsed_us > self.max_us[stage]:
+            self.max_us[stage] = elapsed_us
+
+    def end_iteration(self, elapsed_us: int, now_us: int) -> None:
+        """Adds one whole loop iteration to the histogram and updates the loop rate once a second"""
+        bin = 0
+        while elapsed_us > 1 and bin < HISTOGRAM_BINS - 1:
+            elapsed_us >>= 1
+            bin += 1
+        self.histogram[bin] += 1
+        self._window_iterations += 1
+        window_us = time.ticks_diff(now_us, self._window_start_us)
+        if window_us >= 1_000_000:
+            self.loops_per_second = (self._window_iterations * 1_000_000) // window_us
+            self._window_iterations = 0
+            self._window_start_us = now_us
+
+    def average_us(self, stage: int) -> int:
+        calls = self.calls[stage]
+        return self.total_us[stage] // calls if calls else 0
+
+    def summary_lines(self) -> list[str]:
+        """Lines of at most 16 characters for the 128px wide display"""
+        lines = [f"Loop: {self.loops_per_second}/s", "stage  avg/max"]
+        for stage, name in enumerate(self.stage_names):
+            lines.append(f"{name:<6}{self.average_us(stage):>4}/{self.max_us[stage]:>5}")
+        for bin, count in enumerate(self.histogram):
+            if count:
+                lines.append(f"<{1 << (bin + 1)}us:{count}")
+        return lines
+
+    def dump(self) -> None:
+        """Prints the profile over USB serial"""
+        print("loops_per_second", self.loops_per_second)
+        print("stage,calls,total_us,avg_us,max_us")
+        for stage, name in enumerate(self.stage_names):
+            print(f"{name},{self.calls[stage]},{self.total_us[stage]},{self.average_us(stage)},{self.max_us[stage]}")
+        print("iteration_us_below,count")
+        for bin, count in enumerate(self.histogram):
+            print(f"{1 << (bin + 1)},{count}")
@@ -0,0 +1,80 @@
+"""
+Quantizes a 12 bit ADC code to the nearest note of a scale of 12 bit DAC values.
+For use with an AnalogueReader input and the MCP4725 DAC
+
+A lookup table with one entry per ADC code is precomputed from the scale,
+so each conversion is a single index: dac.write(quantizer.quantize(code))
+The table only has to be rebuilt when the scale, octaves or starting note change.
+On the Pico the table is filled by a viper function, machine code working on the raw arrays.
+"""
+
+from array import array
+import micropython
+from micropython import const
+
+ADC_CODES = const(4096)  # the RP2040 ADC is 12 bit
+MAX_SCALE_LENGTH = 128
+# full scale voltages of the ADC input and the DAC output
+ADC_VREF_MV = 3300
+DAC_VREF_MV = 5000
+
+try:
+    ptr16
+except NameError:
+    ptr16 = None  # viper's pointer type only exists in MicroPython's compiler, CPython evaluates the annotation
+
+
+@micropython.viper
+def _fill_table(table: ptr16, scale: ptr16, last: int, adc_vref_mv: int, dac_vref_mv: int):
+    """Writes the nearest note of scale[0:last + 1] for every ADC code into the table"""
+    note = 0
+    for code in range(ADC_CODES):
+        value = (code * adc_vref_mv) // dac_vref_mv
+        # move on to the next note once the value is past the midpoint between two notes
+        while note < last and scale[note] + scale[note + 1] <= 2 * value:
+            note += 1
+        table[code] = scale[note]
+
+
+class Quantizer:
+    """Maps an ADC code (0 - 4095) to the nearest 12 bit DAC value of a scale"""
+
+    def __init__(self, adc_vref_mv: int = ADC_VREF_MV, dac_vref_mv: int = DAC_VREF_MV) -> None:
+        self.adc_vref_mv = adc_vref_mv
+        self.dac_vref_mv = dac_vref_mv
+        self.table = array("H", (0 for _ in range(ADC_CODES)))
+        # copy of the scale the table was built from, preallocated so rebuilding does not allocate
+        self.scale = array("H", (0 for _ in range(MAX_SCALE_LENGTH)))
+        self.scale_length = 0
+
+    def adc_code_to_dac_value(self, code: int) -> int:
+        """Returns the DAC value that outputs the same voltage as the ADC code reads"""
+        return (code * self.adc_vref_mv) // self.dac_vref_mv
+
+    def rebuild(self, scale, length: int | None = None) -> bool:
+        """
+        Rebuilds the lookup table for a scale of ascending 12 bit DAC values.
+        Only the first length values are used if a length is given (for preallocated scale arrays).
+        Returns False without touching the table if the scale has not changed.
+        """
+        if length is None:
+            length = len(scale)
+        if self._is_current_scale(scale, length):
+            return False
+        for i in range(length):
+            self.scale[i] = scale[i]
+        self.scale_length = length
+        _fill_table(self.table, self.scale, length - 1, self.adc_vref_mv, self.dac_vref_mv)
+        return True
+
+    def _is_current_scale(self, scale, length: int) -> bool:
+        if length != self.scale_length:
+            return False
+        for i in range(length):
+            if scale[i] != self.scale[i]:
+                return False
+        return True
+
+    def quantize(self, code: int) -> int:
+        """Returns the 12 bit DAC value of the note nearest to the ADC code"""
+        return self.table[code]
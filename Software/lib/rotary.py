@@ -126,6 +126,7 @@ class Rotary(object):
             raise ValueError('{} is not an installed listener'.format(l))
         self._listener.remove(l)
 
+    @micropython.native
     def _process_rotary_pins(self, pin):
         old_value = self._value
         clk_dt_pins = (self._hal_get_clk_value() <<
@@ -0,0 +1,173 @@
+"""
+Microsecond event scheduler
+
+Events (a kind and a small argument) are kept in a binary min-heap of ticks_us deadlines in
+preallocated arrays, so any number of gate and step events up to the capacity can be in
+flight without allocating. A one-shot machine.Timer is armed for the earliest deadline, its
+soft callback runs the events that are due and arms it again for the next one.
+Soft callbacks run between bytecodes, so the handler may write the DAC over I2C between the
+display's transfers, but a single long transfer (a full display flush) delays them.
+
+Deadlines are compared with ticks_diff(), so they must be within 2**29 us of each other.
+run_due() keeps the lateness of every event (the scheduling error) as max and total.
+"""
+
+from array import array
+import machine
+import time
+
+DEFAULT_CAPACITY = 32
+ANY_EVENT = 0xFF
+
+
+class EventScheduler:
+    def __init__(self, handler, capacity: int = DEFAULT_CAPACITY, timer_id: int = -1) -> None:
+        """handler(event, argument, late_us) runs every event when it is due"""
+        self.handler = handler
+        self.capacity = capacity
+        self.deadlines = array("l", (0 for _ in range(capacity)))
+        self.events = bytearray(capacity)
+        self.arguments = bytearray(capacity)
+        self.size = 0
+        self.timer = machine.Timer(timer_id)
+        self._on_timer = self._timer_callback  # bound once, arming does not allocate
+        self._busy = False  # the heap is being changed, a timer callback now runs the events afterwards
+        self._callback_pending = False
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.fired = 0
+        self.dropped = 0  # events that did not fit
+        self.max_late_us = 0
+        self.total_late_us = 0
+
+    def _swap(self, i: int, j: int) -> None:
+        deadlines, events, arguments = self.deadlines, self.events, self.arguments
+        deadline, event, argument = deadlines[i], events[i], arguments[i]
+        deadlines[i], events[i], arguments[i] = deadlines[j], events[j], arguments[j]
+        deadlines[j], events[j], arguments[j] = deadline, event, argument
+
+    def _sift_up(self, i: int) -> None:
+        deadlines = self.deadlines
+        while i > 0:
+            parent = (i - 1) >> 1
+            if time.ticks_diff(deadlines[i], deadlines[parent]) >= 0:
+                return
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i: int) -> None:
+        deadlines, size = self.deadlines, self.size
+        while True:
+            smallest = i
+            child = 2 * i + 1
+            if child < size and time.ticks_diff(deadlines[child], deadlines[smallest]) < 0:
+                smallest = child
+            child += 1
+            if child < size and time.ticks_diff(deadlines[child], deadlines[smallest]) < 0:
+                smallest = child
+            if smallest == i:
+                return
+            self._swap(i, smallest)
+            i = smallest
+
+    def _remove(self, i: int) -> None:
+        self.size -= 1
+        if i == self.size:
+            return
+        self._swap(i, self.size)
+        self._sift_down(i)
+        self._sift_up(i)
+
+    def schedule(self, deadline_us: int, event: int, argument: int = 0) -> bool:
+        """Adds an event at a ticks_us deadline, False if the heap is full"""
+        if self.size >= self.capacity:
+            self.dropped += 1
+            return False
+        self._busy = True
+        i = self.size
+        self.deadlines[i] = deadline_us
+        self.events[i] = event
+        self.arguments[i] = argument
+        self.size += 1
+        self._sift_up(i)
+        self._busy = False
+        if i == 0 or self.deadlines[0] == deadline_us:
+            self._arm()
+        self._run_pending_callback()
+        return True
+
+    def cancel(self, event: int = ANY_EVENT) -> int:
+        """Removes the pending events of a kind (all of them by default), returns how many"""
+        self._busy = True
+        removed = 0
+        i = 0
+        while i < self.size:
+            if event == ANY_EVENT or self.events[i] == event:
+                self._remove(i)
+                removed += 1
+                i = 0  # the heap moved
+            else:
+                i += 1
+        self._busy = False
+        if not self.size:
+            self.timer.deinit()
+        self._run_pending_callback()
+        return removed
+
+    def pending(self, event: int = ANY_EVENT) -> int:
+        count = 0
+        for i in range(self.size):
+            if event == ANY_EVENT or self.events[i] == event:
+                count += 1
+        return count
+
+    def next_deadline_us(self) -> int:
+        """The earliest deadline, only meaningful while size > 0"""
+        return self.deadlines[0]
+
+    def run_due(self) -> int:
+        """Runs the events whose deadline has passed, in deadline order. Returns how many ran."""
+        ran = 0
+        while self.size:
+            now_us = time.ticks_us()
+            late_us = time.ticks_diff(now_us, self.deadlines[0])
+            if late_us < 0:
+                break
+            self._busy = True
+            event, argument = self.events[0], self.arguments[0]
+            self._remove(0)
+            self._busy = False
+            self.fired += 1
+            self.total_late_us += late_us
+            if late_us > self.max_late_us:
+                self.max_late_us = late_us
+            self.handler(event, argument, late_us)
+            ran += 1
+        if self.size:
+            self._arm()
+        return ran
+
+    def _arm(self) -> None:
+        delay_us = time.ticks_diff(self.deadlines[0], time.ticks_us())
+        self.timer.init(
+            mode=machine.Timer.ONE_SHOT,
+            period=delay_us if delay_us > 0 else 1,
+            tick_hz=1_000_000,
+            callback=self._on_timer,
+            hard=False,
+        )
+
+    def _timer_callback(self, timer) -> None:
+        if self._busy:
+            self._callback_pending = True
+            return
+        self.run_due()
+
+    def _run_pending_callback(self) -> None:
+        if self._callback_pending:
+            self._callback_pending = False
+            self.run_due()
+
+    def mean_late_us(self) -> int:
+        return self.total_late_us // self.fired if self.fired else 0
@@ -1,6 +1,7 @@
 # MicroPython SSD1306 OLED driver, I2C and SPI interfaces
 # https://docs.micropython.org/en/latest/esp8266/tutorial/ssd1306.html
 
+import micropython
 from micropython import const
 import framebuf
 
@@ -88,6 +89,7 @@ class SSD1306(framebuf.FrameBuffer):
     def invert(self, invert):
         self.write_cmd(SET_NORM_INV | (invert & 1))
 
+    @micropython.native
     def show(self):
         x0 = 0
         x1 = self.width - 1
@@ -103,6 +105,22 @@ class SSD1306(framebuf.FrameBuffer):
         self.write_cmd(self.pages - 1)
         self.write_data(self.buffer)
 
+    @micropython.native
+    def show_pages(self, first, last):
+        # sends only pages (8 px rows) first to last, e.g. one redrawn menu line
+        x0 = 0
+        x1 = self.width - 1
+        if self.width == 64:
+            x0 += 32
+            x1 += 32
+        self.write_cmd(SET_COL_ADDR)
+        self.write_cmd(x0)
+        self.write_cmd(x1)
+        self.write_cmd(SET_PAGE_ADDR)
+        self.write_cmd(first)
+        self.write_cmd(last)
+        self.write_data(memoryview(self.buffer)[first * self.width : (last + 1) * self.width])
+
 
 class SSD1306_I2C(SSD1306):
     def __init__(self, width, height, i2c, addr=0x3C, external_vcc=False):
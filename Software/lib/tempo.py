@@ -0,0 +1,152 @@
+"""
+Tempo tracker
+
+Estimates the clock period from the ticks_us timestamps of the rising edges and predicts
+when the next edge comes, so work that blocks the main loop (display flushes, garbage
+collection, flash writes) can be kept away from it.
+
+The period is the median of the last MEDIAN_EDGES intervals, smoothed by an exponential
+moving average (1/4 of the difference per edge), so one late or early pulse barely moves it.
+CHANGE_EDGES intervals in a row more than 1/CHANGE_FRACTION away from the estimate, and that
+close to each other, are a tempo change: the history is dropped and the new interval taken as it is.
+A late pulse (one long interval and one short) is not.
+The predicted edge is corrected by half of each edge's phase error, like a PLL, so an edge
+the main loop noticed late does not shift every following prediction.
+No edge for 2 periods (and at least STOP_MIN_US) is a stopped clock, the interval over
+the stop is not used when it starts again.
+All state is in preallocated arrays and small ints, edge() does not allocate.
+"""
+
+from array import array
+import micropython
+import time
+
+MEDIAN_EDGES = 5
+CHANGE_EDGES = 2
+CHANGE_FRACTION = 8  # 12.5 %
+STOP_MIN_US = 2_000_000
+NO_PERIOD = 0
+
+
+class TempoTracker:
+    def __init__(self) -> None:
+        self.intervals = array("l", (0 for _ in range(MEDIAN_EDGES)))
+        self._sorted = array("l", (0 for _ in range(MEDIAN_EDGES)))
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0  # intervals in the history, up to MEDIAN_EDGES
+        self.index = 0
+        self.period_us = NO_PERIOD
+        self.last_edge_us = 0
+        self.next_edge_us = 0
+        self.edges = 0
+        self.changes = 0
+        self.stops = 0
+        self.jitter_us = 0  # smoothed absolute phase error of the edges
+        self._off_tempo = 0  # intervals in a row off the estimate and close to _off_tempo_us
+        self._off_tempo_us = 0
+
+    def _median(self) -> int:
+        count = self.count
+        values = self._sorted
+        for i in range(count):
+            value = self.intervals[i]
+            j = i
+            while j > 0 and values[j - 1] > value:
+                values[j] = values[j - 1]
+                j -= 1
+            values[j] = value
+        return values[count >> 1]
+
+    def _add_interval(self, interval_us: int) -> None:
+        self.intervals[self.index] = interval_us
+        self.index = (self.index + 1) % MEDIAN_EDGES
+        if self.count < MEDIAN_EDGES:
+            self.count += 1
+
+    @micropython.native
+    def edge(self, now_us: int) -> None:
+        """Call with the ticks_us of every rising clock edge"""
+        self.edges += 1
+        if self.edges == 1:
+            self.last_edge_us = now_us
+            return
+        interval_us = time.ticks_diff(now_us, self.last_edge_us)
+        period_us = self.period_us
+        if interval_us >= STOP_MIN_US and (period_us == NO_PERIOD or interval_us >= 2 * period_us):
+            # the clock starts again after a stop
+            self.stops += 1
+            edges, changes, stops = self.edges, self.changes, self.stops
+            self.reset()
+            self.edges, self.changes, self.stops = edges, changes, stops
+            self.last_edge_us = now_us
+            return
+
+        if period_us != NO_PERIOD and abs(interval_us - period_us) > period_us // CHANGE_FRACTION:
+            if self._off_tempo and abs(interval_us - self._off_tempo_us) <= self._off_tempo_us // CHANGE_FRACTION:
+                self._off_tempo += 1
+            else:
+                self._off_tempo = 1
+            self._off_tempo_us = interval_us
+        else:
+            self._off_tempo = 0
+        if self._off_tempo >= CHANGE_EDGES:
+            self.changes += 1
+            self._off_tempo = 0
+            self.count = 0
+            self.index = 0
+            self._add_interval(interval_us)
+            self.period_us = interval_us
+            self.next_edge_us = time.ticks_add(now_us, interval_us)
+            self.last_edge_us = now_us
+            return
+
+        self._add_interval(interval_us)
+        median_us = self._median()
+        if period_us == NO_PERIOD:
+            self.period_us = median_us
+            self.next_edge_us = time.ticks_add(now_us, median_us)
+        else:
+            self.period_us = period_us + ((median_us - period_us) >> 2)
+            error_us = time.ticks_diff(now_us, self.next_edge_us)
+            if abs(error_us) > self.period_us >> 1:
+                error_us = 0  # too far off to be this edge, start from it
+                self.next_edge_us = now_us
+            self.jitter_us += (abs(error_us) - self.jitter_us) >> 3
+            self.next_edge_us = time.ticks_add(self.next_edge_us, (error_us >> 1) + self.period_us)
+        self.last_edge_us = now_us
+
+    def has_period(self) -> bool:
+        return self.period_us != NO_PERIOD
+
+    def is_stopped(self, now_us: int) -> bool:
+        """True before the first edge and when no edge came for 2 periods, at least STOP_MIN_US"""
+        if self.edges == 0:
+            return True
+        since_edge_us = time.ticks_diff(now_us, self.last_edge_us)
+        return since_edge_us >= STOP_MIN_US and since_edge_us >= 2 * self.period_us
+
+    def until_next_edge_us(self, now_us: int) -> int:
+        """Time left until the predicted edge, 0 if there is no prediction or it is overdue"""
+        if self.period_us == NO_PERIOD:
+            return 0
+        left_us = time.ticks_diff(self.next_edge_us, now_us)
+        return left_us if left_us > 0 else 0
+
+    def bpm_x10(self) -> int:
+        """Tempo in tenths of BPM, counting a clock pulse as a 16th note"""
+        if self.period_us == NO_PERIOD:
+            return 0
+        return (150_000_000 + (self.period_us >> 1)) // self.period_us
+
+    def summary_lines(self) -> list[str]:
+        """Lines of at most 16 characters for the 128px wide display"""
+        bpm_x10 = self.bpm_x10()
+        return [
+            f"BPM:{bpm_x10 // 10:>9}.{bpm_x10 % 10}",
+            f"Period:{self.period_us:>7}us",
+            f"Jitter:{self.jitter_us:>7}us",
+            f"Changes:{self.changes:>8}",
+            f"Stops:{self.stops:>10}",
+        ]
@@ -32,17 +32,132 @@ A1 = GP27
 A2 = GP28
 A3 = GP29
 
+Quantizer mode:
+Analog input 1 (A3) is quantized to the nearest note of the current scale and written to the DAC.
+With QuantS&H on, the input is only sampled on the clock's rising edge.
+
+Latency probe:
+With LatProbe on, every step records how late the DAC write and the gate are relative to the clock edge,
+steps of a multiplied clock relative to the time they were scheduled for.
+The Latency screen shows min/avg/max/p99/jitter, pressing the button there prints the steps as CSV over USB serial.
+
+Loop profiler:
+With Profiler on, every main loop stage is timed. The LoopProf screen shows loop iterations per second,
+average/max microseconds per stage and a histogram of iteration times, leaving it prints the profile over USB serial.
+
+Logging:
+Log messages are buffered and printed over USB serial between steps (see lib/logger.py).
+Send "f" to flush them, "d"/"i"/"w"/"e" to set the level or "o" to turn logging off.
+
+Fixed memory mode:
+Sequences, the scale table and the event rings are allocated at boot and the clock edge handler does not allocate.
+With FixedMem on, automatic garbage collection is off and gc.collect() only runs between steps,
+when the time left before the next expected clock edge fits the GC pause budget (see lib/idle_gc.py).
+GCTest logs any garbage collection that lands inside the clock edge handler.
+
+Presets:
+The settings and the steps are saved to flash (presets.bin) when they change, at most every 10 seconds and only
+between steps when the time until the next clock edge fits a flash write, or while the clock is stopped.
+Saves rotate over 4 record slots.
+The newest preset is restored at boot, before the first note (see lib/preset_store.py).
+
+Song mode:
+With Song on, patterns from the pattern bank on flash (patterns.bin) play in the order of its chain,
+switching on bar boundaries. Only the playing and the next pattern are in RAM, the next one is read
+in the idle time of the step before the switch (see lib/pattern_bank.py). A pattern is at least 2 steps,
+like the Steps menu, and a reset starts the playing bar over.
+
+Boot:
+The clock input and the DAC come up first: the sequencer outputs its first note and follows the clock
+before the display, the encoder and the menus are set up, one stage at a time between steps.
+The Boot screen shows when the first DAC write happened and when the user interface was ready.
+
+Memory report:
+The heap (allocated, free and largest free block) is snapshot at boot, after the sequencer is initialized,
+after the user interface imports, after the menus are built and whenever the Memory screen is opened ("now").
+The screen also lists how many bytes each module allocated on import,
+pressing the button there prints the report as CSV over USB serial. Until the first note is out nothing is
+collected and mem_info() is not called: the boot snapshot and the sequencer's imports are plain gc.mem_alloc() readings.
+
+Event log:
+With Record on, clock edges, digital input edges, menu setting changes and the output of every step are
+logged to a ring buffer in RAM, with keyframes of the sequencer state (including the PRNG state) every 64 steps.
+Pressing the button on the EvtLog screen dumps it to flash (events.bin). The random numbers come from
+lib/prng.py, so Host/replay reproduces the same steps from a dump on the simulator (see lib/event_log.py).
+
+Tempo tracking:
+The clock period is estimated from the rising edges' timestamps taken by the clock IRQ, caught up edges
+included, so a main loop that gets to an edge late does not skew it (median of the last 5 intervals,
+smoothed), tempo changes and clock stops are detected and the next edge is predicted (see lib/tempo.py).
+Gates are TrgLngth% of the estimated period, so one late pulse does not change them. Garbage collection,
+preset saves and menu redraws are scheduled by the time left until the predicted edge.
+The Tempo screen shows the estimated BPM (a pulse counted as a 16th), the period and the edge jitter.
+
+Clock ratio and ratchets:
+ClkRatio divides the clock (a step every 2nd to 4th edge) or multiplies it (2 to 8 steps per edge, placed
+from the estimated period). With RatchProb above 0, steps mutate into ratchets of 1 to 8 gates.
+The multiplied steps and the ratchet gates are timed by a microsecond event scheduler on a machine.Timer
+(see lib/scheduler.py), its events are preallocated.
+
+Internal clock:
+With IntClock on and no clock edge at the clock input for 2 seconds, a periodic machine.Timer plays the
+steps at BPM (a step is a 16th). Its callback plays the step itself, the main loop does not poll for it. The tick's due time
+stands in for the clock edge's timestamp (tempo, latency probe).
+The first edge at the clock input takes over. With ClkOut on, the digital output sends the internal
+clock's 5 ms pulses instead of the gates.
+
+Reset input:
+The digital input (GP21) has a hard IRQ that timestamps its rising edges. RstMode picks what a trigger does:
+Reset starts the sequence over at the next clock edge, Reverse turns the play direction around and Mutate
+draws a new note and gate for every step. With Hold, mutation pauses while the input is high.
+A reset that comes before a clock edge (by the clock IRQ's timestamp, not when the main loop gets to the edge)
+takes effect on it, one that comes up to 2 ms after an edge belongs to that edge: the first step is output
+again right away. Caught up edges are compared by their own timestamps, the IRQ keeps the last 8.
+
+Missed clock edges:
+A hard IRQ counts the clock's rising edges and the main loop plays them, so an edge whose whole pulse
+fell into a display flush or a boot stage is not lost. CatchUp picks what happens to such edges:
+Latest only moves the sequence on by their steps and plays the latest edge, All plays every step late.
+Steps wrap inside the edge handler, so lowering Steps never plays past the new length.
+
+Benchmarks:
+Opening the Bench screen while the clock is stopped times DAC writes, full and partial (one menu line) display
+flushes and ADC samples per second, main loop iterations per second and the microseconds of a step advance
+on the Pico, shows them and prints them over USB serial (see lib/device_bench.py). The outputs move during the
+run, the sequence, the step and the PRNG state are put back afterwards. A clock edge stops the run.
+
+Native code:
+The clock handler and the hot library functions (encoder IRQ, DAC write, display show, quantizer table fill)
+are compiled to machine code with @micropython.native / @micropython.viper.
+Host/build_mpy.py precompiles lib/ to .mpy files, so the Pico does not compile them at boot.
+
 TODO: implement control voltage input to change variables
 TODO: Schematic
 """
 
+from memory_report import MemoryReport
+
+# measured before anything else is imported, the imports below then come from sys.modules.
+# Nothing is collected before the first note is out, the first full snapshot is "init"
+memory_report = MemoryReport()
+memory_report.snapshot("boot", collect=False)
+# only what the sequencer needs to output its first note,
+# the user interface modules are imported by boot_user_interface() once the sequencer runs
+memory_report.measure_imports(("logger", "mcp4725", "mcp4725_musical_scales", "idle_gc", "preset_store", "prng", "tempo", "scheduler"), collect=False)
+UI_MODULES = ("menu", "analog_reader", "quantizer", "latency", "profiler", "pattern_bank", "event_log", "device_bench")
+
+from array import array
 import machine
 import mcp4725
+import micropython
 import mcp4725_musical_scales as sc
+import preset_store as ps
+import prng
 import random
-import menu as m
-import analog_reader as analog_reader
-from analog_reader import AnalogueReader
+from idle_gc import IdleCollector
+from tempo import TempoTracker
+from scheduler import EventScheduler
+import logger
 import time
 
 # pins
@@ -73,8 +188,10 @@ MAX_NUMBER_OF_STEPS = 16
 MIN_NUMBER_OF_STEPS = 2
 MAX_NUMBER_OF_OCTAVES = 5
 MIN_NUMBER_OF_OCTAVES = 1
-cv_sequence = []
-trigger_sequence = []
+MAX_STARTING_NOTE = 36
+# sequences are allocated once at full length, the edge handler only writes into them
+cv_sequence = [0] * MAX_NUMBER_OF_STEPS
+trigger_sequence = [1] * MAX_NUMBER_OF_STEPS
 tuning_cv_sequence = [
     816,
     1632,
@@ -93,7 +210,11 @@ tuning_cv_sequence = [
     816,
     1632,
 ]
-test_cv_sequence = []
+test_cv_sequence = [0] * MAX_NUMBER_OF_STEPS
+# song mode prefetches the next pattern into these, at the bar boundary they swap places with the sequences above
+next_cv_sequence = [0] * MAX_NUMBER_OF_STEPS
+next_trigger_sequence = [1] * MAX_NUMBER_OF_STEPS
+ratchet_sequence = bytearray(1 for _ in range(MAX_NUMBER_OF_STEPS))  # gates per step
 current_step = 0
 number_of_steps = 16  # user can edit from 1 to any
 step_changed_on_clock_pulse = False
@@ -103,190 +224,653 @@ trigger_length_percent = 50
 trigger_start_ticks = 0
 previous_clock_ticks = 0
 trigger_active = False
-clock_ms = 0
+clock_ms = 0  # how long the last clock pulse was high
 trig_length_ms = 0
+CLOCK_RATIO_NAMES = ["/4", "/3", "/2", "x1", "x2", "x3", "x4", "x6", "x8"]
+CLOCK_RATIOS = (-4, -3, -2, 1, 2, 3, 4, 6, 8)  # negative divides
+clock_ratio = 1
+clock_division_count = 0  # edges since the last step of a divided clock
+MAX_RATCHETS = 8
+RATCHET_GAP_US = 1_000  # the gate is off at least this long between ratchets
+ratchet_probability_of_change = 0
+gate_scheduled = False  # the scheduler turns the gate off, not check_trigger_off()
+# scheduler events
+EVENT_STEP = 1
+EVENT_GATE_ON = 2
+EVENT_GATE_OFF = 3  # argument 1 for the last gate of a ratchet
+EVENT_CLOCK_OUT_OFF = 4
+is_internal_clock = False
+internal_bpm = 120
+MIN_BPM = 30
+MAX_BPM = 300
+internal_clock_running = False
+internal_clock_tick_us = 0  # when the internal clock timer's next tick is due
+is_clock_out = False
+CLOCK_OUT_WIDTH_US = 5_000
+EXTERNAL_CLOCK_TIMEOUT_MS = 2_000  # the internal clock starts after this long without an external edge
+external_clock_ticks = 0  # ticks_ms of the last edge at the clock input, 0 before the first
+RESET_MODE_NAMES = ["Reset", "Hold", "Reverse", "Mutate"]
+RESET_MODE_RESET = 0
+RESET_MODE_HOLD = 1
+RESET_MODE_REVERSE = 2
+RESET_MODE_MUTATE = 3
+reset_mode = RESET_MODE_RESET
+RESET_COINCIDENCE_US = 2_000  # a reset this soon after a clock edge belongs to that edge
+reset_pending = False  # latched by digital_edge_irq(), taken by the next clock edge
+reset_edge_us = 0  # ticks_us of the last reset trigger
+step_direction = 1  # -1 plays the sequence backwards
+MENU_REDRAW_US = 25_000  # a menu stage that redraws the display blocks the loop about this long
+MENU_MAX_DEFER_US = 50_000  # the menu waits at most this long for room before the predicted edge
+menu_deferred_since_us = 0
 ticks_to_trigger_off = 0
 is_cv_erase = False
 is_trig_erase = False
 is_test_cv_sequence = False
 is_tuning_cv_sequence = False
+is_quantizer = False
+is_quantizer_sample_and_hold = False
+QUANTIZER_SAMPLES = 4  # ADC over-samples per quantizer conversion
+NO_CV = 0xFFFF  # the step did not write the DAC, as event_log.NO_CV
+previous_quantized_cv = -1
+is_latency_probe = False
+step_reference_us = 0  # what the latency probe measures the step against: its clock edge or its scheduled time
+clock_edge_count = 0  # rising edges counted by clock_edge_irq(), wraps at 16 bits so the IRQ never allocates
+CLOCK_EDGE_TIMES = 8  # a power of two, the timestamps of the last edges kept for catching up
+clock_edge_times = array("l", (0 for _ in range(CLOCK_EDGE_TIMES)))  # indexed by the edge count
+handled_clock_edges = 0  # the edges handle_clock_pulse() has played or caught up
+CATCH_UP_NAMES = ["Latest", "All"]
+CATCH_UP_LATEST = 0  # edges missed by the main loop only move the step on, the latest edge is played
+CATCH_UP_ALL = 1  # every missed edge's step is played, late
+catch_up_policy = CATCH_UP_LATEST
+caught_up_clock_edges = 0
+is_profiling = False
+is_fixed_memory = False
+is_gc_self_test = False
+is_song_mode = False
+is_recording = False
 
 # scales
-scale_intervals = sc.get_intervals()
 current_scale_interval = "major"
-starting_note = 12  # start at the next octave to prevent low voltage output issues (the note 0 will not be in tune) refer to the mcp4725 1vOct table
+starting_note = 0  # Start note menu value, the scale starts 12 notes higher
+# start at the next octave to prevent low voltage output issues (the note 0 will not be in tune) refer to the mcp4725 1vOct table
 number_of_octaves = 1
-current_12bit_scale = sc.get_scale_of_12_bit_values(
+# the scale table has room for the longest scale, only its first current_scale_length values are used
+MAX_SCALE_LENGTH = 12 * MAX_NUMBER_OF_OCTAVES + 1
+current_12bit_scale = array("H", (0 for _ in range(MAX_SCALE_LENGTH)))
+current_scale_length = sc.fill_12_bit_values(
+    current_12bit_scale,
     scale_interval=current_scale_interval,
-    starting_note=starting_note,
+    starting_note=starting_note + 12,
     octaves=number_of_octaves,
 )
 
-# menu
-main_menu = m.MainMenu()
-
-scale_menu = m.SingleSelectVerticalScrollMenu(
-    "Scale",
-    button=main_menu.button,
-    selected=current_scale_interval,
-    items=scale_intervals,
-)
-
-cv_prob_menu = m.NumericalValueRangeMenu(
-    "CVProb", button=main_menu.button, selected=cv_probability_of_change, increment=5
-)
-
-trig_prob_menu = m.NumericalValueRangeMenu(
-    "TrigProb",
-    button=main_menu.button,
-    selected=trigger_probability_of_change,
-    increment=5,
-)
-
-trig_length_menu = m.NumericalValueRangeMenu(
-    "TrgLngth%",
-    button=main_menu.button,
-    selected=trigger_length_percent,
-    increment=10,
-)
-
-steps_menu = m.NumericalValueRangeMenu(
-    "Steps",
-    button=main_menu.button,
-    selected=number_of_steps,
-    increment=1,
-    min_val=MIN_NUMBER_OF_STEPS,
-    max_val=MAX_NUMBER_OF_STEPS,
-)
-
-octaves_menu = m.NumericalValueRangeMenu(
-    "Octaves",
-    button=main_menu.button,
-    selected=number_of_octaves,
-    increment=1,
-    min_val=MIN_NUMBER_OF_OCTAVES,
-    max_val=MAX_NUMBER_OF_OCTAVES,
-)
-
-starting_note_menu = m.NumericalValueRangeMenu(
-    "Start note",
-    button=main_menu.button,
-    selected=0,
-    increment=1,
-    min_val=0,
-    max_val=36,
-)
-
-cv_erase_toggle_menu = m.ToggleMenu(
-    "CvErase", button=main_menu.button, value=is_cv_erase
-)
+# every random number of the sequencer comes from here, seeded from the hardware random generator
+rng = prng.Xorshift32(random.getrandbits(32))
+
+# set up by boot_user_interface()
+m = None
+el = None
+event_log = None
+main_menu = None
+quantizer = None
+latency_probe = None
+loop_profiler = None
+song = None
+device_bench = None
+
+# main loop stages, in order
+STAGE_MENU = 0
+STAGE_CLOCK = 1
+STAGE_TRIGGER_OFF = 2
+STAGE_QUANTIZER = 3
+STAGE_IDLE = 4
+
+idle_collector = IdleCollector()
+tempo = TempoTracker()
+presets = ps.PresetStore()
+
+# boot timeline, ticks_us since reset
+first_dac_write_us = 0
+ui_ready_us = 0
+
+
+@micropython.native
+def handle_clock_pulse() -> None:
+    """
+    Plays the rising edges counted by clock_edge_irq() and polls the falling edge. Edges whose whole pulse
+    fell into a stage that blocked the main loop (a display flush, a boot stage) are caught up first.
+    """
+    global step_changed_on_clock_pulse, clock_ms, external_clock_ticks, handled_clock_edges, caught_up_clock_edges
 
-trig_erase_toggle_menu = m.ToggleMenu(
-    "TrigErase", button=main_menu.button, value=is_trig_erase
-)
+    current_clock_ticks = time.ticks_ms()
+    edge_count = clock_edge_count
+    queued = (edge_count - handled_clock_edges) & 0xFFFF
+    if queued:
+        # Clock rising edge detected
+        handled_clock_edges = edge_count
+        if internal_clock_running:
+            stop_internal_clock()  # the external clock takes over
+        external_clock_ticks = current_clock_ticks or 1
+        if queued > 1:
+            caught_up_clock_edges += queued - 1
+            for behind in range(queued - 1, 0, -1):
+                # edges further behind than the timestamps kept share the oldest one
+                edge = edge_count - min(behind, CLOCK_EDGE_TIMES - 1)
+                catch_up_clock_edge(clock_edge_times[edge & (CLOCK_EDGE_TIMES - 1)])
+        play_step(current_clock_ticks, clock_edge_times[edge_count & (CLOCK_EDGE_TIMES - 1)])
+
+    elif step_changed_on_clock_pulse and clock_in.value() == 1:
+        # Clock falling edge detected
+        step_changed_on_clock_pulse = False
+        clock_ms = time.ticks_diff(current_clock_ticks, previous_clock_ticks)
+        if is_recording:
+            event_log.record(el.CLOCK_FALL)
+        # print("Clock length ms:", clock_ms)
+
+
+def catch_up_clock_edge(edge_us: int) -> None:
+    """An edge the main loop missed: its steps are played late, or only counted to stay on the beat"""
+    global clock_division_count, step_reference_us
+    tempo.edge(edge_us)
+    step_reference_us = edge_us
+    if reset_pending and reset_mode == RESET_MODE_RESET and time.ticks_diff(reset_edge_us, edge_us) <= 0:
+        reset_sequence()
+    if clock_ratio < 0:
+        divided_edge = clock_division_count
+        clock_division_count = (clock_division_count + 1) % -clock_ratio
+        if divided_edge:
+            return
+    for _ in range(clock_ratio if clock_ratio > 1 else 1):
+        if catch_up_policy == CATCH_UP_ALL:
+            output_step()
+        else:
+            advance_step()
 
-test_cv_scale_toggle_menu = m.ToggleMenu(
-    "TestScale", button=main_menu.button, value=is_test_cv_sequence
-)
 
-is_tuning_cv_scale_menu = m.ToggleMenu(
-    "TuningScale", button=main_menu.button, value=is_tuning_cv_sequence
-)
+def advance_step() -> None:
+    """Moves to the next step in the play direction, wrapping inside the current length"""
+    global current_step
+    current_step = (current_step + step_direction) % number_of_steps
+    if is_song_mode and song.step_played():
+        switch_pattern()
 
-submenus = [
-    scale_menu,
-    cv_prob_menu,
-    trig_prob_menu,
-    trig_length_menu,
-    steps_menu,
-    octaves_menu,
-    starting_note_menu,
-    cv_erase_toggle_menu,
-    trig_erase_toggle_menu,
-    test_cv_scale_toggle_menu,
-    is_tuning_cv_scale_menu,
-]
-main_menu.set_submenus(submenu_list=submenus)
 
-# analog inputs
-cv1 = AnalogueReader(A3)
-cv2 = AnalogueReader(A2)
-cv3 = AnalogueReader(A1)
-cv4 = AnalogueReader(A0)
+@micropython.native
+def play_step(current_clock_ticks: int, edge_us: int) -> None:
+    """
+    Called on the clock's rising edge: outputs the current step, only on every nth edge when
+    the clock is divided, and schedules the steps in between when it is multiplied.
+    edge_us is when the edge came (clock_edge_irq()'s timestamp), not when the main loop got to it.
+    """
+    global step_changed_on_clock_pulse, previous_clock_ticks, clock_division_count, step_reference_us
+    if is_gc_self_test:
+        idle_collector.edge_started()
+    if is_recording:
+        event_log.record(el.CLOCK_RISE)
+    tempo.edge(edge_us)
+    step_reference_us = edge_us
+    previous_clock_ticks = current_clock_ticks
+    step_changed_on_clock_pulse = True
+    if reset_pending and reset_mode == RESET_MODE_RESET and time.ticks_diff(reset_edge_us, edge_us) <= 0:
+        reset_sequence()  # the reset came first
+
+    if clock_ratio < 0:
+        divided_edge = clock_division_count
+        clock_division_count = (clock_division_count + 1) % -clock_ratio
+        if divided_edge == 0:
+            output_step()
+    else:
+        if scheduler.size:
+            scheduler.cancel(EVENT_STEP)  # left over from a slower clock
+        output_step()
+        if clock_ratio > 1:
+            schedule_multiplied_steps(edge_us)
+    if is_gc_self_test:
+        idle_collector.edge_finished()
+
+
+def step_length_us() -> int:
+    """The clock period multiplied or divided by the clock ratio, 0 until the tempo tracker has a period"""
+    if clock_ratio < 0:
+        return tempo.period_us * -clock_ratio
+    return tempo.period_us // clock_ratio
+
+
+def schedule_multiplied_steps(edge_us: int) -> None:
+    length_us = step_length_us()
+    if not length_us:
+        return  # one step per edge until there is a period to divide
+    for step in range(1, clock_ratio):
+        scheduler.schedule(time.ticks_add(edge_us, step * length_us), EVENT_STEP)
+
+
+@micropython.native
+def output_step() -> None:
+    """Mutates and outputs the current step's CV and gate, then moves to the next step."""
+    global current_step, trigger_start_ticks, trigger_active, ticks_to_trigger_off, gate_scheduled
+    if current_step >= number_of_steps:
+        current_step %= number_of_steps  # the length was lowered from a menu or a timer callback came in between
+    if not (reset_mode == RESET_MODE_HOLD and digital_in.value() == 0):
+        randomly_change_current_step_cv()
+        randomly_change_step_trigger()
+        randomly_change_step_ratchet()
+
+    if is_cv_erase:
+        cv_sequence[current_step] = current_12bit_scale[0]
+
+    if is_trig_erase:
+        trigger_sequence[current_step] = 1
+
+    # Output the CV value
+    cv = NO_CV
+    if is_quantizer_sample_and_hold:
+        cv = quantizer.quantize(quantizer_input.code(QUANTIZER_SAMPLES))
+    elif is_quantizer:
+        pass  # the DAC is written continuously by quantize_input()
+    elif is_test_cv_sequence:
+        cv = test_cv_sequence[current_step]
+    elif is_tuning_cv_sequence:
+        cv = tuning_cv_sequence[current_step]
+    else:
+        cv = cv_sequence[current_step]
+    if cv != NO_CV:
+        dac.write(cv)
 
+    if is_latency_probe:
+        cv_done_us = time.ticks_us()
 
-def handle_clock_pulse() -> None:
-    global current_step, step_changed_on_clock_pulse, clock_in, number_of_steps, previous_clock_ticks, clock_ms, trigger_start_ticks, trigger_active, ticks_to_trigger_off
+    # Calculate trigger length, from the pulse length until two edges give a period
+    length_us = step_length_us()
+    if length_us:
+        trig_length_ms = (length_us // 1000 * trigger_length_percent) // 100
+    else:
+        trig_length_ms = (clock_ms * trigger_length_percent) // 100
+    if gate_scheduled:
+        # the previous step's ratchets did not finish
+        scheduler.cancel(EVENT_GATE_ON)
+        scheduler.cancel(EVENT_GATE_OFF)
+        gate_scheduled = False
+    # print("Trigger length ms:", trig_length_ms)
+
+    # Trigger output logic, the digital output may send the internal clock instead
+    if trigger_sequence[current_step] == 1 and not (is_clock_out and internal_clock_running):
+        digital_out.value(0)  # Turn on trigger
+        trigger_start_ticks = time.ticks_ms()  # Store trigger start time
+
+        # print("Trigger on")
+        # print("Trigger start ticks", trigger_start_ticks)
+
+        # calculate trigger off ticks
+        ticks_to_trigger_off = time.ticks_add(
+            trig_length_ms, trigger_start_ticks
+        )
+        trigger_active = True  # Mark trigger as active
+        if ratchet_sequence[current_step] > 1 and length_us:
+            schedule_ratchets(ratchet_sequence[current_step], length_us)
+
+    if is_latency_probe:
+        record_step_latency(cv_done_us, trigger_sequence[current_step] == 1)
+
+    if is_recording:
+        event_log.step(current_step, trigger_sequence[current_step], cv)
+
+    advance_step()
+    idle_collector.due = True
+
+
+def schedule_ratchets(ratchets: int, length_us: int) -> None:
+    """Splits the step into evenly spaced gates, the first one is already on"""
+    global gate_scheduled
+    start_us = time.ticks_us()
+    ratchet_us = length_us // ratchets
+    gate_us = min(ratchet_us * trigger_length_percent // 100, ratchet_us - RATCHET_GAP_US)
+    if gate_us <= 0:
+        return  # too fast to hear separate gates
+    gate_scheduled = True
+    for ratchet in range(ratchets):
+        on_us = time.ticks_add(start_us, ratchet * ratchet_us)
+        if ratchet:
+            scheduler.schedule(on_us, EVENT_GATE_ON)
+        scheduler.schedule(time.ticks_add(on_us, gate_us), EVENT_GATE_OFF, 1 if ratchet == ratchets - 1 else 0)
+
+
+def handle_scheduled_event(event: int, argument: int, late_us: int) -> None:
+    """Runs the scheduler's events, from its timer callback."""
+    global trigger_active, gate_scheduled, step_reference_us
+    if event == EVENT_STEP:
+        step_reference_us = time.ticks_add(time.ticks_us(), -late_us)  # the deadline
+        output_step()
+    elif event == EVENT_GATE_ON:
+        digital_out.value(0)
+    elif event == EVENT_GATE_OFF:
+        digital_out.value(1)
+        if argument:
+            trigger_active = False
+            gate_scheduled = False
+    elif event == EVENT_CLOCK_OUT_OFF:
+        digital_out.value(1)
+
+
+def reset_sequence() -> None:
+    """The next step is the first one, the last one when playing backwards"""
+    global current_step, reset_pending, clock_division_count
+    reset_pending = False
+    current_step = 0 if step_direction > 0 else number_of_steps - 1
+    clock_division_count = 0
+    if is_song_mode:
+        song.restart_bar()
+
+
+def digital_edge_irq(pin) -> None:
+    """
+    The digital input's hard IRQ on both edges: latches a reset with its timestamp (the input is inverted),
+    the rest runs soft. Only Reset mode latches, a clock edge before the soft handler must not reset for the others.
+    """
+    global reset_pending, reset_edge_us
+    level = pin.value()
+    if level == 0 and reset_mode == RESET_MODE_RESET:
+        reset_edge_us = time.ticks_us()
+        reset_pending = True
+    micropython.schedule(handle_digital_edge, level)
 
-    current_clock_ticks = time.ticks_ms()
 
-    if current_step < number_of_steps:
-        if clock_in.value() == 0 and not step_changed_on_clock_pulse:
-            # Clock rising edge detected
-            previous_clock_ticks = current_clock_ticks
-            test_cv_sequence = get_test_sequence()  # Update CV sequence
-            step_changed_on_clock_pulse = True
-
-            randomly_change_current_step_cv()
-            randomly_change_step_trigger()
-
-            if is_cv_erase:
-                cv_sequence[current_step] = current_12bit_scale[0]
-
-            if is_trig_erase:
-                trigger_sequence[current_step] = 1
-
-            # Output the CV value
-            if is_test_cv_sequence:
-                dac.write(test_cv_sequence[current_step])
-            elif is_tuning_cv_sequence:
-                dac.write(tuning_cv_sequence[current_step])
-            else:
-                dac.write(cv_sequence[current_step])
-
-            # Calculate trigger length
-            trig_length_ms = (clock_ms * trigger_length_percent) // 100
-            # print("Trigger length ms:", trig_length_ms)
-
-            # Trigger output logic
-            if trigger_sequence[current_step] == 1:
-                digital_out.value(0)  # Turn on trigger
-                trigger_start_ticks = time.ticks_ms()  # Store trigger start time
-
-                # print("Trigger on")
-                # print("Trigger start ticks", trigger_start_ticks)
-
-                # calculate trigger off ticks
-                ticks_to_trigger_off = time.ticks_add(
-                    trig_length_ms, trigger_start_ticks
-                )
-                trigger_active = True  # Mark trigger as active
-
-            current_step += 1
-
-        if clock_in.value() == 1 and step_changed_on_clock_pulse:
-            # Clock falling edge detected
-            step_changed_on_clock_pulse = False
-            clock_ms = time.ticks_diff(current_clock_ticks, previous_clock_ticks)
-            # print("Clock length ms:", clock_ms)
-    else:
+def handle_digital_edge(level: int) -> None:
+    """
+    Logs the digital input while recording and handles a trigger. Reverse and Mutate act now,
+    a reset waits for the next clock edge unless it came right after the last one.
+    """
+    global step_direction, reset_pending, clock_division_count
+    if is_recording:
+        event_log.record(el.DIGITAL, level)
+    if level != 0:
+        return  # the trigger ended
+    if reset_mode == RESET_MODE_REVERSE:
+        step_direction = -step_direction
+    elif reset_mode == RESET_MODE_MUTATE:
+        mutate_whole_sequence()
+    elif reset_mode == RESET_MODE_RESET and reset_pending and tempo.edges:
+        since_edge_us = time.ticks_diff(reset_edge_us, tempo.last_edge_us)
+        if 0 < since_edge_us < RESET_COINCIDENCE_US:
+            # the step of this edge was already output, output the first step instead
+            reset_sequence()
+            if clock_ratio < 0:
+                clock_division_count = 1 % -clock_ratio
+            output_step()
+
+
+def mutate_whole_sequence() -> None:
+    """Draws a new note and gate for every step"""
+    for step in range(number_of_steps):
+        cv_sequence[step] = current_12bit_scale[rng.randint(0, current_scale_length - 1)]
+        trigger_sequence[step] = rng.randint(0, 1)
+
+
+def internal_clock_period_us() -> int:
+    return 15_000_000 // internal_bpm  # a step is a 16th
+
+
+def internal_clock_tick(timer) -> None:
+    """
+    The internal clock timer's callback, plays a step like a clock edge at the input.
+    The tick's due time stands in for the edge timestamp, so the latency probe measures how late the callback ran.
+    """
+    global step_changed_on_clock_pulse, internal_clock_tick_us
+    tick_us = internal_clock_tick_us
+    period_us = internal_clock_period_us()
+    if time.ticks_diff(time.ticks_us(), tick_us) >= period_us:
+        tick_us = time.ticks_us()  # a tick was dropped, follow the timer from here
+    internal_clock_tick_us = time.ticks_add(tick_us, period_us)
+    if is_clock_out:
+        digital_out.value(0)
+        scheduler.schedule(time.ticks_add(time.ticks_us(), CLOCK_OUT_WIDTH_US), EVENT_CLOCK_OUT_OFF)
+    play_step(time.ticks_ms(), tick_us)
+    step_changed_on_clock_pulse = False  # there is no falling edge to wait for
+
+
+def start_internal_clock() -> None:
+    global internal_clock_running, internal_clock_tick_us
+    internal_clock_running = True
+    internal_clock_tick_us = time.ticks_add(time.ticks_us(), internal_clock_period_us())
+    internal_clock.init(
+        mode=machine.Timer.PERIODIC,
+        period=internal_clock_period_us(),
+        tick_hz=1_000_000,
+        callback=internal_clock_tick,
+        hard=False,
+    )
+    logger.info("Internal clock started, BPM:", internal_bpm)
+
+
+def stop_internal_clock() -> None:
+    global internal_clock_running
+    internal_clock.deinit()
+    internal_clock_running = False
+    if is_clock_out:
+        scheduler.cancel(EVENT_CLOCK_OUT_OFF)
+        digital_out.value(1)
+    logger.info("Internal clock stopped")
+
+
+def update_clock_source() -> None:
+    """Starts the internal clock when it is on and no edge came to the clock input for EXTERNAL_CLOCK_TIMEOUT_MS"""
+    if not is_internal_clock or internal_clock_running:
+        return
+    if external_clock_ticks and time.ticks_diff(time.ticks_ms(), external_clock_ticks) < EXTERNAL_CLOCK_TIMEOUT_MS:
+        return
+    start_internal_clock()
+
+
+def switch_pattern() -> None:
+    """Starts the prefetched pattern at the bar boundary by swapping the sequences, nothing is read or copied."""
+    global cv_sequence, trigger_sequence, next_cv_sequence, next_trigger_sequence, number_of_steps, current_step
+    cv_sequence, next_cv_sequence = next_cv_sequence, cv_sequence
+    trigger_sequence, next_trigger_sequence = next_trigger_sequence, trigger_sequence
+    number_of_steps = song.pattern_steps
+    current_step = 0
+
+
+def set_song_mode(enabled: bool) -> None:
+    """Song mode starts from the first chain entry, the pattern's length replaces the Steps setting."""
+    global is_song_mode, number_of_steps, current_step
+    if enabled and not song.bank.open():
+        logger.warning("Song mode needs a pattern bank:", song.bank.path)
+        song_toggle_menu.value = False
+        return
+    if enabled:
+        number_of_steps = song.start(cv_sequence, trigger_sequence)
         current_step = 0
+    else:
+        number_of_steps = steps_menu.selected
+        current_step %= number_of_steps
+    is_song_mode = enabled
 
 
 def check_trigger_off():
     """Turn off the trigger when the time is reached."""
     global trigger_active, trigger_start_ticks, trig_length_ms, ticks_to_trigger_off
     current_ticks = time.ticks_ms()
-    if trigger_active:
+    if trigger_active and not gate_scheduled:
         if current_ticks >= ticks_to_trigger_off:
             # print("trigger off")
             digital_out.value(1)  # Turn off trigger
             trigger_active = False  # Reset trigger state
 
 
+def quantize_input() -> None:
+    """Writes the quantized input to the DAC when it lands on a different note."""
+    global previous_quantized_cv
+    quantized_cv = quantizer.quantize(quantizer_input.code(QUANTIZER_SAMPLES))
+    if quantized_cv != previous_quantized_cv:
+        previous_quantized_cv = quantized_cv
+        dac.write(quantized_cv)
+
+
+def clock_edge_irq(pin) -> None:
+    """Counts and timestamps the clock's rising edges (the input is inverted), handle_clock_pulse() plays them."""
+    global clock_edge_count
+    edge_count = (clock_edge_count + 1) & 0xFFFF
+    clock_edge_times[edge_count & (CLOCK_EDGE_TIMES - 1)] = time.ticks_us()
+    clock_edge_count = edge_count
+
+
+def set_latency_probe(enabled: bool) -> None:
+    global is_latency_probe
+    is_latency_probe = enabled
+    if enabled:
+        latency_probe.clear()
+
+
+def record_step_latency(cv_done_us: int, gate_on: bool) -> None:
+    """Measured from the step's clock edge, or from its deadline for a step the scheduler plays between edges"""
+    gate_latency_us = time.ticks_diff(time.ticks_us(), step_reference_us) if gate_on else -1
+    latency_probe.record(
+        step_reference_us, time.ticks_diff(cv_done_us, step_reference_us), gate_latency_us
+    )
+
+
+def run_profiled_loop_iteration() -> None:
+    """One iteration of the main loop with every stage timed."""
+    start_us = time.ticks_us()
+    if is_menu_due():
+        main_menu.loop_main_menu(
+            update_main_program_values_callback=update_sequencer_values
+        )
+    menu_done_us = time.ticks_us()
+    handle_clock_pulse()
+    clock_done_us = time.ticks_us()
+    check_trigger_off()
+    end_us = time.ticks_us()
+    loop_profiler.add(STAGE_MENU, time.ticks_diff(menu_done_us, start_us))
+    loop_profiler.add(STAGE_CLOCK, time.ticks_diff(clock_done_us, menu_done_us))
+    loop_profiler.add(STAGE_TRIGGER_OFF, time.ticks_diff(end_us, clock_done_us))
+    if is_quantizer and not is_quantizer_sample_and_hold:
+        quantize_input()
+        quantizer_done_us = time.ticks_us()
+        loop_profiler.add(STAGE_QUANTIZER, time.ticks_diff(quantizer_done_us, end_us))
+        end_us = quantizer_done_us
+    if not trigger_active and not step_changed_on_clock_pulse:
+        run_idle_tasks()
+        idle_done_us = time.ticks_us()
+        loop_profiler.add(STAGE_IDLE, time.ticks_diff(idle_done_us, end_us))
+        end_us = idle_done_us
+    loop_profiler.end_iteration(time.ticks_diff(end_us, start_us), end_us)
+
+
+def memory_report_lines() -> list[str]:
+    """Takes the steady state snapshot when the Memory screen is opened."""
+    memory_report.snapshot("now")
+    return memory_report.summary_lines()
+
+
+def run_idle_tasks() -> None:
+    """Work kept away from clock edges and gates: garbage collection in fixed memory mode, starting the internal clock, preset saves and log output."""
+    if is_fixed_memory:
+        collect_garbage()
+    if is_song_mode:
+        song.prefetch(next_cv_sequence, next_trigger_sequence)
+    if is_recording and event_log.keyframe_due():
+        record_keyframe()
+    update_clock_source()
+    save_preset()
+    logger.idle()
+
+
+def idle_time_us() -> int:
+    """
+    Time left until the predicted clock edge, 0 until two edges have given a period to predict from.
+    A stopped clock leaves all the time in the world.
+    """
+    now_us = time.ticks_us()
+    if tempo.is_stopped(now_us):
+        return presets.write_budget_us
+    return tempo.until_next_edge_us(now_us)
+
+
+def collect_garbage() -> None:
+    """Collects if the time left until the predicted clock edge fits the GC pause budget."""
+    idle_collector.collect(idle_time_us())
+
+
+def is_clock_stopped() -> bool:
+    return tempo.is_stopped(time.ticks_us())
+
+
+def is_menu_due() -> bool:
+    """
+    The menu stage waits while the predicted clock edge is closer than a display redraw.
+    Clocks too fast for any redraw to fit between edges get it after MENU_MAX_DEFER_US, once the
+    gate is off and the clock low (after 4 times as long whatever the outputs do), so the encoder
+    and the button stay responsive and a redraw does not hold a gate on.
+    """
+    global menu_deferred_since_us
+    now_us = time.ticks_us()
+    if tempo.is_stopped(now_us) or tempo.until_next_edge_us(now_us) >= MENU_REDRAW_US:
+        menu_deferred_since_us = 0
+        return True
+    if not menu_deferred_since_us:
+        menu_deferred_since_us = now_us or 1
+        return False
+    deferred_us = time.ticks_diff(now_us, menu_deferred_since_us)
+    if deferred_us < MENU_MAX_DEFER_US:
+        return False
+    if (trigger_active or step_changed_on_clock_pulse) and deferred_us < 4 * MENU_MAX_DEFER_US:
+        return False
+    menu_deferred_since_us = 0
+    return True
+
+
+def save_preset() -> None:
+    """Saves the settings and steps when they changed, if the time left until the predicted clock edge fits a flash write."""
+    idle_us = idle_time_us()
+    presets.save_if_changed(
+        idle_us,
+        current_scale_interval,
+        starting_note,
+        number_of_octaves,
+        number_of_steps,
+        cv_probability_of_change,
+        trigger_probability_of_change,
+        trigger_length_percent,
+        cv_sequence,
+        trigger_sequence,
+        clock_ratio,
+        ratchet_probability_of_change,
+        ratchet_sequence,
+    )
+
+
+def preset_parameter(index: int, min_val: int, max_val: int) -> int:
+    """A setting of the loaded preset within its menu's range, a record of another layout can hold anything"""
+    return min(max(presets.parameter(index), min_val), max_val)
+
+
+def restore_preset() -> None:
+    """Takes the settings and steps of the preset loaded at boot."""
+    global current_scale_interval, starting_note, number_of_octaves, number_of_steps, cv_probability_of_change, trigger_probability_of_change, trigger_length_percent, current_scale_length, clock_ratio, ratchet_probability_of_change
+    scale_name = presets.scale_name()
+    if scale_name in sc.scale_intervals:
+        current_scale_interval = scale_name
+    starting_note = preset_parameter(ps.START_NOTE, 0, MAX_STARTING_NOTE)
+    number_of_octaves = preset_parameter(ps.OCTAVES, MIN_NUMBER_OF_OCTAVES, MAX_NUMBER_OF_OCTAVES)
+    number_of_steps = preset_parameter(ps.STEPS, MIN_NUMBER_OF_STEPS, MAX_NUMBER_OF_STEPS)
+    cv_probability_of_change = preset_parameter(ps.CV_PROBABILITY, 0, 100)
+    trigger_probability_of_change = preset_parameter(ps.TRIG_PROBABILITY, 0, 100)
+    trigger_length_percent = preset_parameter(ps.TRIG_LENGTH, 0, 100)
+    if presets.clock_ratio() in CLOCK_RATIOS:
+        clock_ratio = presets.clock_ratio()
+    ratchet_probability_of_change = preset_parameter(ps.RATCHET_PROBABILITY, 0, 100)
+    presets.read_steps(cv_sequence, trigger_sequence, ratchet_sequence)
+    current_scale_length = sc.fill_12_bit_values(
+        current_12bit_scale,
+        starting_note=starting_note + 12,
+        scale_interval=current_scale_interval,
+        octaves=number_of_octaves,
+    )
+
+
 def randomly_change_current_step_cv() -> None:
     # get random index of scale chosen
-    random_scale_index = random.randint(0, len(current_12bit_scale) - 1)
+    random_scale_index = rng.randint(0, current_scale_length - 1)
     # set cv from scale list
     if generate_boolean_with_probability(cv_probability_of_change):
         # print("change cv")
@@ -295,11 +879,17 @@ def randomly_change_current_step_cv() -> None:
 
 def randomly_change_step_trigger() -> None:
     global trigger_sequence
-    trig_on_or_off = random.randint(0, 1)
+    trig_on_or_off = rng.randint(0, 1)
     if generate_boolean_with_probability(trigger_probability_of_change):
         trigger_sequence[current_step] = trig_on_or_off
 
 
+def randomly_change_step_ratchet() -> None:
+    """No random numbers are drawn with RatchProb at 0, so the sequences play as they did without ratchets."""
+    if ratchet_probability_of_change and generate_boolean_with_probability(ratchet_probability_of_change):
+        ratchet_sequence[current_step] = rng.randint(1, MAX_RATCHETS)
+
+
 def generate_boolean_with_probability(probability: float) -> bool:
     """
     Returns True or False based on the given probability.
@@ -312,24 +902,21 @@ def generate_boolean_with_probability(probability: float) -> bool:
     if not 0 <= probability <= 100:
         raise ValueError("Probability must be between 0 and 100")
 
-    return random.random() * 100 <= probability
+    # integer comparison, a float random number would be allocated on every step
+    return rng.randint(1, 100) <= probability
 
 
 def populate_sequence_with_default() -> None:
     global cv_sequence, current_12bit_scale, MAX_NUMBER_OF_STEPS
-    for _ in range(0, MAX_NUMBER_OF_STEPS):
-        cv_sequence.append(current_12bit_scale[0])
-        trigger_sequence.append(1)
+    for step in range(0, MAX_NUMBER_OF_STEPS):
+        cv_sequence[step] = current_12bit_scale[0]
+        trigger_sequence[step] = 1
 
 
-def get_test_sequence() -> list[int]:
-    sequence = []
-    while len(sequence) < MAX_NUMBER_OF_STEPS:
-        for cv_value in current_12bit_scale:
-            if len(sequence) < MAX_NUMBER_OF_STEPS:
-                sequence.append(cv_value)
-    # print(sequence)
-    return sequence
+def fill_test_sequence() -> None:
+    """Repeats the current scale over the test sequence, in place."""
+    for step in range(MAX_NUMBER_OF_STEPS):
+        test_cv_sequence[step] = current_12bit_scale[step % current_scale_length]
 
 
 def update_sequencer_values() -> None:
@@ -341,81 +928,599 @@ def update_sequencer_values() -> None:
         number of steps,
         number of octaves
     """
-    global current_12bit_scale, cv_probability_of_change, trigger_probability_of_change, number_of_steps, current_scale_interval, number_of_octaves, starting_note, is_test_cv_sequence, test_cv_sequence, is_cv_erase, is_tuning_cv_sequence, trigger_length_percent, is_trig_erase
-    print("update_sequencer_values")
+    global current_scale_length, cv_probability_of_change, trigger_probability_of_change, number_of_steps, current_scale_interval, number_of_octaves, starting_note, is_test_cv_sequence, test_cv_sequence, is_cv_erase, is_tuning_cv_sequence, trigger_length_percent, is_trig_erase, is_quantizer, is_quantizer_sample_and_hold, previous_quantized_cv, is_profiling, is_fixed_memory, is_gc_self_test, clock_ratio, clock_division_count, ratchet_probability_of_change, is_internal_clock, internal_bpm, is_clock_out, reset_mode, reset_pending, catch_up_policy, current_step
+    logger.debug("update_sequencer_values")
     submenus = main_menu.get_submenu_list()
     for submenu in submenus:
         if submenu.name is scale_menu.name:
             if current_scale_interval != submenu.selected:
                 current_scale_interval = submenu.selected
-                print("Scale changed:", current_scale_interval)
+                logger.info("Scale changed:", current_scale_interval)
 
         elif submenu.name is cv_prob_menu.name:
             if cv_probability_of_change != submenu.selected:
                 cv_probability_of_change = submenu.selected
-                print("CV probability changed:", cv_probability_of_change)
+                logger.info("CV probability changed:", cv_probability_of_change)
 
         elif submenu.name is trig_prob_menu.name:
             if trigger_probability_of_change != submenu.selected:
                 trigger_probability_of_change = submenu.selected
-                print("Trig probability changed:", trigger_probability_of_change)
+                logger.info("Trig probability changed:", trigger_probability_of_change)
 
         elif submenu.name is trig_length_menu.name:
             if trigger_length_percent != submenu.selected:
                 trigger_length_percent = submenu.selected
-                print("Trig length changed:", trigger_length_percent)
+                logger.info("Trig length changed:", trigger_length_percent)
+
+        elif submenu.name is clock_ratio_menu.name:
+            if clock_ratio != CLOCK_RATIOS[submenu.selected_index]:
+                clock_ratio = CLOCK_RATIOS[submenu.selected_index]
+                clock_division_count = 0
+                scheduler.cancel(EVENT_STEP)
+                logger.info("Clock ratio changed:", submenu.selected)
+
+        elif submenu.name is ratchet_prob_menu.name:
+            if ratchet_probability_of_change != submenu.selected:
+                ratchet_probability_of_change = submenu.selected
+                logger.info("Ratchet probability changed:", ratchet_probability_of_change)
+
+        elif submenu.name is internal_clock_toggle_menu.name:
+            if is_internal_clock != submenu.value:
+                is_internal_clock = submenu.value
+                if not is_internal_clock and internal_clock_running:
+                    stop_internal_clock()
+                logger.info("ToggleMenu changed:", submenu.value)
+
+        elif submenu.name is bpm_menu.name:
+            if internal_bpm != submenu.selected:
+                internal_bpm = submenu.selected
+                if internal_clock_running:
+                    start_internal_clock()  # at the new period
+                logger.info("BPM changed:", internal_bpm)
+
+        elif submenu.name is clock_out_toggle_menu.name:
+            if is_clock_out != submenu.value:
+                if internal_clock_running and not submenu.value:
+                    scheduler.cancel(EVENT_CLOCK_OUT_OFF)
+                    digital_out.value(1)
+                is_clock_out = submenu.value
+                logger.info("ToggleMenu changed:", submenu.value)
+
+        elif submenu.name is reset_mode_menu.name:
+            if reset_mode != submenu.selected_index:
+                reset_mode = submenu.selected_index
+                reset_pending = False
+                logger.info("Reset mode changed:", submenu.selected)
+
+        elif submenu.name is catch_up_menu.name:
+            if catch_up_policy != submenu.selected_index:
+                catch_up_policy = submenu.selected_index
+                logger.info("Catch up policy changed:", submenu.selected)
 
         elif submenu.name is steps_menu.name:
-            if number_of_steps != submenu.selected:
+            if number_of_steps != submenu.selected and not is_song_mode:
+                current_step %= submenu.selected  # never past the new length
                 number_of_steps = submenu.selected
-                print("Number of steps changed", number_of_steps)
+                logger.info("Number of steps changed", number_of_steps)
 
         elif submenu.name is octaves_menu.name:
             if number_of_octaves != submenu.selected:
                 number_of_octaves = submenu.selected
-                print("Number of octaves changed:", number_of_octaves)
+                logger.info("Number of octaves changed:", number_of_octaves)
 
         elif submenu.name is starting_note_menu.name:
             if starting_note != submenu.selected:
                 starting_note = submenu.selected
-                print("Starting note changed:", starting_note)
+                logger.info("Starting note changed:", starting_note)
 
         elif submenu.name is cv_erase_toggle_menu.name:
             if is_cv_erase != submenu.value:
                 is_cv_erase = submenu.value
-                print("ToggleMenu changed:", submenu.value)
+                logger.info("ToggleMenu changed:", submenu.value)
 
         elif submenu.name is trig_erase_toggle_menu.name:
             if is_trig_erase != submenu.value:
                 is_trig_erase = submenu.value
-                print("ToggleMenu changed:", submenu.value)
+                logger.info("ToggleMenu changed:", submenu.value)
 
         elif submenu.name is test_cv_scale_toggle_menu.name:
             if is_test_cv_sequence != submenu.value:
                 is_test_cv_sequence = submenu.value
-                print("ToggleMenu changed:", submenu.value)
+                logger.info("ToggleMenu changed:", submenu.value)
 
         elif submenu.name is is_tuning_cv_scale_menu.name:
             if is_tuning_cv_sequence != submenu.value:
                 is_tuning_cv_sequence = submenu.value
-                print("ToggleMenu changed:", submenu.value)
+                logger.info("ToggleMenu changed:", submenu.value)
+
+        elif submenu.name is quantizer_toggle_menu.name:
+            if is_quantizer != submenu.value:
+                is_quantizer = submenu.value
+                previous_quantized_cv = -1
+                logger.info("ToggleMenu changed:", submenu.value)
+
+        elif submenu.name is quantizer_sample_and_hold_toggle_menu.name:
+            if is_quantizer_sample_and_hold != submenu.value:
+                is_quantizer_sample_and_hold = submenu.value
+                logger.info("ToggleMenu changed:", submenu.value)
+
+        elif submenu.name is profiler_toggle_menu.name:
+            if is_profiling != submenu.value:
+                is_profiling = submenu.value
+                loop_profiler.reset()
+                logger.info("ToggleMenu changed:", submenu.value)
+
+        elif submenu.name is latency_probe_toggle_menu.name:
+            if is_latency_probe != submenu.value:
+                set_latency_probe(submenu.value)
+                logger.info("ToggleMenu changed:", submenu.value)
+
+        elif submenu.name is fixed_memory_toggle_menu.name:
+            if is_fixed_memory != submenu.value:
+                is_fixed_memory = submenu.value
+                idle_collector.set_enabled(is_fixed_memory)
+                logger.info("ToggleMenu changed:", submenu.value)
+
+        elif submenu.name is song_toggle_menu.name:
+            if is_song_mode != submenu.value:
+                set_song_mode(submenu.value)
+                logger.info("ToggleMenu changed:", submenu.value)
+
+        elif submenu.name is gc_self_test_toggle_menu.name:
+            if is_gc_self_test != submenu.value:
+                is_gc_self_test = submenu.value
+                logger.info("ToggleMenu changed:", submenu.value)
+
+        elif submenu.name is record_toggle_menu.name:
+            if is_recording != submenu.value:
+                set_recording(submenu.value)
+                logger.info("ToggleMenu changed:", submenu.value)
 
         else:
             pass
             # print("Error, menu to be updated does not exist!")
 
-    current_12bit_scale = sc.get_scale_of_12_bit_values(
+    current_scale_length = sc.fill_12_bit_values(
+        current_12bit_scale,
         starting_note=starting_note + 12,
         scale_interval=current_scale_interval,
         octaves=number_of_octaves,
     )
+    fill_test_sequence()
+    if quantizer.rebuild(current_12bit_scale, current_scale_length):
+        previous_quantized_cv = -1
+        logger.info("Quantizer table rebuilt")
+    if is_recording:
+        record_setting_changes()
+
+
+def menu_value(submenu) -> int:
+    """A setting as logged by the event log: selected index, number or 1/0. -1 for screens."""
+    if isinstance(submenu, m.ToggleMenu):
+        return 1 if submenu.value else 0
+    if isinstance(submenu, m.SingleSelectVerticalScrollMenu):
+        return submenu.selected_index
+    if isinstance(submenu, m.NumericalValueRangeMenu):
+        return submenu.selected
+    return -1
+
+
+def set_menu_value(index: int, value: int) -> None:
+    """Changes a setting as if it was edited in the main menu, replays of the event log apply logged settings with it."""
+    submenu = submenus[index]
+    if isinstance(submenu, m.ToggleMenu):
+        submenu.value = value == 1
+    elif isinstance(submenu, (m.SingleSelectVerticalScrollMenu, m.NumericalValueRangeMenu)):
+        submenu.set_selected(value)
+    update_sequencer_values()
+
+
+def set_recording(enabled: bool) -> None:
+    """The log starts over with a keyframe, the digital input's edges are logged by handle_digital_edge()."""
+    global is_recording
+    is_recording = enabled
+    if enabled:
+        event_log.clear()
+        record_keyframe()
+
+
+def record_keyframe() -> None:
+    for index in range(len(submenus)):
+        recorded_settings[index] = menu_value(submenus[index])
+    event_log.keyframe(rng, current_step, number_of_steps, clock_ms, cv_sequence, trigger_sequence, recorded_settings, step_direction < 0)
+
+
+def record_setting_changes() -> None:
+    """Logs the settings that differ from the last logged ones."""
+    for index in range(len(submenus)):
+        value = menu_value(submenus[index])
+        if value != recorded_settings[index]:
+            recorded_settings[index] = value
+            event_log.record(el.PARAMETER, index, value)
+
+
+def run_bench_loop_iteration() -> None:
+    """The main loop without its menu stage, the benchmarks run from inside the menu"""
+    handle_clock_pulse()
+    check_trigger_off()
+    if not trigger_active and not step_changed_on_clock_pulse:
+        run_idle_tasks()
+
+
+def run_bench_step() -> None:
+    global step_changed_on_clock_pulse
+    play_step(time.ticks_ms(), time.ticks_us())
+    step_changed_on_clock_pulse = False
+
+
+def run_benchmarks() -> list[str]:
+    """
+    Runs the on-device benchmarks when the Bench screen is opened, only while the clock is stopped.
+    Steps are played with the event log, the latency probe, song mode, the GC self-test and the internal clock off,
+    then the sequencer is put back the way it was.
+    """
+    global handled_clock_edges, current_step, step_changed_on_clock_pulse, previous_clock_ticks, clock_ms, trigger_active, gate_scheduled, previous_quantized_cv, is_recording, is_latency_probe, is_song_mode, is_gc_self_test, is_internal_clock
+    if not is_clock_stopped() or clock_in.value() == 0:
+        device_bench.skip()
+        logger.warning("Benchmarks skipped, the clock is running")
+        return device_bench.summary_lines()
+
+    saved_flags = (is_recording, is_latency_probe, is_song_mode, is_gc_self_test, is_internal_clock)
+    saved_clock = (current_step, previous_clock_ticks, clock_ms)
+    saved_cv_sequence = cv_sequence[:]
+    saved_trigger_sequence = trigger_sequence[:]
+    saved_ratchet_sequence = ratchet_sequence[:]
+    saved_prng = (rng.high, rng.low)
+    is_recording = is_latency_probe = is_song_mode = is_gc_self_test = is_internal_clock = False
+    start_edges = clock_edge_count
+
+    cv = cv_sequence[max(current_step - 1, 0)]  # the note that is playing
+    display = m.display
+    device_bench.run(
+        dac_write=lambda: dac.write(cv),
+        full_flush=display.show,
+        partial_flush=lambda: display.show_pages(2, 3),
+        adc_sample=lambda: cv1.pin.read_u16(),
+        loop_iteration=run_bench_loop_iteration,
+        step_advance=run_bench_step,
+        interrupted=lambda: clock_edge_count != start_edges,
+    )
+
+    is_recording, is_latency_probe, is_song_mode, is_gc_self_test, is_internal_clock = saved_flags
+    current_step, previous_clock_ticks, clock_ms = saved_clock
+    tempo.reset()  # the steps played fast, the clock was stopped anyway
+    scheduler.cancel()
+    gate_scheduled = False
+    cv_sequence[:] = saved_cv_sequence
+    trigger_sequence[:] = saved_trigger_sequence
+    ratchet_sequence[:] = saved_ratchet_sequence
+    rng.set_state(*saved_prng)
+    step_changed_on_clock_pulse = False
+    trigger_active = False
+    digital_out.value(1)  # gate off
+    dac.write(cv)
+    previous_quantized_cv = -1  # the quantizer writes its note again
+    handled_clock_edges = start_edges  # an edge that stopped the run is played by the main loop
+    if device_bench.aborted:
+        logger.warning("Benchmarks stopped by a clock edge")
+    device_bench.dump()
+    return device_bench.summary_lines()
+
+
+def boot_user_interface():
+    """
+    Sets up the user interface after the sequencer already runs, one stage per call of next().
+    The main loop runs a stage whenever it is between steps, so clock edges are handled in between.
+    """
+    global m, scale_intervals, main_menu, scale_menu, cv_prob_menu, trig_prob_menu, trig_length_menu, clock_ratio_menu, ratchet_prob_menu, internal_clock_toggle_menu, bpm_menu, clock_out_toggle_menu, reset_mode_menu, catch_up_menu, steps_menu, octaves_menu, starting_note_menu, cv_erase_toggle_menu, trig_erase_toggle_menu, test_cv_scale_toggle_menu, is_tuning_cv_scale_menu, quantizer_toggle_menu, quantizer_sample_and_hold_toggle_menu, latency_probe, latency_probe_toggle_menu, latency_screen_menu, loop_profiler, profiler_toggle_menu, profiler_screen_menu, memory_screen_menu, fixed_memory_toggle_menu, gc_self_test_toggle_menu, boot_screen_menu, song, song_toggle_menu, el, event_log, record_toggle_menu, event_log_screen_menu, tempo_screen_menu, device_bench, bench_screen_menu, recorded_settings, submenus, cv1, cv2, cv3, cv4, quantizer_input, quantizer, ui_ready_us
+    for module_name in UI_MODULES:
+        memory_report.measure_imports((module_name,))
+        yield
+    import menu as m
+    from analog_reader import AnalogueReader
+    from quantizer import Quantizer
+    from latency import LatencyProbe
+    from profiler import LoopProfiler
+    from pattern_bank import PatternBank, Song
+    import event_log as el
+    from device_bench import DeviceBench
+
+    memory_report.snapshot("mods")
+    yield
+
+    m.init_display(i2c)  # shares the DAC's bus
+    yield
+
+    scale_intervals = sc.get_intervals()
+    main_menu = m.MainMenu()
+
+    scale_menu = m.SingleSelectVerticalScrollMenu(
+        "Scale",
+        button=main_menu.button,
+        selected=current_scale_interval,
+        items=scale_intervals,
+    )
+
+    cv_prob_menu = m.NumericalValueRangeMenu(
+        "CVProb", button=main_menu.button, selected=cv_probability_of_change, increment=5
+    )
+
+    trig_prob_menu = m.NumericalValueRangeMenu(
+        "TrigProb",
+        button=main_menu.button,
+        selected=trigger_probability_of_change,
+        increment=5,
+    )
+
+    trig_length_menu = m.NumericalValueRangeMenu(
+        "TrgLngth%",
+        button=main_menu.button,
+        selected=trigger_length_percent,
+        increment=10,
+    )
+
+    steps_menu = m.NumericalValueRangeMenu(
+        "Steps",
+        button=main_menu.button,
+        selected=number_of_steps,
+        increment=1,
+        min_val=MIN_NUMBER_OF_STEPS,
+        max_val=MAX_NUMBER_OF_STEPS,
+    )
+
+    octaves_menu = m.NumericalValueRangeMenu(
+        "Octaves",
+        button=main_menu.button,
+        selected=number_of_octaves,
+        increment=1,
+        min_val=MIN_NUMBER_OF_OCTAVES,
+        max_val=MAX_NUMBER_OF_OCTAVES,
+    )
+
+    starting_note_menu = m.NumericalValueRangeMenu(
+        "Start note",
+        button=main_menu.button,
+        selected=starting_note,
+        increment=1,
+        min_val=0,
+        max_val=MAX_STARTING_NOTE,
+    )
+
+    cv_erase_toggle_menu = m.ToggleMenu(
+        "CvErase", button=main_menu.button, value=is_cv_erase
+    )
+
+    trig_erase_toggle_menu = m.ToggleMenu(
+        "TrigErase", button=main_menu.button, value=is_trig_erase
+    )
+
+    clock_ratio_menu = m.SingleSelectVerticalScrollMenu(
+        "ClkRatio",
+        button=main_menu.button,
+        selected=CLOCK_RATIO_NAMES[CLOCK_RATIOS.index(clock_ratio)],
+        items=CLOCK_RATIO_NAMES,
+    )
+
+    ratchet_prob_menu = m.NumericalValueRangeMenu(
+        "RatchProb",
+        button=main_menu.button,
+        selected=ratchet_probability_of_change,
+        increment=5,
+    )
+
+    internal_clock_toggle_menu = m.ToggleMenu(
+        "IntClock", button=main_menu.button, value=is_internal_clock
+    )
+
+    bpm_menu = m.NumericalValueRangeMenu(
+        "BPM",
+        button=main_menu.button,
+        selected=internal_bpm,
+        increment=1,
+        min_val=MIN_BPM,
+        max_val=MAX_BPM,
+    )
+
+    clock_out_toggle_menu = m.ToggleMenu(
+        "ClkOut", button=main_menu.button, value=is_clock_out
+    )
+
+    reset_mode_menu = m.SingleSelectVerticalScrollMenu(
+        "RstMode",
+        button=main_menu.button,
+        selected=RESET_MODE_NAMES[reset_mode],
+        items=RESET_MODE_NAMES,
+    )
+
+    catch_up_menu = m.SingleSelectVerticalScrollMenu(
+        "CatchUp",
+        button=main_menu.button,
+        selected=CATCH_UP_NAMES[catch_up_policy],
+        items=CATCH_UP_NAMES,
+    )
+
+    test_cv_scale_toggle_menu = m.ToggleMenu(
+        "TestScale", button=main_menu.button, value=is_test_cv_sequence
+    )
+
+    is_tuning_cv_scale_menu = m.ToggleMenu(
+        "TuningScale", button=main_menu.button, value=is_tuning_cv_sequence
+    )
+
+    quantizer_toggle_menu = m.ToggleMenu(
+        "Quantizer", button=main_menu.button, value=is_quantizer
+    )
+
+    quantizer_sample_and_hold_toggle_menu = m.ToggleMenu(
+        "QuantS&H", button=main_menu.button, value=is_quantizer_sample_and_hold
+    )
+
+    latency_probe = LatencyProbe()
+
+    latency_probe_toggle_menu = m.ToggleMenu(
+        "LatProbe", button=main_menu.button, value=is_latency_probe
+    )
+
+    latency_screen_menu = m.ScreenMenu(
+        "Latency",
+        button=main_menu.button,
+        lines_callback=latency_probe.summary_lines,
+        action_callback=latency_probe.dump_csv,
+    )
+
+    loop_profiler = LoopProfiler(["menu", "clock", "trgoff", "quant", "idle"])
+
+    profiler_toggle_menu = m.ToggleMenu(
+        "Profiler", button=main_menu.button, value=is_profiling
+    )
+
+    profiler_screen_menu = m.ScreenMenu(
+        "LoopProf",
+        button=main_menu.button,
+        lines_callback=loop_profiler.summary_lines,
+        action_callback=loop_profiler.dump,
+    )
+
+    memory_screen_menu = m.ScreenMenu(
+        "Memory",
+        button=main_menu.button,
+        lines_callback=lambda: memory_report_lines(),
+        action_callback=memory_report.dump,
+    )
+
+    fixed_memory_toggle_menu = m.ToggleMenu(
+        "FixedMem", button=main_menu.button, value=is_fixed_memory
+    )
+
+    gc_self_test_toggle_menu = m.ToggleMenu(
+        "GCTest", button=main_menu.button, value=is_gc_self_test
+    )
+
+    boot_screen_menu = m.ScreenMenu(
+        "Boot", button=main_menu.button, lines_callback=boot_report_lines
+    )
+
+    song = Song(PatternBank())
+
+    song_toggle_menu = m.ToggleMenu("Song", button=main_menu.button, value=is_song_mode)
+
+    event_log = el.EventLog()
+
+    record_toggle_menu = m.ToggleMenu("Record", button=main_menu.button, value=is_recording)
+
+    event_log_screen_menu = m.ScreenMenu(
+        "EvtLog",
+        button=main_menu.button,
+        lines_callback=event_log.summary_lines,
+        action_callback=event_log.dump,
+    )
+
+    tempo_screen_menu = m.ScreenMenu(
+        "Tempo", button=main_menu.button, lines_callback=tempo.summary_lines
+    )
 
+    device_bench = DeviceBench()
+
+    bench_screen_menu = m.ScreenMenu(
+        "Bench", button=main_menu.button, lines_callback=lambda: run_benchmarks()
+    )
 
-# initialize sequencer
-test_cv_sequence = get_test_sequence()
-populate_sequence_with_default()
-print("Current scale:", current_12bit_scale)
-print("Sequence:", cv_sequence)
+    submenus = [
+        scale_menu,
+        cv_prob_menu,
+        trig_prob_menu,
+        trig_length_menu,
+        steps_menu,
+        octaves_menu,
+        starting_note_menu,
+        song_toggle_menu,
+        cv_erase_toggle_menu,
+        trig_erase_toggle_menu,
+        clock_ratio_menu,
+        ratchet_prob_menu,
+        internal_clock_toggle_menu,
+        bpm_menu,
+        clock_out_toggle_menu,
+        reset_mode_menu,
+        catch_up_menu,
+        test_cv_scale_toggle_menu,
+        is_tuning_cv_scale_menu,
+        quantizer_toggle_menu,
+        quantizer_sample_and_hold_toggle_menu,
+        latency_probe_toggle_menu,
+        latency_screen_menu,
+        profiler_toggle_menu,
+        profiler_screen_menu,
+        fixed_memory_toggle_menu,
+        gc_self_test_toggle_menu,
+        memory_screen_menu,
+        boot_screen_menu,
+        record_toggle_menu,
+        event_log_screen_menu,
+        tempo_screen_menu,
+        bench_screen_menu,
+    ]
+    main_menu.set_submenus(submenu_list=submenus)
+    recorded_settings = array("h", (-1 for _ in submenus))  # the last logged value of every setting
+    memory_report.snapshot("menu")
+    yield
+
+    # analog inputs
+    cv1 = AnalogueReader(A3)
+    cv2 = AnalogueReader(A2)
+    cv3 = AnalogueReader(A1)
+    cv4 = AnalogueReader(A0)
+
+    # quantizer
+    quantizer_input = cv1
+    quantizer = Quantizer()
+    quantizer.rebuild(current_12bit_scale, current_scale_length)
+    yield
+
+    ui_ready_us = time.ticks_us()
+    logger.info("Boot to user interface us:", ui_ready_us)
+
+
+def boot_report_lines() -> list[str]:
+    """Lines of at most 16 characters for the 128px wide display"""
+    return [
+        "since reset",
+        f"DAC:{first_dac_write_us:>10}us",
+        f"UI: {ui_ready_us:>10}us",
+    ]
+
+
+def run_boot_loop_iteration() -> None:
+    """The main loop while the user interface boots: the sequencer runs, boot stages fill the gaps between steps."""
+    global ui_boot
+    handle_clock_pulse()
+    check_trigger_off()
+    if trigger_active or step_changed_on_clock_pulse:
+        return
+    try:
+        next(ui_boot)
+    except StopIteration:
+        ui_boot = None
+
+
+scheduler = EventScheduler(handle_scheduled_event)
+internal_clock = machine.Timer()
+
+# initialize sequencer, its first note is output before the user interface exists
+if presets.load():
+    restore_preset()
+else:
+    populate_sequence_with_default()
+fill_test_sequence()
+dac.write(cv_sequence[0])
+first_dac_write_us = time.ticks_us()
+logger.info("Boot to first DAC write us:", first_dac_write_us)
+logger.info("Current scale:", current_12bit_scale[:current_scale_length])
+logger.info("Sequence:", cv_sequence)
+memory_report.snapshot("init")
+ui_boot = boot_user_interface()
+clock_in.irq(clock_edge_irq, machine.Pin.IRQ_FALLING, hard=True)
+digital_in.irq(digital_edge_irq, machine.Pin.IRQ_RISING | machine.Pin.IRQ_FALLING, hard=True)
 
 # previous_cv1_value = 0
 
@@ -431,8 +1536,22 @@ while True:
     #     # main_menu.initialize_main_menu()
     #     previous_cv1_value = cv1_value
 
-    main_menu.loop_main_menu(
-        update_main_program_values_callback=update_sequencer_values
-    )
+    if ui_boot is not None:
+        run_boot_loop_iteration()
+        continue
+
+    if is_profiling:
+        run_profiled_loop_iteration()
+        continue
+
+    if is_menu_due():
+        main_menu.loop_main_menu(
+            update_main_program_values_callback=update_sequencer_values
+        )
     handle_clock_pulse()
     check_trigger_off()
+    if is_quantizer and not is_quantizer_sample_and_hold:
+        quantize_input()
+    if not trigger_active and not step_changed_on_clock_pulse:
+        # between steps: the gate is off and the clock is low
+        run_idle_tasks()